@@ -0,0 +1,215 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from crm_automation.config import Config
+from crm_automation.core import metrics
+from crm_automation.core.logger import logger
+
+# Pieces shared by the benchmark suite and the API load test: isolated run settings,
+# the API served in-process, step timings from the Prometheus histograms and the
+# browser processes' CPU/RSS.
+
+
+@contextmanager
+def isolated_config(directory: str, base_url: str, **overrides):
+    """
+    Points the automation at base_url with its own checkpoint, backend profile, jobs,
+    session cache, input strategy and locator files under `directory`, so runs do not resume or
+    learn from each other. Restores the previous settings afterwards.
+    """
+    os.makedirs(directory, exist_ok=True)
+    settings = {
+        "CHECKPOINT_DB": os.path.join(directory, "checkpoints.db"),
+        "BACKEND_PROFILE": os.path.join(directory, "backend_profile.json"),
+        "JOBS_DB": os.path.join(directory, "jobs.db"),
+        "SESSION_CACHE_DIR": os.path.join(directory, "session_cache"),
+        "INPUT_STRATEGY_CACHE": os.path.join(directory, "input_strategies.json"),
+        "LOCATOR_CACHE": os.path.join(directory, "locator_winners.json"),
+    }
+    settings.update(overrides)
+    names = list(settings) + ["BASE_URL", "URL_LOGIN", "URL_PARTNER", "URL_PANELS", "URL_CONTACTS"]
+    previous = {name: getattr(Config, name) for name in names}
+    try:
+        for name, value in settings.items():
+            setattr(Config, name, value)
+        Config.use_base_url(base_url)
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(Config, name, value)
+
+
+def step_totals() -> Dict[str, Tuple[float, int]]:
+    """Seconds and count observed so far per succeeded step (crm_step_duration_seconds)."""
+    totals: Dict[str, list] = {}
+    for family in metrics.STEP_DURATION.collect():
+        for sample in family.samples:
+            if sample.labels.get("status") != "succeeded":
+                continue
+            entry = totals.setdefault(sample.labels["step"], [0.0, 0])
+            if sample.name.endswith("_sum"):
+                entry[0] = sample.value
+            elif sample.name.endswith("_count"):
+                entry[1] = int(sample.value)
+    return {step: (seconds, count) for step, (seconds, count) in totals.items()}
+
+
+def step_deltas(before: Dict[str, Tuple[float, int]], after: Dict[str, Tuple[float, int]]) -> Dict[str, float]:
+    """Time spent per step between two step_totals() snapshots."""
+    deltas = {}
+    for step, (seconds, count) in after.items():
+        previous_seconds, previous_count = before.get(step, (0.0, 0))
+        if count > previous_count:
+            deltas[step] = round(seconds - previous_seconds, 3)
+    return deltas
+
+
+class BrowserMonitor:
+    """
+    Samples the Chromium processes started by this process: CPU seconds (summed over every
+    process seen) and peak RSS of all of them together, plus the peak RSS of this process
+    itself. Needs psutil; without it the resource figures are None.
+    """
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.cpu: Dict[int, float] = {}
+        # CPU already used by browsers running before the block (e.g. the API's warm pool)
+        self.initial_cpu: Dict[int, float] = {}
+        self.peak_rss = 0
+        self.peak_own_rss = 0
+        self.available = True
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        try:
+            import psutil
+        except ImportError:
+            logger.warning("Browser CPU/RSS need psutil (pip install psutil). Reporting them as null.")
+            self.available = False
+            return self
+        self._process = psutil.Process()
+        self._psutil = psutil
+        self._sample()
+        self.initial_cpu = dict(self.cpu)
+        self.peak_rss = 0
+        self._thread = threading.Thread(target=self._run, name="browser-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = 0
+        for child in self._process.children(recursive=True):
+            try:
+                if "chrom" not in child.name().lower() and "headless" not in child.name().lower():
+                    continue
+                times = child.cpu_times()
+                self.cpu[child.pid] = times.user + times.system
+                rss += child.memory_info().rss
+            except self._psutil.Error:
+                continue
+        self.peak_rss = max(self.peak_rss, rss)
+        try:
+            self.peak_own_rss = max(self.peak_own_rss, self._process.memory_info().rss)
+        except self._psutil.Error:
+            pass
+
+    def result(self) -> Dict[str, Optional[float]]:
+        if not self.available:
+            return {"browser_cpu_seconds": None, "browser_peak_rss_mb": None, "process_peak_rss_mb": lifetime_peak_rss_mb()}
+        return {
+            "browser_cpu_seconds": round(sum(cpu - self.initial_cpu.get(pid, 0) for pid, cpu in self.cpu.items()), 2),
+            "browser_peak_rss_mb": round(self.peak_rss / 2 ** 20, 1),
+            "process_peak_rss_mb": round(self.peak_own_rss / 2 ** 20, 1),
+        }
+
+
+def lifetime_peak_rss_mb() -> Optional[float]:
+    """Peak RSS of this process since it started (fallback without psutil; Unix only)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+class ApiServer:
+    """The FastAPI app (crm_automation.api) served by uvicorn on a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = None):
+        import uvicorn
+        from crm_automation.api import app
+
+        self.host = host
+        self.port = port or free_port(host)
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=self.port, log_level="warning"))
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 60) -> "ApiServer":
+        self._thread = threading.Thread(target=self.server.run, name="api-server", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("API server did not start.")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def http_json(method: str, url: str, body: Any = None, timeout: float = 600) -> Tuple[int, Any]:
+    """Sends a JSON request. Returns (status, decoded body); HTTP errors are returned, not raised."""
+    request = urllib.request.Request(
+        url, method=method, data=json.dumps(body).encode("utf-8") if body is not None else None,
+        headers={"Content-Type": "application/json", "Accept": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status, payload = response.status, response.read()
+    except urllib.error.HTTPError as e:
+        status, payload = e.code, e.read()
+    try:
+        return status, json.loads(payload or b"null")
+    except ValueError:
+        return status, payload.decode("utf-8", "replace")
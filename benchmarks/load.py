@@ -0,0 +1,178 @@
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from benchmarks.harness import ApiServer, BrowserMonitor, http_json, isolated_config
+from crm_automation.config import Config
+from crm_automation.core.logger import logger, setup_logger
+from crm_automation.mock_crm import MockCRMServer, MockCRMState
+
+# API load test: concurrent /api/v1/auth/init + /api/v1/auth/complete pairs against the
+# mock CRM, at increasing concurrency, to find where one API instance stops scaling.
+
+OTP = "123456"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100). None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)], 3)
+
+
+def onboard_once(api_url: str, email: str, account_name: str, timeout: float) -> Dict[str, Any]:
+    """One init + complete pair. Returns its timings and, on failure, the phase and error."""
+    started = time.monotonic()
+    result = {"account_name": account_name, "init": None, "complete": None, "total": None, "error": None}
+    try:
+        status, init = http_json("POST", f"{api_url}/api/v1/auth/init", {"email": email}, timeout=timeout)
+    except Exception as e:
+        status, init = None, str(e)
+    result["init"] = round(time.monotonic() - started, 3)
+    if status != 200:
+        result["error"] = f"init {status or type(init).__name__}"
+        result["detail"] = str(init)[:200]
+        return result
+
+    complete_started = time.monotonic()
+    try:
+        status, body = http_json("POST", f"{api_url}/api/v1/auth/complete", {
+            "email": email, "code": OTP, "account_name": account_name,
+            "session_token": init.get("session_token"), "session_state": init.get("session_state"),
+        }, timeout=timeout)
+    except Exception as e:
+        status, body = None, str(e)
+    result["complete"] = round(time.monotonic() - complete_started, 3)
+    result["total"] = round(time.monotonic() - started, 3)
+    if status != 200:
+        result["error"] = f"complete {status or 'timeout'}"
+        result["detail"] = str(body)[:200]
+    return result
+
+
+def run_level(api_url: str, concurrency: int, accounts: List[str], timeout: float) -> Dict[str, Any]:
+    """Onboards `accounts` with `concurrency` clients at a time. Returns the level's figures."""
+    with BrowserMonitor() as monitor:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(onboard_once, api_url, f"load-{os.getpid()}-{i}@example.com", account, timeout)
+                       for i, account in enumerate(accounts)]
+            results = [future.result() for future in futures]
+        wall = time.monotonic() - started
+
+    succeeded = [r for r in results if r["error"] is None]
+    errors = Counter(r["error"] for r in results if r["error"] is not None)
+    level = {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "succeeded": len(succeeded),
+        "error_rate": round(1 - len(succeeded) / len(results), 3) if results else 0,
+        "errors": dict(errors),
+        "wall": round(wall, 2),
+        "throughput_per_min": round(len(succeeded) / wall * 60, 2) if wall else 0,
+        "latency": {
+            "p50": percentile([r["total"] for r in succeeded], 50),
+            "p90": percentile([r["total"] for r in succeeded], 90),
+            "p99": percentile([r["total"] for r in succeeded], 99),
+            "max": percentile([r["total"] for r in succeeded], 100),
+            "init_p50": percentile([r["init"] for r in succeeded], 50),
+            "complete_p50": percentile([r["complete"] for r in succeeded], 50),
+        },
+    }
+    level.update(monitor.result())
+    for result in results:
+        if result["error"]:
+            logger.warning(f"[{concurrency}x] {result['account_name']}: {result['error']} - {result.get('detail')}")
+    return level
+
+
+def format_levels(levels: List[Dict[str, Any]]) -> str:
+    lines = [f"{'conc':>4} {'ok/req':>8} {'err%':>6} {'onb/min':>8} {'p50':>8} {'p90':>8} {'p99':>8} "
+             f"{'api MB':>8} {'chrome MB':>10}"]
+    for level in levels:
+        latency = level["latency"]
+        lines.append(
+            f"{level['concurrency']:>4} {level['succeeded']:>3}/{level['requests']:<4} "
+            f"{level['error_rate'] * 100:>5.1f}% {level['throughput_per_min']:>8} "
+            f"{str(latency['p50']):>8} {str(latency['p90']):>8} {str(latency['p99']):>8} "
+            f"{str(level['process_peak_rss_mb']):>8} {str(level['browser_peak_rss_mb']):>10}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga da API de onboarding contra o CRM mock")
+    parser.add_argument("--concurrency", default="1,2,4,8",
+                        help="Níveis de concorrência testados, em ordem (separados por vírgula)")
+    parser.add_argument("--requests", type=int,
+                        help="Onboardings por nível (padrão: 2 x a concorrência)")
+    parser.add_argument("--pool-size", type=int, default=Config.BROWSER_POOL_SIZE,
+                        help="BROWSER_POOL_SIZE da API iniciada pelo teste")
+    parser.add_argument("--api-url",
+                        help="Usa uma API já em execução (ex.: o container) em vez de iniciar uma local. "
+                             "O BASE_URL dela deve apontar para o mock deste teste (--mock-port)")
+    parser.add_argument("--mock-host", default="127.0.0.1", help="Endereço do CRM mock")
+    parser.add_argument("--mock-port", type=int, default=0, help="Porta do CRM mock (0 = livre)")
+    parser.add_argument("--latency-ms", type=int, default=Config.MOCK_CRM_LATENCY_MS,
+                        help="Atraso de cada resposta da API do mock, em ms")
+    parser.add_argument("--ui-delay-ms", type=int, default=Config.MOCK_CRM_UI_DELAY_MS,
+                        help="Atraso das animações do mock, em ms")
+    parser.add_argument("--timeout", type=float, default=600, help="Tempo máximo de cada requisição, em segundos")
+    parser.add_argument("--max-error-rate", type=float, default=0.5,
+                        help="Para de aumentar a concorrência quando a taxa de erro passa deste valor")
+    parser.add_argument("--output", help="Salva o resultado de cada nível neste arquivo JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    plan = [(c, args.requests or 2 * c) for c in levels]
+    # One fresh account per onboarding, so every pair creates the whole template
+    accounts = [f"Conta Carga {i + 1:04d}" for i in range(sum(n for _, n in plan))]
+    state = MockCRMState(partners=accounts, otp_code=OTP)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="crm-load-") as workdir, \
+            MockCRMServer(args.mock_host, args.mock_port, latency_ms=args.latency_ms,
+                          ui_delay_ms=args.ui_delay_ms, state=state) as crm, \
+            isolated_config(workdir, crm.url, BROWSER_POOL_SIZE=args.pool_size):
+        api = None if args.api_url else ApiServer().start()
+        api_url = args.api_url or api.url
+        if args.api_url:
+            logger.info(f"Using the API at {api_url}: its BASE_URL must be {crm.url}")
+        try:
+            offset = 0
+            for concurrency, count in plan:
+                logger.info(f"Load level: {count} onboarding(s), {concurrency} at a time")
+                level = run_level(api_url, concurrency, accounts[offset:offset + count], args.timeout)
+                offset += count
+                results.append(level)
+                logger.info("\n" + format_levels(results))
+                if level["error_rate"] > args.max_error_rate:
+                    logger.warning(f"Error rate {level['error_rate']:.0%} above {args.max_error_rate:.0%}. "
+                                   f"Stopping before higher concurrency.")
+                    break
+        finally:
+            if api is not None:
+                api.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"pool_size": args.pool_size, "latency_ms": args.latency_ms, "levels": results}, f, indent=2)
+        logger.info(f"Load test results saved to '{args.output}'")
+    return 0
+
+
+if __name__ == "__main__":
+    setup_logger(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.harness import ApiServer, BrowserMonitor, http_json, isolated_config, step_deltas, step_totals
+from crm_automation.config import Config
+from crm_automation.core.instrumentation import Profiler, profiling
+from crm_automation.core.logger import logger, setup_logger
+from crm_automation.core.templates import load_template, normalize_name
+from crm_automation.mock_crm import MockCRMServer
+
+# End-to-end onboarding benchmark: the full flow of the CLI (main.run_automation) and of
+# the API (auth/init + jobs/onboarding) against the local mock CRM, compared with JSON baselines.
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baselines", "onboarding.json")
+BASELINE_VERSION = 1
+SCENARIOS = ("cli", "api")
+ACCOUNT = "Clínica Exemplo"
+OTP = "123456"
+
+# Figures compared with the baseline besides the per-step times
+TIME_METRICS = ("wall",)
+COUNT_METRICS = ("round_trips", "crm_requests")
+RESOURCE_METRICS = ("browser_cpu_seconds", "browser_peak_rss_mb")
+
+
+def run_cli(email: str, workdir: str) -> Dict[str, Any]:
+    """One CLI onboarding (login with the 2FA code + account). Returns the Playwright round trips."""
+    from crm_automation import main
+
+    args = main.parse_args([
+        "--account-name", ACCOUNT, "--email", email, "--step", "complete-auth", "--code", OTP,
+        "--no-session-cache", "--auth-file", os.path.join(workdir, "auth_state.json"),
+        "--screenshot-dir", os.path.join(workdir, "screenshots"),
+    ])
+    profiler = Profiler("benchmark")
+    try:
+        with profiling(profiler):
+            main.run_automation(args)
+    except SystemExit as e:
+        if e.code:
+            raise RuntimeError(f"run_automation exited with status {e.code}")
+    return {"round_trips": profiler.summary()["calls"]}
+
+
+def run_api(api: ApiServer, email: str, timeout: float = 600) -> Dict[str, Any]:
+    """
+    One API onboarding: /auth/init, then /jobs/onboarding polled until done. Round trips are
+    the Playwright calls of the job (the init phase is not profiled by the API).
+    """
+    status, init = http_json("POST", f"{api.url}/api/v1/auth/init", {"email": email})
+    if status != 200:
+        raise RuntimeError(f"auth/init failed ({status}): {init}")
+    status, job = http_json("POST", f"{api.url}/api/v1/jobs/onboarding", {
+        "email": email, "code": OTP, "account_name": ACCOUNT, "profile": True,
+        "session_token": init.get("session_token"), "session_state": init.get("session_state"),
+    })
+    if status != 202:
+        raise RuntimeError(f"jobs/onboarding failed ({status}): {job}")
+
+    deadline = time.monotonic() + timeout
+    while True:
+        status, job = http_json("GET", f"{api.url}/api/v1/jobs/{job['job_id']}")
+        if status == 200 and job["status"] in ("succeeded", "failed"):
+            break
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Onboarding job did not finish in {timeout}s.")
+        time.sleep(0.2)
+    if job["status"] != "succeeded":
+        raise RuntimeError(f"Onboarding job failed: {job['error']}")
+    return {"round_trips": job["result"]["profile"]["calls"]}
+
+
+def run_scenario(scenario: str, runs: int, latency_ms: int, ui_delay_ms: int, workdir: str) -> List[Dict[str, Any]]:
+    """Runs the scenario `runs` times, each against a fresh mock CRM. Returns one sample per run."""
+    template = load_template()
+    api = ApiServer().start() if scenario == "api" else None
+    samples = []
+    try:
+        for i in range(runs):
+            run_dir = os.path.join(workdir, f"{scenario}-{i}")
+            # A new e-mail per run: the API's session cache must not skip the login
+            email = f"bench-{scenario}-{i}-{os.getpid()}@example.com"
+            with MockCRMServer(latency_ms=latency_ms, ui_delay_ms=ui_delay_ms, otp_code=OTP) as crm, \
+                    isolated_config(run_dir, crm.url), BrowserMonitor() as monitor:
+                before = step_totals()
+                started = time.monotonic()
+                extra = run_cli(email, run_dir) if scenario == "cli" else run_api(api, email)
+                wall = time.monotonic() - started
+
+                created = {normalize_name(p["name"]) for p in crm.state.panels(ACCOUNT)}
+                missing = [p for p in template.panel_names if normalize_name(p) not in created]
+                if missing:
+                    raise RuntimeError(f"Run finished without creating panel(s): {', '.join(missing)}")
+                sample = {
+                    "wall": round(wall, 3),
+                    "steps": step_deltas(before, step_totals()),
+                    "crm_requests": sum(crm.state.calls.values()),
+                }
+            sample.update(extra)
+            sample.update(monitor.result())
+            logger.info(f"Benchmark {scenario} run {i + 1}/{runs}: {sample['wall']:.2f}s")
+            samples.append(sample)
+    finally:
+        if api is not None:
+            api.stop()
+    return samples
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Medians over the runs. Steps are kept only when every run reported them."""
+    def median(values):
+        values = [v for v in values if v is not None]
+        return round(statistics.median(values), 3) if values else None
+
+    steps = set(samples[0]["steps"])
+    for sample in samples[1:]:
+        steps &= set(sample["steps"])
+    summary = {name: median([s.get(name) for s in samples]) for name in TIME_METRICS + COUNT_METRICS + RESOURCE_METRICS}
+    summary["steps"] = {step: median([s["steps"][step] for s in samples]) for step in sorted(steps)}
+    summary["runs"] = len(samples)
+    return summary
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta: float) -> List[str]:
+    """
+    Regressions of `current` against `baseline`: a figure more than `threshold` (relative)
+    above its baseline. Times must also be `min_delta` seconds slower, so jitter on short
+    steps does not fail the run. Figures missing on either side are not compared.
+    """
+    pairs = [(name, current.get(name), baseline.get(name), name in TIME_METRICS)
+             for name in TIME_METRICS + COUNT_METRICS + RESOURCE_METRICS]
+    pairs += [(f"step {step}", seconds, baseline.get("steps", {}).get(step), True)
+              for step, seconds in current.get("steps", {}).items()]
+
+    regressions = []
+    for name, value, base, is_time in pairs:
+        if value is None or base is None:
+            continue
+        limit = base * (1 + threshold) + (min_delta if is_time else 0)
+        if value > limit:
+            change = f"+{(value - base) / base:.0%}" if base else "new"
+            regressions.append(f"{name}: {value} vs baseline {base} ({change}, limit {limit:.3f})")
+    return regressions
+
+
+def load_baselines(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {"version": BASELINE_VERSION, "scenarios": {}}
+    if data.get("version") != BASELINE_VERSION:
+        logger.warning(f"Baseline file {path} has another version. Ignoring it.")
+        return {"version": BASELINE_VERSION, "scenarios": {}}
+    return data
+
+
+def save_baselines(path: str, data: Dict[str, Any]):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def format_report(scenario: str, summary: Dict[str, Any], baseline: Dict[str, Any] = None) -> str:
+    baseline = baseline or {}
+    lines = [f"Scenario '{scenario}' ({summary['runs']} run(s), medians; baseline in brackets):"]
+
+    def row(name, value, base):
+        base_text = f"[{base}]" if base is not None else "[-]"
+        lines.append(f"  {name:<44} {str(value):>10} {base_text:>12}")
+
+    for name in TIME_METRICS + COUNT_METRICS + RESOURCE_METRICS:
+        row(name, summary.get(name), baseline.get(name))
+    for step, seconds in summary["steps"].items():
+        row(f"step {step}", seconds, baseline.get("steps", {}).get(step))
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do onboarding completo contra o CRM mock")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all",
+                        help="Fluxo medido: CLI (run_automation), API (auth/init + jobs) ou ambos")
+    parser.add_argument("--runs", type=int, default=3, help="Execuções por cenário (compara-se a mediana)")
+    parser.add_argument("--latency-ms", type=int, default=Config.MOCK_CRM_LATENCY_MS,
+                        help="Atraso de cada resposta da API do mock, em ms")
+    parser.add_argument("--ui-delay-ms", type=int, default=Config.MOCK_CRM_UI_DELAY_MS,
+                        help="Atraso das animações do mock, em ms")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Arquivo JSON com as baselines")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Piora relativa tolerada em cada etapa/indicador (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.5,
+                        help="Piora mínima, em segundos, para um tempo contar como regressão")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Grava os resultados como nova baseline em vez de comparar")
+    parser.add_argument("--output", help="Salva amostras e medianas desta execução neste arquivo JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    baselines = load_baselines(args.baseline)
+    results, regressions, recorded = {}, [], []
+
+    with tempfile.TemporaryDirectory(prefix="crm-bench-") as workdir:
+        for scenario in scenarios:
+            samples = run_scenario(scenario, args.runs, args.latency_ms, args.ui_delay_ms, workdir)
+            summary = summarize(samples)
+            summary.update(latency_ms=args.latency_ms, ui_delay_ms=args.ui_delay_ms)
+            results[scenario] = {"samples": samples, "summary": summary}
+
+            baseline = baselines["scenarios"].get(scenario)
+            logger.info("\n" + format_report(scenario, summary, baseline))
+            if args.update_baseline or baseline is None:
+                baselines["scenarios"][scenario] = dict(summary, recorded_at=datetime.datetime.now().isoformat(timespec="seconds"))
+                recorded.append(scenario)
+                continue
+            if (baseline.get("latency_ms"), baseline.get("ui_delay_ms")) != (args.latency_ms, args.ui_delay_ms):
+                logger.warning(f"Baseline of '{scenario}' was recorded with other mock delays. Comparison may be off.")
+            regressions += [f"{scenario} {r}" for r in compare(summary, baseline, args.threshold, args.min_delta)]
+
+    if recorded:
+        save_baselines(args.baseline, baselines)
+        logger.info(f"Baseline recorded for {', '.join(recorded)} in {args.baseline}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if regressions:
+        logger.error("Performance regressions:\n  " + "\n  ".join(regressions))
+        return 1
+    logger.info("No regression beyond the thresholds.")
+    return 0
+
+
+if __name__ == "__main__":
+    setup_logger(level=logging.INFO)
+    sys.exit(main())
@@ -1,21 +1,72 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
-from playwright.sync_api import sync_playwright
+from typing import Optional, Dict, Any, List
+import asyncio
 import logging
-import os
+import threading
 
 from crm_automation.config import Config
+from crm_automation.core import metrics
 from crm_automation.core.logger import setup_logger, logger
+from crm_automation.core.browser_pool import BrowserPool
+from crm_automation.core.exceptions import BrowserContextError, SessionMismatchError
+from crm_automation.core.instrumentation import Profiler, log_report, profiling
+from crm_automation.core.jobs import JobStore, JobQueue
+from crm_automation.core.live_sessions import LiveSessionRegistry
 from crm_automation.pages.login_page import LoginPage
-from crm_automation.pages.admin_page import AdminPage
-from crm_automation.pages.panels_page import PanelsPage
-from crm_automation.pages.contacts_page import ContactsPage
+from crm_automation.workflow import ONBOARDING_STEPS, run_onboarding, onboard_accounts, track_step
 
 # Setup Logger
 setup_logger(level=logging.INFO)
 
-app = FastAPI(title="CRM Automation API", version="1.0.0")
+browser_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> BrowserPool:
+    """Returns the warm browser pool, starting it on first use (serverless has no startup hook)."""
+    global browser_pool
+    with _pool_lock:
+        if browser_pool is None:
+            browser_pool = BrowserPool(headless=Config.HEADLESS).start()
+        return browser_pool
+
+live_sessions: Optional[LiveSessionRegistry] = None
+
+def get_live_sessions() -> LiveSessionRegistry:
+    global live_sessions
+    pool = get_pool()
+    with _pool_lock:
+        if live_sessions is None:
+            live_sessions = LiveSessionRegistry(pool)
+        return live_sessions
+
+job_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    global job_queue
+    with _pool_lock:
+        if job_queue is None:
+            store = JobStore()
+            store.fail_unfinished()
+            job_queue = JobQueue(store)
+        return job_queue
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(get_pool)
+    yield
+    global browser_pool
+    if job_queue is not None:
+        job_queue.shutdown()
+    if live_sessions is not None:
+        live_sessions.close()
+    if browser_pool is not None:
+        browser_pool.close()
+        browser_pool = None
+
+app = FastAPI(title="CRM Automation API", version="1.0.0", lifespan=lifespan)
 
 class InitAuthRequest(BaseModel):
     email: str
@@ -24,166 +75,266 @@ class InitAuthResponse(BaseModel):
     status: str
     message: str
     session_state: Dict[str, Any]
+    # Opaque handle to the browser page parked on the OTP screen (valid for LIVE_SESSION_TTL)
+    session_token: Optional[str] = None
 
 class CompleteAuthRequest(BaseModel):
     email: str
     code: str
     account_name: str
-    session_state: Dict[str, Any]
+    # Fallback used to replay the email step when the live session is gone
+    session_state: Optional[Dict[str, Any]] = None
+    session_token: Optional[str] = None
+    # Times every Playwright call of the run: the report is logged and returned in `logs`
+    # (/auth/complete) or as `profile` in the job result
+    profile: bool = False
 
 class CompleteAuthResponse(BaseModel):
     status: str
     message: str
     logs: Optional[list] = None
 
+class BatchOnboardingRequest(BaseModel):
+    email: str
+    code: str
+    account_names: List[str]
+    session_state: Optional[Dict[str, Any]] = None
+    session_token: Optional[str] = None
+    # Accounts onboarded in parallel (defaults to BATCH_CONCURRENCY)
+    concurrency: Optional[int] = None
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+
+class JobStep(BaseModel):
+    name: str
+    status: str
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    steps: List[JobStep]
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+# Steps reported by a complete-auth run (login + shared onboarding flow)
+COMPLETE_AUTH_STEPS = ["login", "submit_otp"] + ONBOARDING_STEPS
+
+class SessionExpiredError(Exception):
+    """The live session is gone and no session_state was sent to replay the login."""
+    pass
+
+def authenticate(context, page, request, progress=None):
+    """
+    Submits the 2FA code. `page` is the live page parked by init_auth, or None
+    to replay the email step on a fresh page. Returns the authenticated page.
+    The API always asks for the code and never stores the session: the session cache is
+    the CLI's only.
+    """
+    resumed = page is not None
+    if resumed:
+        logger.info("Resuming live session parked on the OTP screen.")
+    else:
+        logger.info("Session state restored.")
+        page = context.new_page()
+    login_page = LoginPage(page)
+
+    def login():
+        if resumed:
+            return
+        # Navigate to Login - Relaxed wait condition and increased timeout
+        page.goto(Config.URL_LOGIN, timeout=60000, wait_until='domcontentloaded')
+        # Re-enter email to trigger code screen (Idempotency fix)
+        login_page.initiate_login(request.email)
+
+    track_step(progress, "login", login)
+    track_step(progress, "submit_otp", login_page.submit_otp, request.code)
+    return page
+
+def complete_auth_flow(request: CompleteAuthRequest, progress=None):
+    """Returns fn(context, page) that logs in with the 2FA code and runs the onboarding."""
+    def run(context, page=None):
+        resumed = page is not None
+        profiler = Profiler(request.account_name) if request.profile or Config.PLAYWRIGHT_PROFILE else None
+        try:
+            with profiling(profiler):
+                page = authenticate(context, page, request, progress)
+
+                # --- Continue Automation ---
+                steps = run_onboarding(page, request.account_name, progress=progress, pool=get_pool())
+        finally:
+            if profiler is not None:
+                log_report(profiler)
+        result = {"account_name": request.account_name, "resumed_live_session": resumed, "steps": steps}
+        if profiler is not None:
+            result["profile"] = dict(profiler.summary(), report=profiler.report())
+        return result
+
+    return run
+
+def start_authenticated(request, flow):
+    """
+    Schedules flow(context, page) preferring the live session of request.session_token,
+    falling back to a context restored from request.session_state. Returns a Future.
+    Raises SessionMismatchError when the live session belongs to another email.
+    """
+    session = get_live_sessions().take(request.session_token, email=request.email)
+    if session is not None:
+        return live_sessions.resume(session, flow)
+    if request.session_token:
+        logger.warning("Live session expired or unknown. Replaying the email step.")
+    if request.session_state is None:
+        raise SessionExpiredError("Live session expired. Call /api/v1/auth/init again.")
+    return get_pool().submit(lambda context: flow(context), storage_state=request.session_state)
+
+def start_complete_auth(request: CompleteAuthRequest, progress=None):
+    """Schedules the complete-auth flow, preferring the live session. Returns a Future."""
+    return start_authenticated(request, complete_auth_flow(request, progress))
+
+def run_batch(request: "BatchOnboardingRequest", progress=None):
+    """Logs in once, then onboards every account from the authenticated storage state."""
+    def login(context, page=None):
+        authenticate(context, page, request, progress)
+        return context.storage_state()
+
+    # The login context is closed before the accounts start, freeing its slot
+    storage_state = start_authenticated(request, login).result()
+    results = onboard_accounts(get_pool(), storage_state, request.account_names,
+                               concurrency=request.concurrency, progress=progress)
+    return {"accounts": results}
+
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    if browser_pool is None:
+        return {"status": "ok", "browser_pool": None}
+    pool = browser_pool.health()
+    pool["live_sessions"] = len(live_sessions) if live_sessions is not None else 0
+    return {"status": "ok" if pool["healthy"] else "degraded", "browser_pool": pool}
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint: step/action latency histograms, retries, failures, pool usage."""
+    metrics.update_pool(browser_pool.health() if browser_pool is not None else None,
+                        len(live_sessions) if live_sessions is not None else 0)
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
 
 @app.post("/api/v1/auth/init", response_model=InitAuthResponse)
-def init_auth(request: InitAuthRequest):
+async def init_auth(request: InitAuthRequest):
     """
     Phase 1: Opens browser, enters email, waits for 2FA code input.
-    Returns the session state (cookies/local storage) to be saved by the client (n8n).
+    Returns the session state (cookies/local storage) to be saved by the client (n8n)
+    and a session token: the page stays open on the OTP screen until complete_auth.
     """
     logger.info(f"API: Initiating auth for {request.email}")
-    
-    try:
-        with sync_playwright() as p:
-            # Helper to find executable
-            executable_path = None
+    registry = live_sessions or await run_in_threadpool(get_live_sessions)
+
+    def run(context, page):
+        try:
+            login_page = LoginPage(page)
+
+            # Navigate to Login - Relaxed wait condition and increased timeout
+            page.goto(Config.URL_LOGIN, timeout=60000, wait_until='domcontentloaded')
+
+            # Execute Phase 1
+            login_page.initiate_login(request.email)
+
+            # Extract State
+            return context.storage_state()
+
+        except Exception as e:
+            logger.error(f"API Init Page Error: {e}")
             try:
-                # Search inside api/ folder as well since we moved it there
-                search_roots = [
-                    "api/playwright_browsers", 
-                    "playwright_browsers", 
-                    os.path.join(os.path.dirname(__file__), "../api/playwright_browsers"),
-                    "/var/task/api/playwright_browsers"
-                ]
-                # logger.info(f"Searching for chromium binary in: {search_roots}")
-                # Removed detailed manual search to rely on PLAYWRIGHT_BROWSERS_PATH=0 behavior first
+                logger.error(f"Page Title on Error: {page.title()}")
+            except:
                 pass
-            except Exception as e:
-                logger.error(f"Debug inspect error: {e}")
-
-            # Launch args
-            launch_args = {
-                "headless": True,
-                "args": [
-                    "--no-sandbox", 
-                    "--disable-setuid-sandbox",
-                    "--disable-dev-shm-usage",
-                    "--single-process"
-                ]
-            }
-            
-            # Note: We rely on PLAYWRIGHT_BROWSERS_PATH=0 handling executable_path automatically
-            # If manual search was successful in previous iterations we could add it back, 
-            # but for now we trust the bundling.
-
-            logger.info(f"Launching browser with args: {launch_args}")
-            browser = p.chromium.launch(**launch_args)
-            context = browser.new_context()
-            page = context.new_page()
-            
-            try:
-                login_page = LoginPage(page)
-                
-                # Navigate to Login - Relaxed wait condition and increased timeout
-                page.goto(
-                    Config.URL_LOGIN if hasattr(Config, 'URL_LOGIN') else "https://crm.infinitegear.app/login",
-                    timeout=60000, 
-                    wait_until='domcontentloaded'
-                )
-                
-                # Execute Phase 1
-                login_page.initiate_login(request.email)
-                
-                # Extract State
-                state = context.storage_state()
-                
-                browser.close()
-                
-                return {
-                    "status": "waiting_code",
-                    "message": "Auth initiated. Please provide the 2FA code sent to email.",
-                    "session_state": state
-                }
-                
-            except Exception as e:
-                logger.error(f"API Init Page Error: {e}")
-                import traceback
-                traceback.print_exc()
-                try:
-                    logger.error(f"Page Title on Error: {page.title()}")
-                except:
-                    pass
-                browser.close()
-                raise e
+            raise
 
+    try:
+        token, state = await asyncio.wrap_future(registry.open(run, email=request.email))
     except Exception as e:
-        logger.error(f"API Critical Error (Playwright Launch?): {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"API Init Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    return {
+        "status": "waiting_code",
+        "message": "Auth initiated. Please provide the 2FA code sent to email.",
+        "session_state": state,
+        "session_token": token
+    }
+
 @app.post("/api/v1/auth/complete", response_model=CompleteAuthResponse)
-def complete_auth(request: CompleteAuthRequest):
+async def complete_auth(request: CompleteAuthRequest):
     """
     Phase 2: Restores session, enters code, executes full automation.
     """
     logger.info(f"API: Completing auth for {request.account_name} with code {request.code}")
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        
-        # Restore State
-        try:
-            context = browser.new_context(storage_state=request.session_state)
-            logger.info("Session state restored.")
-        except Exception as e:
-            logger.error(f"Failed to restore state: {e}")
-            raise HTTPException(status_code=400, detail="Invalid session state provided.")
-            
-        page = context.new_page()
-        
-        try:
-            # Instantiate Pages
-            login_page = LoginPage(page)
-            admin_page = AdminPage(page)
-            panels_page = PanelsPage(page)
-            contacts_page = ContactsPage(page)
-            
-            # Navigate to Login - Relaxed wait condition and increased timeout
-            page.goto(
-                Config.URL_LOGIN if hasattr(Config, 'URL_LOGIN') else "https://crm.infinitegear.app/login",
-                timeout=60000, 
-                wait_until='domcontentloaded'
-            )
-            
-            # Re-enter email to trigger code screen (Idempotency fix)
-            login_page.initiate_login(request.email)
-            
-            # Submit Code
-            login_page.submit_otp(request.code)
-            
-            # --- Continue Automation ---
-            admin_page.access_account(request.account_name)
-            panels_page.go_to_panels()
-            panels_page.create_all_panels()
-            contacts_page.go_to_contacts()
-            contacts_page.create_tags()
-            
-            browser.close()
-            
-            return {
-                "status": "success",
-                "message": f"Automation completed successfully for {request.account_name}"
-            }
-            
-        except Exception as e:
-            logger.error(f"API Complete Error: {e}")
-            # Try to grab screenshot if possible, though returning binary in JSON is tricky.
-            # For now just error out.
-            browser.close()
-            raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        future = await run_in_threadpool(start_complete_auth, request)
+        result = await asyncio.wrap_future(future)
+    except SessionExpiredError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except SessionMismatchError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except BrowserContextError as e:
+        logger.error(f"Failed to restore state: {e}")
+        raise HTTPException(status_code=400, detail="Invalid session state provided.")
+    except Exception as e:
+        logger.error(f"API Complete Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "status": "success",
+        "message": f"Automation completed successfully for {request.account_name}",
+        "logs": [
+            f"{step['name']}: {step['status']}" + (f" ({step['duration']}s)" if step["status"] == "succeeded" else "")
+            for step in result.get("steps") or []
+        ] + (result["profile"]["report"].splitlines() if result.get("profile") else []),
+    }
+
+@app.post("/api/v1/jobs/onboarding", response_model=JobSubmitResponse, status_code=202)
+async def submit_onboarding_job(request: CompleteAuthRequest):
+    """
+    Same as /api/v1/auth/complete, but returns a job id immediately.
+    Poll GET /api/v1/jobs/{job_id} for per-step progress and the final result.
+    """
+    logger.info(f"API: Queueing onboarding job for {request.account_name}")
+    queue = await run_in_threadpool(get_job_queue)
+
+    def job(progress):
+        return start_complete_auth(request, progress).result()
+
+    job_id = queue.submit("onboarding", COMPLETE_AUTH_STEPS, job)
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    queue = await run_in_threadpool(get_job_queue)
+    job = await run_in_threadpool(queue.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    job["job_id"] = job.pop("id")
+    return job
+
+@app.post("/api/v1/jobs/batch", response_model=JobSubmitResponse, status_code=202)
+async def submit_batch_job(request: BatchOnboardingRequest):
+    """
+    Onboards many accounts with a single 2FA login.
+    The job result lists the status, error and duration of every account.
+    """
+    if not request.account_names:
+        raise HTTPException(status_code=400, detail="account_names must not be empty.")
+    logger.info(f"API: Queueing batch onboarding for {len(request.account_names)} account(s)")
+    queue = await run_in_threadpool(get_job_queue)
+
+    steps = ["login", "submit_otp"] + [f"account:{name}" for name in request.account_names]
+    job_id = queue.submit("batch", steps, lambda progress: run_batch(request, progress))
+    return {"job_id": job_id, "status": "queued"}
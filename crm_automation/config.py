@@ -3,17 +3,108 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _env_list(name, default=""):
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
 class Config:
     CRM_EMAIL = os.getenv("CRM_EMAIL")
     DEFAULT_TIMEOUT = int(os.getenv("DEFAULT_TIMEOUT", 30000))
-    BASE_URL = "https://crm.infinitegear.app"
+    HEADLESS = os.getenv("HEADLESS", "true").lower() != "false"
+
+    # Idle waits (BasePage.wait_for_idle): ceiling and DOM quiet window, in ms
+    IDLE_TIMEOUT = int(os.getenv("IDLE_TIMEOUT", 10000))
+    IDLE_QUIET_MS = int(os.getenv("IDLE_QUIET_MS", 150))
+
+    # Text entry (core/input_strategies.py): strategies tried in order until the value reads
+    # back right, and the file remembering which one worked per field
+    INPUT_STRATEGIES = _env_list("INPUT_STRATEGIES", "fill,insert_text,paste,type")
+    INPUT_STRATEGY_CACHE = os.getenv("INPUT_STRATEGY_CACHE", "input_strategies.json")
+
+    # Which candidate selector won per page object, element and CRM app version (core/locator_race.py)
+    LOCATOR_CACHE = os.getenv("LOCATOR_CACHE", "locator_winners.json")
+
+    # Browser pool (API)
+    BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", 2))
+    BROWSER_POOL_HEALTH_INTERVAL = float(os.getenv("BROWSER_POOL_HEALTH_INTERVAL", 30))
+    # Seconds the login page opened by /auth/init stays parked waiting for the 2FA code
+    LIVE_SESSION_TTL = float(os.getenv("LIVE_SESSION_TTL", 600))
+
+    # Background jobs (API)
+    JOBS_DB = os.getenv("JOBS_DB", "jobs.db")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+
+    # Post-login session cache (skips 2FA while the CRM session is still valid)
+    SESSION_CACHE_DIR = os.getenv("SESSION_CACHE_DIR", ".session_cache")
+    SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", 12 * 3600))
+
+    # Network blocking on automation contexts (images/fonts/media and trackers are never used)
+    BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "true").lower() != "false"
+    BLOCK_RESOURCE_TYPES = _env_list("BLOCK_RESOURCE_TYPES", "image,font,media")
+    BLOCK_DOMAINS = _env_list(
+        "BLOCK_DOMAINS",
+        "google-analytics.com,googletagmanager.com,doubleclick.net,facebook.net,"
+        "hotjar.com,clarity.ms,intercom.io,intercomcdn.com,segment.io,mixpanel.com"
+    )
+    # When set, every host outside this list (and its subdomains) is blocked
+    ALLOW_DOMAINS = _env_list("ALLOW_DOMAINS")
+
+    # Backend-request engine: "auto" (API when learned, UI otherwise), "api" or "ui"
+    PANELS_ENGINE = os.getenv("PANELS_ENGINE", "auto").lower()
+    TAGS_ENGINE = os.getenv("TAGS_ENGINE", "auto").lower()
+    # Stages in the panel modal: "bulk" (defaults deleted and new stages written by one in-page
+    # script each; the UI loops after a failed attempt) or "ui" (one Playwright action at a time)
+    STAGE_EDITOR = os.getenv("STAGE_EDITOR", "bulk").lower()
+    BACKEND_PROFILE = os.getenv("BACKEND_PROFILE", "backend_profile.json")
+
+    # Batch onboarding: accounts processed in parallel after a single login
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 2))
+    # Panels created at the same time, each in its own context cloned from the session (1 = sequential)
+    PANEL_PARALLELISM = int(os.getenv("PANEL_PARALLELISM", 1))
+    # Independent onboarding steps (panels, tags) run at the same time on cloned contexts (1 = sequential)
+    STEP_PARALLELISM = int(os.getenv("STEP_PARALLELISM", 1))
+
+    # Retries of transient failures (core/retry.py): attempts per action / per pipeline step,
+    # jittered exponential backoff base and ceiling in seconds
+    RETRY_ACTION_ATTEMPTS = int(os.getenv("RETRY_ACTION_ATTEMPTS", 3))
+    RETRY_STEP_ATTEMPTS = int(os.getenv("RETRY_STEP_ATTEMPTS", 2))
+    RETRY_BACKOFF = float(os.getenv("RETRY_BACKOFF", 0.5))
+    RETRY_MAX_BACKOFF = float(os.getenv("RETRY_MAX_BACKOFF", 5))
+
+    # Times every Playwright call of the page objects and logs a flame-style report per run
+    PLAYWRIGHT_PROFILE = os.getenv("PLAYWRIGHT_PROFILE", "false").lower() == "true"
+
+    # Checkpoints of completed onboarding units per account, so retries resume after a failure
+    CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.db")
+    RESUME = os.getenv("RESUME", "true").lower() != "false"
+
+    # Onboarding template (panels, stages and tags), JSON or YAML
+    ONBOARDING_TEMPLATE = os.getenv(
+        "ONBOARDING_TEMPLATE", os.path.join(os.path.dirname(__file__), "templates", "default.json")
+    )
+    # Local mock CRM (python -m crm_automation.mock_crm): API latency and UI animation delay, in ms
+    MOCK_CRM_LATENCY_MS = int(os.getenv("MOCK_CRM_LATENCY_MS", 0))
+    MOCK_CRM_UI_DELAY_MS = int(os.getenv("MOCK_CRM_UI_DELAY_MS", 0))
+    # 2FA code the mock accepts (empty: any 6 digits)
+    MOCK_CRM_OTP = os.getenv("MOCK_CRM_OTP", "")
+
+    # Every CRM URL derives from BASE_URL (point it at the mock CRM for offline runs)
+    BASE_URL = os.getenv("BASE_URL", "https://crm.infinitegear.app").rstrip("/")
     
     # URLs
-    URL_LOGIN = "https://crm.infinitegear.app/login" # Assumindo
-    URL_PARTNER = "https://crm.infinitegear.app/admin/company/partner"
-    URL_PANELS = "https://crm.infinitegear.app/panels"
-    URL_CONTACTS = "https://crm.infinitegear.app/contacts"
+    URL_LOGIN = f"{BASE_URL}/login"
+    URL_PARTNER = f"{BASE_URL}/admin/company/partner"
+    URL_PANELS = f"{BASE_URL}/panels"
+    URL_CONTACTS = f"{BASE_URL}/contacts"
 
     @staticmethod
     def get_email(cli_email=None):
         return cli_email or Config.CRM_EMAIL
+
+    @classmethod
+    def use_base_url(cls, base_url: str):
+        """Points every CRM URL at base_url at runtime (e.g. a MockCRMServer started by a test)."""
+        cls.BASE_URL = base_url.rstrip("/")
+        cls.URL_LOGIN = f"{cls.BASE_URL}/login"
+        cls.URL_PARTNER = f"{cls.BASE_URL}/admin/company/partner"
+        cls.URL_PANELS = f"{cls.BASE_URL}/panels"
+        cls.URL_CONTACTS = f"{cls.BASE_URL}/contacts"
@@ -0,0 +1,536 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from crm_automation.config import Config
+from crm_automation.core import metrics
+from crm_automation.core.exceptions import ActionFailedError
+from crm_automation.core.logger import logger
+from crm_automation.core.templates import normalize_name
+
+# Backend-request engine: instead of driving the Angular UI, replay the HTTP calls the
+# app itself makes. Endpoints are learned from XHRs captured during a UI run and saved
+# as JSON templates with {{placeholders}} in Config.BACKEND_PROFILE.
+
+PLACEHOLDER = re.compile(r"^\{\{(\w+)\}\}$")
+ID_KEYS = ("id", "_id", "uuid")
+WRITE_METHODS = ("POST", "PUT", "PATCH")
+
+
+# --- Templates ---------------------------------------------------------------
+
+def templatize(value: Any, replacements: Sequence[Tuple[Any, str]]) -> Any:
+    """Replaces leaves equal to a known literal (same type) by '{{key}}' placeholders."""
+    if isinstance(value, dict):
+        return {k: templatize(v, replacements) for k, v in value.items()}
+    if isinstance(value, list):
+        return [templatize(v, replacements) for v in value]
+    for literal, key in replacements:
+        if type(value) is type(literal) and value == literal:
+            return "{{%s}}" % key
+    return value
+
+
+def templatize_url(url: str, replacements: Sequence[Tuple[Any, str]]) -> str:
+    """Replaces whole path segments / query values equal to a known literal."""
+    for literal, key in replacements:
+        if literal in (None, "") or isinstance(literal, bool) or not isinstance(literal, (str, int)):
+            continue
+        pattern = r"(?<=[/=])%s(?=[/?&#]|$)" % re.escape(str(literal))
+        url = re.sub(pattern, "{{%s}}" % key, url)
+    return url
+
+
+def render(template: Any, values: Dict[str, Any]) -> Any:
+    """Fills placeholders. A string that is exactly '{{key}}' takes the raw value (any JSON type)."""
+    if isinstance(template, dict):
+        return {k: render(v, values) for k, v in template.items()}
+    if isinstance(template, list):
+        return [render(v, values) for v in template]
+    if isinstance(template, str):
+        match = PLACEHOLDER.match(template)
+        if match:
+            if match.group(1) not in values:
+                raise KeyError(f"No value for placeholder '{match.group(1)}'")
+            return values[match.group(1)]
+        for key, value in values.items():
+            template = template.replace("{{%s}}" % key, str(value))
+    return template
+
+
+def find_value_path(data: Any, predicate, path=()) -> Optional[Tuple]:
+    """Depth-first search for the first node matching predicate. Returns its key path."""
+    if predicate(data):
+        return path
+    if isinstance(data, dict):
+        items = data.items()
+    elif isinstance(data, list):
+        items = enumerate(data)
+    else:
+        return None
+    for key, child in items:
+        found = find_value_path(child, predicate, path + (key,))
+        if found is not None:
+            return found
+    return None
+
+
+def get_path(data: Any, path: Sequence) -> Any:
+    for key in path:
+        data = data[key]
+    return data
+
+
+def set_path(data: Any, path: Sequence, value: Any) -> Any:
+    if not path:
+        return value
+    get_path(data, path[:-1])[path[-1]] = value
+    return data
+
+
+def contains_string(data: Any, text: str) -> bool:
+    return find_value_path(data, lambda v: v == text) is not None
+
+
+def extract_id(data: Any) -> Tuple[Optional[Sequence], Any]:
+    """Finds the created resource id in a response body ({id}, {_id}, {data: {id}}...)."""
+    for container_path in ((), ("data",), ("result",), ("item",)):
+        try:
+            container = get_path(data, container_path)
+        except (KeyError, IndexError, TypeError):
+            continue
+        if isinstance(container, dict):
+            for key in ID_KEYS:
+                if container.get(key) not in (None, ""):
+                    return container_path + (key,), container[key]
+    return None, None
+
+
+def learn_item_template(items: List[Dict], labels: List[Tuple[str, str]], name_key_hint: str = "name",
+                        keep_varying: bool = False):
+    """
+    Learns one list-item template from captured items created for (name, type_label) pairs.
+    Returns (item_template, type_map) where type_map[label] holds the values of the
+    fields that encode the type. Unexplained fields that vary between items are dropped,
+    or keep the first item's value with keep_varying.
+    """
+    names = [name for name, _ in labels]
+    name_key = next((k for k, v in items[0].items() if v == names[0]), None)
+    if name_key is None or any(item.get(name_key) != name for item, name in zip(items, names)):
+        raise ValueError("Could not locate the name field in captured items.")
+
+    template = {}
+    type_map: Dict[str, Dict[str, Any]] = {}
+    type_labels = [label for _, label in labels]
+    for key in items[0]:
+        values = [item.get(key) for item in items]
+        if key == name_key:
+            template[key] = "{{%s}}" % name_key_hint
+        elif all(isinstance(v, int) and not isinstance(v, bool) for v in values) and values == list(range(len(items))):
+            template[key] = "{{index}}"
+        elif all(isinstance(v, int) and not isinstance(v, bool) for v in values) and values == list(range(1, len(items) + 1)):
+            template[key] = "{{position}}"
+        elif all(v == values[0] for v in values):
+            template[key] = values[0]
+        elif len(set(type_labels)) > 1 and _partitions_match(values, type_labels):
+            template[key] = "{{type_%s}}" % key
+            for value, label in zip(values, type_labels):
+                type_map.setdefault(label, {})["type_%s" % key] = value
+        elif keep_varying:
+            template[key] = values[0]
+        else:
+            logger.debug(f"Dropping unexplained varying field '{key}' from learned template.")
+    for label in type_labels:
+        type_map.setdefault(label, {})
+    return template, type_map
+
+
+def _partitions_match(values: List[Any], labels: List[str]) -> bool:
+    """True when values are equal exactly when labels are equal (the field encodes the label)."""
+    seen: Dict[str, str] = {}
+    for value, label in zip(values, labels):
+        encoded = json.dumps(value, sort_keys=True)
+        if seen.setdefault(label, encoded) != encoded:
+            return False
+    by_value = {}
+    for value, label in zip(values, labels):
+        if by_value.setdefault(json.dumps(value, sort_keys=True), label) != label:
+            return False
+    return True
+
+
+def endpoint(method: str, url: str, body: Any) -> Dict[str, Any]:
+    return {"method": method, "url": url, "body": body}
+
+
+# --- Capture -----------------------------------------------------------------
+
+class XhrRecorder:
+    """
+    Captures the XHR/fetch calls a page makes and remembers the latest auth
+    headers (Authorization, X-*) so replayed requests look like the app's own.
+    """
+
+    def __init__(self, page, limit: int = 500):
+        self.page = page
+        self.limit = limit
+        self.requests = []  # (sequence, request)
+        self.auth_headers: Dict[str, Dict[str, str]] = {}
+        self._seen = 0
+        self._started = False
+
+    def start(self):
+        if not self._started:
+            self.page.on("request", self._on_request)
+            self._started = True
+        return self
+
+    def stop(self):
+        if self._started:
+            self.page.remove_listener("request", self._on_request)
+            self._started = False
+
+    def mark(self) -> int:
+        return self._seen
+
+    def _on_request(self, request):
+        if request.resource_type not in ("xhr", "fetch"):
+            return
+        headers = {k: v for k, v in request.headers.items()
+                   if k.lower() == "authorization" or (k.lower().startswith("x-") and k.lower() != "x-requested-with")}
+        if headers:
+            self.auth_headers[urlparse(request.url).netloc] = headers
+        self.requests.append((self._seen, request))
+        self._seen += 1
+        if len(self.requests) > self.limit:
+            del self.requests[: len(self.requests) - self.limit]
+
+    def writes_since(self, mark: int) -> List[Tuple[Any, Any]]:
+        """(request, json_body) for JSON write requests captured after mark."""
+        writes = []
+        for seq, request in self.requests:
+            if seq < mark or request.method not in WRITE_METHODS:
+                continue
+            try:
+                body = json.loads(request.post_data or "")
+            except ValueError:
+                continue
+            writes.append((request, body))
+        return writes
+
+    def headers_for(self, url: str) -> Dict[str, str]:
+        return dict(self.auth_headers.get(urlparse(url).netloc, {}))
+
+    def session_values(self, url: str) -> Dict[str, Any]:
+        """
+        Current X-* header values (e.g. the accessed company id) as template values.
+        Learned templates reference them instead of baking in the learning account's ids.
+        """
+        values = {}
+        for name, value in self.headers_for(url).items():
+            if name.lower() == "authorization":
+                continue
+            key = "hdr_" + re.sub(r"\W", "_", name.lower())
+            values[key] = value
+            if value.isdigit():
+                values[key + "_int"] = int(value)
+        return values
+
+    def session_replacements(self, url: str) -> List[Tuple[Any, str]]:
+        return [(value, key) for key, value in self.session_values(url).items()]
+
+
+def response_json(request) -> Any:
+    try:
+        response = request.response()
+        return response.json() if response is not None else None
+    except Exception:
+        return None
+
+
+def learn_list_endpoint(recorder: XhrRecorder, mark: int, names: List[str], session) -> Optional[Dict[str, Any]]:
+    """
+    Finds a captured GET (after mark, latest first) whose JSON response lists items by
+    one of `names`. Returns its endpoint spec with items_path/name_key, or None.
+    """
+    def is_listing(value):
+        return isinstance(value, list) and any(
+            isinstance(i, dict) and any(v in names for v in i.values()) for i in value)
+
+    for seq, request in reversed(recorder.requests):
+        if seq < mark or request.method != "GET":
+            continue
+        data = response_json(request)
+        path = find_value_path(data, is_listing) if data is not None else None
+        if path is None:
+            continue
+        item = next(i for i in get_path(data, path) if isinstance(i, dict) and any(v in names for v in i.values()))
+        name_key = next(k for k, v in item.items() if v in names)
+        spec = endpoint("GET", templatize_url(request.url, session), None)
+        spec.update({"items_path": list(path), "name_key": name_key})
+        return spec
+    return None
+
+
+# --- Profile -----------------------------------------------------------------
+
+class BackendProfile:
+    """Learned endpoint templates, persisted as JSON so later runs skip the UI entirely."""
+
+    VERSION = 1
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.BACKEND_PROFILE
+        self.data: Dict[str, Any] = {"version": self.VERSION}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if loaded.get("version") == self.VERSION:
+                self.data = loaded
+        except (OSError, ValueError):
+            pass
+
+    def get(self, section: str) -> Optional[Dict[str, Any]]:
+        return self.data.get(section)
+
+    def set(self, section: str, value: Dict[str, Any]):
+        self.data[section] = value
+        self._save()
+        logger.info(f"Backend profile '{section}' saved to {self.path}")
+
+    def forget(self, section: str):
+        if self.data.pop(section, None) is not None:
+            self._save()
+
+    def _save(self):
+        # Atomic replace: parallel workers may learn and save at the same time
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save backend profile: {e}")
+
+
+# --- Client ------------------------------------------------------------------
+
+class BackendClient:
+    """Sends JSON requests through the page's APIRequestContext (shares the context cookies)."""
+
+    def __init__(self, page):
+        self.page = page
+        self.recorder = XhrRecorder(page).start()
+        # Successful writes, so callers can tell whether a failed operation left partial data
+        self.writes = 0
+
+    def call(self, spec: Dict[str, Any], values: Dict[str, Any] = None) -> Any:
+        method = spec["method"]
+        values = dict(self.recorder.session_values(spec["url"]), **(values or {}))
+        url = render(spec["url"], values)
+        body = render(spec["body"], values) if spec.get("body") is not None else None
+        headers = {"content-type": "application/json", "accept": "application/json"}
+        headers.update(self.recorder.headers_for(url))
+
+        response = self.page.request.fetch(
+            url, method=method, headers=headers,
+            data=json.dumps(body, ensure_ascii=False) if body is not None else None,
+        )
+        if not response.ok:
+            raise ActionFailedError(f"{method} {url} failed with {response.status}: {response.text()[:200]}")
+        if method in WRITE_METHODS:
+            self.writes += 1
+        try:
+            return response.json()
+        except Exception:
+            return None
+
+    def list_names(self, spec: Optional[Dict[str, Any]]) -> Optional[set]:
+        """Calls the learned listing endpoint of a section. None when it was not learned."""
+        if not spec or not spec.get("list"):
+            return None
+        data = self.call(spec["list"])
+        items = get_path(data, spec["list"]["items_path"]) or []
+        return {item.get(spec["list"]["name_key"]) for item in items if isinstance(item, dict)}
+
+
+class PanelsBackend:
+    """
+    Creates panels + stages with the same HTTP calls the "Novo painel" modal makes.
+    Learns them from the first panel saved through the UI (see learn()).
+    """
+
+    SECTION = "panels"
+
+    def __init__(self, page, profile: BackendProfile = None):
+        self.client = BackendClient(page)
+        self.profile = profile or BackendProfile()
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.profile.get(self.SECTION))
+
+    def mark(self) -> int:
+        return self.client.recorder.mark()
+
+    def existing_panels(self) -> Optional[set]:
+        """Names of the panels the account already has, or None when listing was not learned."""
+        return self.client.list_names(self.profile.get(self.SECTION))
+
+    def create_panel(self, name: str, description: str, stages_data: list):
+        spec = self.profile.get(self.SECTION)
+        stage_types = spec["stage_types"]
+        missing = [t for _, t in stages_data if t not in stage_types]
+        if missing:
+            raise ValueError(f"Stage type(s) not learned yet: {sorted(set(missing))}")
+
+        def stage_values(idx, stage_name, stage_type, extra=None):
+            values = {"name": stage_name, "index": idx, "position": idx + 1}
+            values.update(stage_types[stage_type])
+            values.update(extra or {})
+            return values
+
+        base_values = {"name": name, "description": description}
+        if spec.get("stage_item") is not None and spec.get("create_stage") is None:
+            # Stages travel inside the panel body
+            stages = [render(spec["stage_item"], stage_values(i, n, t)) for i, (n, t) in enumerate(stages_data)]
+            self.client.call(spec["create"], dict(base_values, stages=stages))
+        else:
+            created = self.client.call(spec["create"], base_values)
+            panel_id = get_path(created, spec["id_path"]) if spec.get("id_path") else None
+            for i, (stage_name, stage_type) in enumerate(stages_data):
+                self.client.call(spec["create_stage"], stage_values(i, stage_name, stage_type, {"panel_id": panel_id}))
+        logger.info(f"Panel {name} created via backend API ({len(stages_data)} stages).")
+
+    def learn(self, mark: int, name: str, description: str, stages_data: list) -> bool:
+        """Learns the panel endpoints from the requests captured since mark. Returns success."""
+        recorder = self.client.recorder
+        try:
+            spec = self._learn(recorder.writes_since(mark), name, description, stages_data)
+        except Exception as e:
+            logger.warning(f"Could not learn panel endpoints from captured XHRs: {e}")
+            return False
+        # The panel list refreshed after the save tells which panels an account already has
+        spec["list"] = learn_list_endpoint(recorder, mark, [name], recorder.session_replacements(spec["create"]["url"]))
+        self.profile.set(self.SECTION, spec)
+        return True
+
+    def _learn(self, writes, name, description, stages_data):
+        stage_names = [n for n, _ in stages_data]
+        create = next(((r, b) for r, b in writes if contains_string(b, name)), None)
+        if create is None:
+            raise ValueError(f"No captured request carries the panel name '{name}'.")
+        request, body = create
+        session = self.client.recorder.session_replacements(request.url)
+        replacements = [(name, "name"), (description, "description")] + session
+
+        # Case 1: stages inside the panel body
+        stages_path = find_value_path(body, lambda v: isinstance(v, list) and v and all(
+            isinstance(i, dict) for i in v) and [i for i in v if any(x in stage_names for x in i.values())])
+        if stages_path is not None:
+            items = get_path(body, stages_path)
+            items = [i for i in items if any(v in stage_names for v in i.values())]
+            if len(items) != len(stages_data):
+                raise ValueError("Captured stage list does not match the stages created.")
+            item_template, type_map = learn_item_template(items, stages_data)
+            body_template = templatize(set_path(json.loads(json.dumps(body)), stages_path, "{{stages}}"), replacements)
+            return {
+                "create": endpoint(request.method, templatize_url(request.url, session), body_template),
+                "stage_item": templatize(item_template, session),
+                "stage_types": type_map,
+            }
+
+        # Case 2: one request per stage, referencing the created panel id
+        id_path, panel_id = extract_id(response_json(request))
+        stage_writes = [(r, b) for r, b in writes if isinstance(b, dict) and any(v in stage_names for v in b.values())]
+        if len(stage_writes) != len(stages_data):
+            raise ValueError("Could not find one captured request per stage.")
+        bodies = [b for _, b in stage_writes]
+        item_template, type_map = learn_item_template(bodies, stages_data)
+        id_replacements = ([(panel_id, "panel_id")] if panel_id is not None else []) + session
+        stage_request = stage_writes[0][0]
+        return {
+            "create": endpoint(request.method, templatize_url(request.url, session), templatize(body, replacements)),
+            "id_path": list(id_path) if id_path else None,
+            "create_stage": endpoint(
+                stage_request.method,
+                templatize_url(stage_request.url, id_replacements),
+                templatize(item_template, id_replacements),
+            ),
+            "stage_types": type_map,
+        }
+
+
+class TagsBackend:
+    """
+    Creates contact tags (etiquetas) with direct backend requests: one call to list the
+    existing tags, then one create call per missing tag. No contact is needed.
+    Learns the create and list endpoints from the UI tag flow (see learn()).
+    """
+
+    SECTION = "tags"
+
+    def __init__(self, page, profile: BackendProfile = None):
+        self.client = BackendClient(page)
+        self.profile = profile or BackendProfile()
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.profile.get(self.SECTION))
+
+    def mark(self) -> int:
+        return self.client.recorder.mark()
+
+    def existing_tags(self) -> Optional[set]:
+        """Names of the tags the account already has, or None when listing was not learned."""
+        return self.client.list_names(self.profile.get(self.SECTION))
+
+    def create_tags(self, names: List[str]) -> List[str]:
+        """Creates the missing tags. Returns the names actually created."""
+        spec = self.profile.get(self.SECTION)
+        existing = self.existing_tags()
+        if existing is None:
+            logger.warning("Tag listing endpoint not learned. Creating tags without checking existing ones.")
+            existing = set()
+
+        existing = {normalize_name(n) for n in existing if n}
+        created = []
+        for name in names:
+            if normalize_name(name) in existing:
+                logger.info(f"Tag '{name}' already exists. Skipping.")
+                continue
+            with metrics.time_step(f"tag:{name}"):
+                self.client.call(spec["create"], {"name": name})
+            created.append(name)
+        logger.info(f"Tags created via backend API: {created or 'none'}")
+        return created
+
+    def learn(self, mark: int, names: List[str]) -> bool:
+        """Learns the tag endpoints from the requests captured since mark. Returns success."""
+        try:
+            spec = self._learn(mark, names)
+        except Exception as e:
+            logger.warning(f"Could not learn tag endpoints from captured XHRs: {e}")
+            return False
+        self.profile.set(self.SECTION, spec)
+        return True
+
+    def _learn(self, mark: int, names: List[str]):
+        recorder = self.client.recorder
+        writes = [(r, b) for r, b in recorder.writes_since(mark) if isinstance(b, dict) and any(v in names for v in b.values())]
+        if not writes:
+            raise ValueError("No captured request carries a tag name.")
+        created = [next(v for v in b.values() if v in names) for _, b in writes]
+        request = writes[0][0]
+        session = recorder.session_replacements(request.url)
+        item_template, _ = learn_item_template([b for _, b in writes], [(n, "tag") for n in created],
+                                               keep_varying=True)
+        spec = {"create": endpoint(request.method, templatize_url(request.url, session),
+                                   templatize(item_template, session))}
+        spec["list"] = learn_list_endpoint(recorder, mark, names, session)
+        if spec["list"] is None:
+            logger.warning("No captured tag listing request found.")
+        return spec
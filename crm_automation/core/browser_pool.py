@@ -0,0 +1,358 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from playwright.sync_api import sync_playwright, Browser, BrowserContext
+
+from crm_automation.config import Config
+from crm_automation.core.logger import logger
+from crm_automation.core.exceptions import BrowserContextError
+from crm_automation.core.network import ResourceBlocker
+from crm_automation.core.stability import PENDING_REQUESTS_TRACKER
+
+# Args required to run Chromium inside containers / serverless sandboxes
+CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--single-process"
+]
+
+
+def launch_browser(playwright, headless: bool = True, **kwargs) -> Browser:
+    """Launches Chromium with the container-safe args used everywhere in the project."""
+    launch_args = {"headless": headless, "args": list(CHROMIUM_ARGS)}
+    launch_args.update(kwargs)
+    logger.info(f"Launching browser with args: {launch_args}")
+    return playwright.chromium.launch(**launch_args)
+
+
+def snapshot_session(page) -> Dict[str, Any]:
+    """
+    Captures what a cloned context needs to continue this page's session: the storage
+    state plus the sessionStorage of the current origin, which storage_state() omits.
+    Returns kwargs for new_context / BrowserPool.submit.
+    """
+    snapshot = {"storage_state": page.context.storage_state()}
+    try:
+        origin = page.evaluate("() => location.origin")
+        snapshot["session_storage"] = {origin: page.evaluate("() => Object.assign({}, sessionStorage)")}
+    except Exception as e:
+        logger.warning(f"Could not read sessionStorage: {e}")
+    return snapshot
+
+
+def new_context(browser: Browser, storage_state=None, block_resources: bool = None,
+                session_storage: Dict[str, Dict[str, str]] = None, **kwargs) -> BrowserContext:
+    """
+    Creates a fresh isolated context (cookies/local storage) on an existing browser.
+    Unneeded resources are aborted unless block_resources is False (see Config.BLOCK_RESOURCES).
+    `session_storage` ({origin: {key: value}}) is restored on every page of that origin.
+    """
+    if block_resources is None:
+        block_resources = Config.BLOCK_RESOURCES
+    if block_resources:
+        # Service workers would bypass context routing
+        kwargs.setdefault("service_workers", "block")
+    context = browser.new_context(storage_state=storage_state, **kwargs)
+    context.set_default_timeout(Config.DEFAULT_TIMEOUT)
+    # Lets BasePage.wait_for_idle see every XHR/fetch the app makes
+    context.add_init_script(PENDING_REQUESTS_TRACKER)
+    if session_storage:
+        context.add_init_script(
+            "(() => { const data = %s[location.origin] || {};"
+            " for (const [k, v] of Object.entries(data)) {"
+            " if (sessionStorage.getItem(k) === null) sessionStorage.setItem(k, v); } })();"
+            % json.dumps(session_storage)
+        )
+    if block_resources:
+        ResourceBlocker().install(context)
+    return context
+
+
+class BrowserSlot:
+    """
+    One long-lived Chromium process.
+    Playwright's sync API is bound to the thread that started it, so each slot
+    owns a worker thread and every call against its browser runs on that thread.
+    """
+
+    def __init__(self, pool: "BrowserPool", index: int):
+        self.pool = pool
+        self.index = index
+        self.browser: Optional[Browser] = None
+        self.busy = False
+        # Leased to one caller (BrowserPool.lease): takes no work from the shared queue
+        self.reserved = False
+        self.launches = 0
+        self.served = 0
+        self.last_error: Optional[str] = None
+        self._pinned = deque()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"browser-slot-{index}", daemon=True)
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self, timeout: float = 60):
+        self._thread.start()
+        self._ready.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "slot": self.index,
+            "alive": self.alive,
+            "connected": bool(self.browser and self.browser.is_connected()),
+            "busy": self.busy,
+            "reserved": self.reserved,
+            "launches": self.launches,
+            "served": self.served,
+            "last_error": self.last_error,
+        }
+
+    def _ensure_browser(self, playwright):
+        if self.browser is not None and self.browser.is_connected():
+            return
+        if self.browser is not None:
+            logger.warning(f"Browser slot {self.index} lost its browser. Relaunching...")
+        self.browser = launch_browser(playwright, headless=self.pool.headless)
+        self.launches += 1
+
+    def _run(self):
+        try:
+            with sync_playwright() as p:
+                try:
+                    self._ensure_browser(p)
+                except Exception as e:
+                    # Keep serving: the next task retries the launch
+                    self.last_error = str(e)
+                    logger.error(f"Browser slot {self.index} failed to launch: {e}")
+                self._ready.set()
+
+                while True:
+                    task = self.pool._next_task(self)
+                    if task is None:
+                        break
+                    if task is BrowserPool.HEALTH_CHECK:
+                        self._health_check(p)
+                        continue
+
+                    fn, future = task
+                    if not future.set_running_or_notify_cancel():
+                        self.busy = False
+                        continue
+                    try:
+                        self._ensure_browser(p)
+                        future.set_result(fn(self))
+                    except BaseException as e:
+                        self.last_error = str(e)
+                        future.set_exception(e)
+                    finally:
+                        self.busy = False
+                        self.served += 1
+
+                if self.browser is not None:
+                    try:
+                        self.browser.close()
+                    except Exception:
+                        pass
+        finally:
+            self._ready.set()
+
+    def _health_check(self, playwright):
+        try:
+            self._ensure_browser(playwright)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Browser slot {self.index} health check failed: {e}")
+
+
+class BrowserPool:
+    """
+    Fixed-size pool of warm Chromium processes.
+    Each task leases a slot, gets a brand new BrowserContext on it and the
+    context is closed when the task returns, so requests never share state.
+    """
+
+    HEALTH_CHECK = object()
+
+    def __init__(self, size: int = None, headless: bool = True, health_interval: float = None):
+        self.size = size or Config.BROWSER_POOL_SIZE
+        self.headless = headless
+        self.health_interval = health_interval or Config.BROWSER_POOL_HEALTH_INTERVAL
+        self.slots = []
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def start(self):
+        logger.info(f"Starting browser pool with {self.size} slot(s)")
+        self.slots = [BrowserSlot(self, i) for i in range(self.size)]
+        for slot in self.slots:
+            slot.start()
+        return self
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            pending = list(self._queue) + [t for slot in self.slots for t in slot._pinned]
+            self._queue.clear()
+            self._cond.notify_all()
+        for _, future in pending:
+            future.cancel()
+        for slot in self.slots:
+            slot._thread.join(timeout=10)
+        logger.info("Browser pool closed.")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _next_task(self, slot: BrowserSlot):
+        """Blocks the slot thread until there is work for it. Returns None on shutdown."""
+        with self._cond:
+            deadline = time.monotonic() + self.health_interval
+            while not self._closed:
+                # Busy from here on, so lease() never counts a slot about to run a task as free
+                if slot._pinned:
+                    slot.busy = True
+                    return slot._pinned.popleft()
+                if self._queue and not slot.reserved:
+                    slot.busy = True
+                    return self._queue.popleft()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return BrowserPool.HEALTH_CHECK
+                self._cond.wait(remaining)
+            return None
+
+    def dispatch(self, fn: Callable[[BrowserSlot], Any], slot: BrowserSlot = None) -> Future:
+        """
+        Low-level scheduling: runs fn(slot) on the given slot's thread, or on the first
+        free slot when none is given. Use it for work on objects owned by a slot.
+        """
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Browser pool is closed.")
+            if slot is not None:
+                slot._pinned.append((fn, future))
+            else:
+                self._queue.append((fn, future))
+            self._cond.notify_all()
+        return future
+
+    def submit(self, fn: Callable[[BrowserContext], Any], storage_state=None, slot: BrowserSlot = None,
+               **context_kwargs) -> Future:
+        """
+        Schedules fn(context) on the first free slot (or on `slot`) with a fresh context.
+        The context is always closed afterwards.
+        """
+        def task(slot: BrowserSlot):
+            try:
+                context = new_context(slot.browser, storage_state=storage_state, **context_kwargs)
+            except Exception as e:
+                raise BrowserContextError(f"Failed to create browser context: {e}")
+            try:
+                return fn(context)
+            finally:
+                try:
+                    context.close()
+                except Exception:
+                    pass
+
+        return self.dispatch(task, slot)
+
+    @contextmanager
+    def lease(self, count: int):
+        """
+        Reserves up to `count` idle slots for the sub-tasks of one caller (isolated onboarding
+        steps, parallel panels) and yields a SlotLease over them, possibly empty. A task
+        already running on the pool must never wait on the shared queue for its sub-tasks:
+        with every slot taken by such tasks nothing would run. Idle slots needed by queued
+        tasks are left to them.
+        """
+        with self._cond:
+            idle = [slot for slot in self.slots
+                    if slot.alive and not slot.busy and not slot.reserved and not slot._pinned]
+            slots = idle[len(self._queue):][:max(0, count)]
+            for slot in slots:
+                slot.reserved = True
+        try:
+            yield SlotLease(self, slots)
+        finally:
+            with self._cond:
+                for slot in slots:
+                    slot.reserved = False
+                self._cond.notify_all()
+
+    def run(self, fn: Callable[[BrowserContext], Any], storage_state=None, timeout: float = None, **context_kwargs):
+        """Blocking version of submit()."""
+        return self.submit(fn, storage_state=storage_state, **context_kwargs).result(timeout)
+
+    def health(self) -> Dict[str, Any]:
+        slots = [slot.status() for slot in self.slots]
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "size": self.size,
+            "healthy": all(s["alive"] and s["connected"] for s in slots),
+            "busy": sum(1 for s in slots if s["busy"]),
+            "queued": queued,
+            "slots": slots,
+        }
+
+
+class SlotLease:
+    """
+    Slots of a BrowserPool reserved by BrowserPool.lease. Same submit/run interface as the
+    pool: every task gets a fresh context on the next reserved slot that is free.
+    """
+
+    def __init__(self, pool: BrowserPool, slots: List[BrowserSlot]):
+        self.pool = pool
+        self.size = len(slots)
+        self._free = deque(slots)
+        self._waiting = deque()
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[[BrowserContext], Any], storage_state=None, **context_kwargs) -> Future:
+        if not self.size:
+            raise RuntimeError("Lease holds no browser slot.")
+        future = Future()
+        with self._lock:
+            self._waiting.append((fn, storage_state, context_kwargs, future))
+        self._dispatch()
+        return future
+
+    def run(self, fn: Callable[[BrowserContext], Any], storage_state=None, timeout: float = None, **context_kwargs):
+        """Blocking version of submit()."""
+        return self.submit(fn, storage_state=storage_state, **context_kwargs).result(timeout)
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if not self._free or not self._waiting:
+                    return
+                slot = self._free.popleft()
+                fn, storage_state, context_kwargs, future = self._waiting.popleft()
+            inner = self.pool.submit(fn, storage_state=storage_state, slot=slot, **context_kwargs)
+            inner.add_done_callback(lambda done, slot=slot, future=future: self._finished(slot, done, future))
+
+    def _finished(self, slot: BrowserSlot, done: Future, future: Future):
+        if done.cancelled():
+            future.cancel()
+        elif done.exception() is not None:
+            future.set_exception(done.exception())
+        else:
+            future.set_result(done.result())
+        with self._lock:
+            self._free.append(slot)
+        self._dispatch()
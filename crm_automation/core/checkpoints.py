@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+import time
+from typing import Set
+
+from crm_automation.config import Config
+from crm_automation.core.logger import logger
+from crm_automation.core.templates import normalize_name
+
+
+class CheckpointStore:
+    """
+    SQLite record of the onboarding units already completed per account (steps, single
+    panels, single tags), so a retry after a failure resumes instead of starting over.
+    Falls back to an in-memory database when the path is not writable (e.g. Vercel).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.CHECKPOINT_DB
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._create_schema()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Checkpoint store '{self.path}' not writable ({e}). Using in-memory store.")
+            self.path = ":memory:"
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._create_schema()
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS checkpoints (
+                    account TEXT NOT NULL,
+                    unit TEXT NOT NULL,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (account, unit)
+                )"""
+            )
+
+    def completed(self, account: str) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT unit FROM checkpoints WHERE account = ?", (normalize_name(account),)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def mark(self, account: str, unit: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (account, unit, completed_at) VALUES (?, ?, ?)",
+                (normalize_name(account), unit, time.time()),
+            )
+
+    def clear(self, account: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM checkpoints WHERE account = ?", (normalize_name(account),))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AccountCheckpoint:
+    """
+    Checkpoints of one account, handed to the page objects.
+    Units are named "<kind>:<name>", e.g. "step:create_panels", "panel:Tarefas", "tag:Lead".
+    """
+
+    def __init__(self, store: CheckpointStore, account: str):
+        self.store = store
+        self.account = account
+        self._done = store.completed(account)
+        self._lock = threading.Lock()
+
+    @property
+    def resuming(self) -> bool:
+        return bool(self._done)
+
+    def done(self, kind: str, name: str) -> bool:
+        with self._lock:
+            return f"{kind}:{name}" in self._done
+
+    def mark(self, kind: str, name: str):
+        unit = f"{kind}:{name}"
+        self.store.mark(self.account, unit)
+        with self._lock:
+            self._done.add(unit)
+
+    def clear(self):
+        self.store.clear(self.account)
+        with self._lock:
+            self._done.clear()
@@ -1,15 +1,28 @@
 class CRMAutomationError(Exception):
     """Base class for exceptions in this module."""
-    pass
+    # Whether retrying the same action may succeed (see core/retry.py)
+    retryable = False
 
 class ElementNotFoundError(CRMAutomationError):
     """Raised when an expected element is not found."""
-    pass
+    retryable = True
 
 class ActionFailedError(CRMAutomationError):
     """Raised when an action (click, type) fails."""
-    pass
+    retryable = True
+
+class InputRejectedError(ActionFailedError):
+    """Raised when no input strategy leaves a field with the right value (same result on a retry)."""
+    retryable = False
 
 class LoginFailedError(CRMAutomationError):
     """Raised when 2FA or Login fails."""
     pass
+
+class BrowserContextError(CRMAutomationError):
+    """Raised when a browser context cannot be created (e.g. invalid storage state)."""
+    pass
+
+class SessionMismatchError(CRMAutomationError):
+    """Raised when a live session is resumed for another email than the one that opened it."""
+    pass
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from crm_automation.config import Config
+from crm_automation.core.exceptions import InputRejectedError
+from crm_automation.core.logger import logger
+
+# Text entry for the page objects. Strategies, fastest first: Playwright fill, CDP
+# Input.insertText (keyboard.insert_text), a paste event, and typing key by key as the
+# last resort. The value is read back once; the first strategy that leaves it right is
+# remembered per field (Config.INPUT_STRATEGY_CACHE) and tried first on later runs.
+# A field is the first element the locator matches, unless the caller says it is made of
+# several boxes (e.g. the 6 OTP inputs): then every match is cleared and read back joined.
+
+# Characters per second matter only to the last resort; Angular keeps up at this pace
+TYPE_DELAY_MS = 50
+
+# Empties every box through the native setter, with the 'input' event Angular listens to
+_CLEAR = """
+(els) => {
+  for (const el of els) {
+    const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, '');
+    el.dispatchEvent(new Event('input', { bubbles: true }));
+  }
+  if (els.length) els[0].focus();
+}
+"""
+
+_READ = "(els) => els.map((el) => el.value === undefined ? el.textContent : el.value).join('')"
+
+# Apps that handle paste (OTP widgets spread the digits) cancel the event; otherwise the
+# text is inserted as the browser would after a real paste
+_PASTE = """
+(el, text) => {
+  el.focus();
+  const data = new DataTransfer();
+  data.setData('text/plain', text);
+  const event = new ClipboardEvent('paste', { clipboardData: data, bubbles: true, cancelable: true });
+  if (el.dispatchEvent(event)) document.execCommand('insertText', false, text);
+}
+"""
+
+
+def _fill(page, locator, value: str):
+    locator.first.fill(value)
+
+
+def _insert_text(page, locator, value: str):
+    locator.evaluate_all(_CLEAR)
+    page.keyboard.insert_text(value)
+
+
+def _paste(page, locator, value: str):
+    locator.evaluate_all(_CLEAR)
+    locator.first.evaluate(_PASTE, value)
+
+
+def _type(page, locator, value: str):
+    locator.evaluate_all(_CLEAR)
+    count = locator.count()
+    if count > 1 and count == len(value):
+        # One character per box, focusing each (widgets that do not move the focus)
+        for index, char in enumerate(value):
+            box = locator.nth(index)
+            box.focus()
+            box.press_sequentially(char, delay=TYPE_DELAY_MS)
+    else:
+        locator.first.press_sequentially(value, delay=TYPE_DELAY_MS)
+
+
+STRATEGIES: Dict[str, Callable] = {
+    "fill": _fill,
+    "insert_text": _insert_text,
+    "paste": _paste,
+    "type": _type,
+}
+
+
+class InputStrategyCache:
+    """Winning strategy per field key, persisted as JSON so later runs try it first."""
+
+    VERSION = 1
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.INPUT_STRATEGY_CACHE
+        self.data: Dict[str, Any] = {"version": self.VERSION, "fields": {}}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if loaded.get("version") == self.VERSION:
+                self.data = loaded
+        except (OSError, ValueError):
+            pass
+
+    def get(self, key: str) -> Optional[str]:
+        return self.data["fields"].get(key, {}).get("strategy")
+
+    def order(self, key: str, strategies: Iterable[str]) -> List[str]:
+        """`strategies` (unknown names dropped) with the remembered winner for `key` first."""
+        order = [name for name in strategies if name in STRATEGIES]
+        winner = self.get(key)
+        if winner in order:
+            order.remove(winner)
+            order.insert(0, winner)
+        return order
+
+    def remember(self, key: str, strategy: str, seconds: float):
+        with self._lock:
+            changed = self.get(key) != strategy
+            self.data["fields"][key] = {"strategy": strategy, "seconds": round(seconds, 3)}
+            if changed:
+                self._save()
+
+    def _save(self):
+        # Atomic replace: parallel workers may learn and save at the same time
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save input strategies: {e}")
+
+
+_caches: Dict[str, InputStrategyCache] = {}
+_caches_lock = threading.Lock()
+
+
+def strategy_cache() -> InputStrategyCache:
+    """Process-wide cache for the current Config.INPUT_STRATEGY_CACHE."""
+    with _caches_lock:
+        path = Config.INPUT_STRATEGY_CACHE
+        if path not in _caches:
+            _caches[path] = InputStrategyCache(path)
+        return _caches[path]
+
+
+def enter_text(page, locator, value: str, key: str, strategies: Iterable[str] = None,
+               cache: InputStrategyCache = None, boxes: bool = False) -> str:
+    """
+    Sets `value` on the field with the first strategy whose result reads back right
+    (the remembered one for `key` first). Returns the strategy used. Only the first match
+    of `locator` is touched unless `boxes` (one field spread over every match). A missing
+    field raises the Playwright timeout at once; no strategy working raises InputRejectedError.
+    """
+    cache = cache or strategy_cache()
+    # Selectors such as input:near(...) match unrelated inputs too: leave them alone
+    locator = locator if boxes else locator.first
+    failures = []
+    for name in cache.order(key, strategies or Config.INPUT_STRATEGIES):
+        started = time.monotonic()
+        try:
+            STRATEGIES[name](page, locator, value)
+            actual = locator.evaluate_all(_READ)
+        except PlaywrightTimeoutError:
+            raise
+        except Exception as e:
+            failures.append(f"{name}: {e}")
+            continue
+        if actual == value:
+            if failures:
+                logger.info(f"Input strategy for {key}: '{name}' ({'; '.join(failures)})")
+            cache.remember(key, name, time.monotonic() - started)
+            return name
+        # Only lengths: the value may be a code or a password
+        failures.append(f"{name}: read back {len(actual)} of {len(value)} char(s)")
+    raise InputRejectedError(f"No input strategy set the value of {key} ({'; '.join(failures)})")
@@ -0,0 +1,240 @@
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from crm_automation.core.logger import logger
+
+# Hot-path instrumentation: a proxy around the Playwright Page/Locator used by the page
+# objects. Every timed call is attributed to the page-object methods on the call stack
+# (e.g. PanelsPage.create_panel) and to its selector, so a run can be read as a flame graph.
+
+# Calls that are timed, and how their time is classified in the report
+TIMED_CALLS = {
+    "click", "fill", "type", "press", "goto", "evaluate", "wait_for_selector", "wait_for_timeout",
+    "wait_for", "wait_for_load_state", "wait_for_url", "is_visible", "count", "input_value",
+    "scroll_into_view_if_needed", "screenshot", "insert_text", "press_sequentially", "evaluate_all", "focus",
+}
+FIXED_SLEEPS = {"wait_for_timeout"}
+REAL_WAITS = {"wait_for_selector", "wait_for", "wait_for_load_state", "wait_for_url"}
+# Idle waits are in-page scripts: their evaluate() calls count as waits, not actions
+WAIT_METHODS = {"wait_for_idle"}
+
+# Calls and properties returning a Locator (wrapped so their calls are timed too)
+LOCATOR_CALLS = {
+    "locator", "get_by_text", "get_by_role", "get_by_label", "get_by_placeholder", "get_by_title",
+    "nth", "filter", "or_", "and_",
+}
+LOCATOR_PROPERTIES = {"first", "last", "keyboard"}
+
+_local = threading.local()
+
+
+class Profiler:
+    """Collects timed Playwright calls: (page-object stack, call, selector, seconds)."""
+
+    def __init__(self, name: str = "run"):
+        self.name = name
+        self.records: List[Tuple[Tuple[str, ...], str, str, float]] = []
+        self._lock = threading.Lock()
+
+    def record(self, stack: Tuple[str, ...], call: str, selector: str, seconds: float):
+        with self._lock:
+            self.records.append((stack, call, selector, seconds))
+
+    @staticmethod
+    def category(stack: Tuple[str, ...], call: str) -> str:
+        if call in FIXED_SLEEPS:
+            return "fixed_sleeps"
+        if call in REAL_WAITS or (call == "evaluate" and stack and stack[-1].split(".")[-1] in WAIT_METHODS):
+            return "real_waits"
+        return "actions"
+
+    def totals(self) -> Dict[str, float]:
+        totals = {"actions": 0.0, "real_waits": 0.0, "fixed_sleeps": 0.0}
+        for stack, call, _, seconds in self.records:
+            totals[self.category(stack, call)] += seconds
+        return totals
+
+    def slowest(self, top: int = 15) -> List[Dict[str, Any]]:
+        """Operations (innermost page-object method + call + selector) by total time."""
+        grouped = defaultdict(lambda: {"total": 0.0, "calls": 0, "max": 0.0})
+        for stack, call, selector, seconds in self.records:
+            entry = grouped[(stack[-1] if stack else "-", call, selector)]
+            entry["total"] += seconds
+            entry["calls"] += 1
+            entry["max"] = max(entry["max"], seconds)
+        ranked = sorted(grouped.items(), key=lambda item: item[1]["total"], reverse=True)[:top]
+        return [{"method": method, "call": call, "selector": selector,
+                 "total": round(e["total"], 3), "calls": e["calls"], "max": round(e["max"], 3)}
+                for (method, call, selector), e in ranked]
+
+    def folded(self) -> List[str]:
+        """Folded stacks ("frame;frame;leaf microseconds"), the input of flamegraph.pl/speedscope."""
+        folded = defaultdict(float)
+        for stack, call, selector, seconds in self.records:
+            leaf = f"{call} {selector}".strip().replace(";", ",")
+            folded[";".join(stack + (leaf,))] += seconds
+        return [f"{path} {int(seconds * 1_000_000)}" for path, seconds in sorted(folded.items())]
+
+    def summary(self, top: int = 15) -> Dict[str, Any]:
+        totals = self.totals()
+        return {
+            "calls": len(self.records),
+            "total": round(sum(totals.values()), 3),
+            "totals": {k: round(v, 3) for k, v in totals.items()},
+            "slowest": self.slowest(top),
+        }
+
+    def report(self, top: int = 15) -> str:
+        """Text report: time by page-object method (flame-style tree), slowest operations, sleeps vs waits."""
+        summary = self.summary(top)
+        totals = summary["totals"]
+        lines = [
+            f"Profile '{self.name}': {summary['calls']} Playwright call(s), {summary['total']:.2f}s | "
+            f"actions {totals['actions']:.2f}s, real waits {totals['real_waits']:.2f}s, "
+            f"fixed sleeps {totals['fixed_sleeps']:.2f}s",
+            "Time by page-object method:",
+        ]
+        tree = defaultdict(float)
+        for stack, _, _, seconds in self.records:
+            for depth in range(1, len(stack) + 1):
+                tree[stack[:depth]] += seconds
+        children = defaultdict(list)
+        for path in tree:
+            children[path[:-1]].append(path)
+        scale = max(tree.values(), default=0) or 1
+
+        def walk(parent):
+            for path in sorted(children[parent], key=lambda p: -tree[p]):
+                bar = "#" * max(1, int(30 * tree[path] / scale))
+                lines.append(f"  {'  ' * (len(path) - 1)}{path[-1]:<{44 - 2 * len(path)}} {tree[path]:8.2f}s {bar}")
+                walk(path)
+        walk(())
+        lines.append("Slowest operations (total / calls / max):")
+        for op in summary["slowest"]:
+            lines.append(f"  {op['total']:8.2f}s {op['calls']:4d}x max {op['max']:6.2f}s  "
+                         f"{op['method']} > {op['call']} {op['selector']}")
+        return "\n".join(lines)
+
+    def save_folded(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.folded()) + "\n")
+
+
+def current_profiler() -> Optional[Profiler]:
+    return getattr(_local, "profiler", None)
+
+
+@contextmanager
+def profiling(profiler: Optional[Profiler]):
+    """
+    Activates `profiler` for the page objects created on this thread (None keeps profiling off).
+    Worker threads must activate it themselves (see workflow.run_onboarding).
+    """
+    previous = current_profiler()
+    _local.profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _local.profiler = previous
+
+
+def instrument(page: Any) -> Any:
+    """Wraps a Playwright page when a profiler is active on this thread, else returns it as is."""
+    profiler = current_profiler()
+    if profiler is None or page is None or isinstance(page, _Instrumented):
+        return page
+    return _Instrumented(page, profiler, "")
+
+
+def _page_object_stack() -> Tuple[str, ...]:
+    # Page-object methods on the call stack, outermost first. Closures inside a method
+    # (e.g. retry attempts) see `self` too and show up under their own name.
+    stack = []
+    frame = sys._getframe(2)
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+        if owner is not None and type(owner).__module__.startswith("crm_automation.pages"):
+            stack.append(f"{type(owner).__name__}.{frame.f_code.co_name}")
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+def _unwrap(value: Any) -> Any:
+    return value._target if isinstance(value, _Instrumented) else value
+
+
+def _describe(call: str, args: tuple, kwargs: dict) -> str:
+    if call == "wait_for_timeout":
+        return f"{args[0] if args else kwargs.get('timeout')}ms"
+    if call == "evaluate":
+        script = str(args[0] if args else kwargs.get("expression", "")).strip()
+        return "js:" + (script.splitlines()[0][:40] if script else "")
+    first = args[0] if args else None
+    return first if isinstance(first, str) else ""
+
+
+class _Instrumented:
+    """Proxy around a Page, Locator or Keyboard. `selector` describes the wrapped locator."""
+
+    __slots__ = ("_target", "_profiler", "_selector")
+
+    def __init__(self, target: Any, profiler: Profiler, selector: str):
+        self._target = target
+        self._profiler = profiler
+        self._selector = selector
+
+    def __repr__(self):
+        return f"<Instrumented {self._target!r}>"
+
+    def _chain(self, part: str) -> str:
+        return f"{self._selector} >> {part}" if self._selector else part
+
+    def __getattr__(self, name: str):
+        value = getattr(self._target, name)
+        if name in LOCATOR_PROPERTIES:
+            return _Instrumented(value, self._profiler, self._chain(name))
+        if not callable(value):
+            return value
+
+        if name in LOCATOR_CALLS:
+            def make_locator(*args, **kwargs):
+                args = tuple(_unwrap(a) for a in args)
+                kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+                if name == "locator":
+                    part = str(args[0] if args else kwargs.get("selector", ""))
+                else:
+                    part = f"{name}({', '.join([repr(a) for a in args] + [f'{k}={v!r}' for k, v in kwargs.items()])})"
+                return _Instrumented(value(*args, **kwargs), self._profiler, self._chain(part))
+            return make_locator
+
+        if name in TIMED_CALLS:
+            def timed(*args, **kwargs):
+                stack = _page_object_stack()
+                if self._selector == "keyboard":
+                    selector = f"keyboard {args[0] if name == 'press' and args else ''}".strip()
+                else:
+                    # Locator calls are described by their selector only (never the typed values)
+                    selector = self._selector or _describe(name, args, kwargs)
+                started = time.perf_counter()
+                try:
+                    return value(*(_unwrap(a) for a in args), **{k: _unwrap(v) for k, v in kwargs.items()})
+                finally:
+                    self._profiler.record(stack, name, selector, time.perf_counter() - started)
+            return timed
+
+        return value
+
+
+def log_report(profiler: Profiler, folded_path: str = None):
+    """Logs the text report and optionally writes the folded stacks for a flame graph."""
+    logger.info("\n" + profiler.report())
+    if folded_path:
+        try:
+            profiler.save_folded(folded_path)
+            logger.info(f"Flame graph stacks saved to '{folded_path}' (flamegraph.pl / speedscope).")
+        except OSError as e:
+            logger.warning(f"Could not save profile to '{folded_path}': {e}")
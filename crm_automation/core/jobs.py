@@ -0,0 +1,151 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from crm_automation.config import Config
+from crm_automation.core import metrics
+from crm_automation.core.logger import logger
+
+# Job lifecycle
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobStore:
+    """
+    SQLite-backed job registry (no external services needed).
+    Falls back to an in-memory database when the path is not writable (e.g. Vercel).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.JOBS_DB
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._create_schema()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Job store '{self.path}' not writable ({e}). Using in-memory store.")
+            self.path = ":memory:"
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._create_schema()
+        self._conn.row_factory = sqlite3.Row
+
+    def _create_schema(self):
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    steps TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+
+    def create(self, kind: str, steps: List[str]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        step_rows = [{"name": name, "status": "pending", "started_at": None, "finished_at": None, "error": None}
+                     for name in steps]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, steps, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(step_rows), now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["steps"] = json.loads(job["steps"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def set_status(self, job_id: str, status: str, result: Any = None, error: str = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+            )
+
+    def update_step(self, job_id: str, step: str, status: str, error: str = None):
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT steps FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            steps = json.loads(row[0])
+            entry = next((s for s in steps if s["name"] == step), None)
+            if entry is None:
+                entry = {"name": step, "status": "pending", "started_at": None, "finished_at": None, "error": None}
+                steps.append(entry)
+            entry["status"] = status
+            entry["error"] = error
+            if status == RUNNING:
+                entry["started_at"] = time.time()
+            else:
+                entry["finished_at"] = time.time()
+            self._conn.execute(
+                "UPDATE jobs SET steps = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(steps), time.time(), job_id),
+            )
+
+    def fail_unfinished(self, reason: str = "Interrupted by server restart."):
+        """Jobs left queued/running by a previous process can never finish."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?)",
+                (FAILED, reason, time.time(), QUEUED, RUNNING),
+            )
+        if cursor.rowcount:
+            logger.warning(f"Marked {cursor.rowcount} unfinished job(s) as failed.")
+
+
+class JobQueue:
+    """
+    Runs submitted jobs on a bounded number of worker threads.
+    The job callable receives progress(step, status, error) to report per-step state.
+    """
+
+    def __init__(self, store: JobStore, workers: int = None):
+        self.store = store
+        self.workers = workers or Config.JOB_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-worker")
+
+    def submit(self, kind: str, steps: List[str], fn: Callable[[Callable], Any]) -> str:
+        job_id = self.store.create(kind, steps)
+        self._executor.submit(self._run, job_id, fn)
+        logger.info(f"Job {job_id} ({kind}) queued.")
+        return job_id
+
+    def _run(self, job_id: str, fn: Callable[[Callable], Any]):
+        self.store.set_status(job_id, RUNNING)
+
+        def progress(step: str, status: str, error: str = None):
+            self.store.update_step(job_id, step, status, error)
+
+        metrics.JOBS_IN_FLIGHT.inc()
+        try:
+            result = fn(progress)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            self.store.set_status(job_id, FAILED, error=str(e))
+            return
+        finally:
+            metrics.JOBS_IN_FLIGHT.dec()
+        self.store.set_status(job_id, SUCCEEDED, result=result)
+        logger.info(f"Job {job_id} succeeded.")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
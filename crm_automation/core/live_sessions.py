@@ -0,0 +1,142 @@
+import secrets
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from crm_automation.config import Config
+from crm_automation.core.browser_pool import BrowserPool, BrowserSlot, new_context
+from crm_automation.core.exceptions import BrowserContextError, SessionMismatchError
+from crm_automation.core.logger import logger
+
+
+class LiveSession:
+    """A context + page parked on a pool slot (e.g. sitting on the OTP screen) for `email`."""
+
+    def __init__(self, token: str, slot: BrowserSlot, context, page, ttl: float, email: str = None):
+        self.token = token
+        self.email = email
+        self.slot = slot
+        self.context = context
+        self.page = page
+        self.expires_at = time.monotonic() + ttl
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+class LiveSessionRegistry:
+    """
+    Keeps the browser pages opened by init_auth alive between the two auth phases,
+    so complete_auth can type the code into the same page instead of reloading the
+    login and sending a second email. Sessions are addressed by an opaque token,
+    bound to the email that opened them, and closed when resumed or when their TTL expires.
+    """
+
+    def __init__(self, pool: BrowserPool, ttl: float = None, reap_interval: float = 30):
+        self.pool = pool
+        self.ttl = ttl or Config.LIVE_SESSION_TTL
+        self.reap_interval = reap_interval
+        self._sessions: Dict[str, LiveSession] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper = threading.Thread(target=self._reap_loop, name="live-session-reaper", daemon=True)
+        self._reaper.start()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def open(self, fn: Callable[[Any, Any], Any], storage_state=None, email: str = None) -> Future:
+        """
+        Runs fn(context, page) on a free slot and parks the context afterwards for `email`.
+        The future resolves to (token, fn_result). On error the context is closed.
+        """
+        def task(slot: BrowserSlot):
+            try:
+                context = new_context(slot.browser, storage_state=storage_state)
+            except Exception as e:
+                raise BrowserContextError(f"Failed to create browser context: {e}")
+            try:
+                page = context.new_page()
+                result = fn(context, page)
+            except BaseException:
+                _close_quietly(context)
+                raise
+            token = secrets.token_urlsafe(24)
+            with self._lock:
+                self._sessions[token] = LiveSession(token, slot, context, page, self.ttl, email)
+            logger.info(f"Live session parked on slot {slot.index} (ttl {self.ttl:.0f}s).")
+            return token, result
+
+        return self.pool.dispatch(task)
+
+    def take(self, token: Optional[str], email: str = None) -> Optional[LiveSession]:
+        """
+        Removes and returns the live session for the token, if it is still valid.
+        Raises SessionMismatchError when the session was opened for another email: the
+        session is closed, since its token is in the wrong hands.
+        """
+        if not token:
+            return None
+        with self._lock:
+            session = self._sessions.pop(token, None)
+        if session is None:
+            return None
+        if session.expired or not session.slot.alive:
+            self._close(session)
+            return None
+        if email is not None and session.email is not None and _email_key(email) != _email_key(session.email):
+            self._close(session)
+            raise SessionMismatchError("Live session was opened for another email. Call /api/v1/auth/init again.")
+        return session
+
+    def resume(self, session: LiveSession, fn: Callable[[Any, Any], Any]) -> Future:
+        """Runs fn(context, page) on the session's own slot and closes the context afterwards."""
+        def task(slot: BrowserSlot):
+            try:
+                return fn(session.context, session.page)
+            finally:
+                _close_quietly(session.context)
+
+        return self.pool.dispatch(task, slot=session.slot)
+
+    def reap(self):
+        with self._lock:
+            expired = [s for s in self._sessions.values() if s.expired]
+            for session in expired:
+                del self._sessions[session.token]
+        for session in expired:
+            logger.info(f"Live session on slot {session.slot.index} expired.")
+            self._close(session)
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            self._close(session)
+
+    def _close(self, session: LiveSession):
+        # Contexts must be closed from the thread that owns their browser
+        try:
+            self.pool.dispatch(lambda slot: _close_quietly(session.context), slot=session.slot)
+        except RuntimeError:
+            pass
+
+    def _reap_loop(self):
+        while not self._stop.wait(self.reap_interval):
+            self.reap()
+
+
+def _email_key(email: str) -> str:
+    return email.strip().casefold()
+
+
+def _close_quietly(context):
+    try:
+        context.close()
+    except Exception:
+        pass
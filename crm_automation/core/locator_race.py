@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from crm_automation.config import Config
+from crm_automation.core.logger import logger
+
+# Locator resolution for elements with several candidate selectors (or several possible
+# screens). Every candidate is raced in the browser with a single wait on their union
+# (Locator.or_), instead of probing them one after another with a timeout each. The
+# candidate that won is remembered per page object, element and CRM app version
+# (Config.LOCATOR_CACHE), and is checked first, without any wait, on later runs.
+
+# Angular version and main bundle name: a new CRM deploy starts with no learned winners
+APP_VERSION = """
+() => {
+  const root = document.querySelector('[ng-version]');
+  const main = [...document.scripts].map((s) => s.src).find((src) => /\\/main[.-][^/]*\\.js/.test(src));
+  return [root && `ng${root.getAttribute('ng-version')}`, main && main.split('/').pop()].filter(Boolean).join(' ');
+}
+"""
+UNKNOWN_VERSION = "unknown"
+
+
+def app_version(page) -> str:
+    """Version of the CRM app loaded in the page, or UNKNOWN_VERSION (no Angular root, no page yet)."""
+    try:
+        return page.evaluate(APP_VERSION) or UNKNOWN_VERSION
+    except Exception as e:
+        logger.debug(f"Could not read the app version: {e}")
+        return UNKNOWN_VERSION
+
+
+class LocatorCache:
+    """Winning candidate per app version and element, persisted as JSON."""
+
+    VERSION = 1
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.LOCATOR_CACHE
+        self.data: Dict[str, Any] = {"version": self.VERSION, "apps": {}}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if loaded.get("version") == self.VERSION:
+                self.data = loaded
+        except (OSError, ValueError):
+            pass
+
+    def get(self, version: str, key: str) -> Optional[str]:
+        return self.data["apps"].get(version, {}).get(key)
+
+    def order(self, version: str, key: str, names: List[str]) -> List[str]:
+        """Candidate names with the remembered winner first."""
+        winner = self.get(version, key)
+        return [winner] + [n for n in names if n != winner] if winner in names else list(names)
+
+    def remember(self, version: str, key: str, name: str):
+        """Stores the winner. The first one learned on a new app version drops the older versions."""
+        with self._lock:
+            if self.get(version, key) == name:
+                return
+            apps = self.data["apps"]
+            if version not in apps and version != UNKNOWN_VERSION:
+                for stale in [v for v in apps if v != UNKNOWN_VERSION]:
+                    del apps[stale]
+            apps.setdefault(version, {})[key] = name
+            self._save()
+
+    def _save(self):
+        # Atomic replace: parallel workers may learn and save at the same time
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save locator winners: {e}")
+
+
+_caches: Dict[str, LocatorCache] = {}
+_caches_lock = threading.Lock()
+
+
+def locator_cache() -> LocatorCache:
+    """Process-wide cache for the current Config.LOCATOR_CACHE."""
+    with _caches_lock:
+        path = Config.LOCATOR_CACHE
+        if path not in _caches:
+            _caches[path] = LocatorCache(path)
+        return _caches[path]
+
+
+def race(page, key: str, candidates: Dict[str, str], timeout: int, version: str = UNKNOWN_VERSION,
+         cache: LocatorCache = None) -> Optional[str]:
+    """
+    Name of the candidate ({name: selector}) visible first, or None when none shows up
+    within `timeout` ms. When several are visible, the declaration order decides: callers
+    list the candidates in the order they must be acted on (e.g. the start button before
+    the email field it opens), so a remembered winner only skips the wait when it is the
+    only candidate visible.
+    """
+    cache = cache or locator_cache()
+    order = cache.order(version, key, list(candidates))
+    visible = {name: page.locator(f"{candidates[name]} >> visible=true") for name in order}
+
+    def union_of(names: List[str]):
+        union = None
+        for name in names:
+            union = visible[name] if union is None else union.or_(visible[name])
+        return union
+
+    def resolved() -> Optional[str]:
+        return next((name for name in candidates if visible[name].count()), None)
+
+    # The remembered winner is usually already there, alone: two round trips, no wait
+    winner = cache.get(version, key)
+    if winner in candidates and visible[winner].count():
+        others = order[1:]
+        if not others or not union_of(others).count():
+            return winner
+        return resolved()
+
+    try:
+        union_of(order).first.wait_for(state="visible", timeout=timeout)
+    except PlaywrightTimeoutError:
+        return None
+    winner = resolved()
+    if winner is not None:
+        cache.remember(version, key, winner)
+    return winner
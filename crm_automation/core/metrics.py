@@ -0,0 +1,95 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from crm_automation.core.exceptions import ElementNotFoundError
+
+# Prometheus metrics exposed by the API on /metrics. The CLI records them too (in-process),
+# which is harmless: nothing scrapes it.
+
+STEP_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+ACTION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STEP_DURATION = Histogram(
+    "crm_step_duration_seconds",
+    "Duration of onboarding steps and units (login, submit_otp, access_account, panel:<name>, tag:<name>).",
+    ["step", "status"], buckets=STEP_BUCKETS,
+)
+ACTION_DURATION = Histogram(
+    "crm_action_duration_seconds",
+    "Duration of BasePage actions (navigate, click, fill) by selector.",
+    ["action", "selector"], buckets=ACTION_BUCKETS,
+)
+RETRIES = Counter("crm_retries_total", "Attempts retried after a transient error.", ["operation"])
+TIMEOUTS = Counter("crm_timeouts_total", "Timeouts waiting for the CRM (retried or not).", ["operation"])
+FAILURES = Counter("crm_failures_total", "Operations that failed for good.", ["operation"])
+
+JOBS_IN_FLIGHT = Gauge("crm_jobs_in_flight", "Background jobs currently running.")
+POOL_SLOTS = Gauge("crm_browser_pool_slots", "Browser pool slots by state.", ["state"])
+POOL_QUEUED = Gauge("crm_browser_pool_queued_tasks", "Tasks waiting for a free browser slot.")
+LIVE_SESSIONS = Gauge("crm_live_sessions", "Login pages parked on the OTP screen.")
+
+
+def is_timeout(error: BaseException) -> bool:
+    return isinstance(error, (PlaywrightTimeoutError, ElementNotFoundError))
+
+
+def observe_step(step: str, seconds: float, status: str = "succeeded"):
+    STEP_DURATION.labels(step=step, status=status).observe(seconds)
+
+
+def record_retry(operation: str, error: BaseException):
+    RETRIES.labels(operation=operation).inc()
+    if is_timeout(error):
+        TIMEOUTS.labels(operation=operation).inc()
+
+
+def record_failure(operation: str, error: BaseException):
+    FAILURES.labels(operation=operation).inc()
+    if is_timeout(error):
+        TIMEOUTS.labels(operation=operation).inc()
+
+
+@contextmanager
+def time_step(step: str):
+    """Observes the duration of the block as `step`, with its outcome as status."""
+    started = time.monotonic()
+    try:
+        yield
+    except Exception:
+        observe_step(step, time.monotonic() - started, "failed")
+        raise
+    observe_step(step, time.monotonic() - started)
+
+
+@contextmanager
+def time_action(action: str, selector: str):
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        ACTION_DURATION.labels(action=action, selector=selector).observe(time.monotonic() - started)
+
+
+def update_pool(health: Optional[Dict[str, Any]], live_sessions: int = 0):
+    """Refreshes the pool gauges from BrowserPool.health() (called on every scrape)."""
+    if health is None:
+        for state in ("busy", "idle", "unhealthy"):
+            POOL_SLOTS.labels(state=state).set(0)
+        POOL_QUEUED.set(0)
+    else:
+        slots = health["slots"]
+        unhealthy = sum(1 for s in slots if not (s["alive"] and s["connected"]))
+        POOL_SLOTS.labels(state="busy").set(health["busy"])
+        POOL_SLOTS.labels(state="idle").set(max(0, len(slots) - health["busy"] - unhealthy))
+        POOL_SLOTS.labels(state="unhealthy").set(unhealthy)
+        POOL_QUEUED.set(health["queued"])
+    LIVE_SESSIONS.set(live_sessions)
+
+
+def render() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
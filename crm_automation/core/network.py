@@ -0,0 +1,83 @@
+from collections import Counter
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+from crm_automation.config import Config
+from crm_automation.core.logger import logger
+
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class ResourceBlocker:
+    """
+    Request-routing layer installed on every automation context.
+    Aborts resource types the automation never uses (images, fonts, media) and
+    third-party domains (deny list, or everything outside the allow list when set),
+    counting what was blocked per run.
+    """
+
+    def __init__(self, block_types: Iterable[str] = None, deny_domains: Iterable[str] = None,
+                 allow_domains: Iterable[str] = None):
+        self.block_types = set(block_types if block_types is not None else Config.BLOCK_RESOURCE_TYPES)
+        self.deny_domains = [d.lower() for d in (deny_domains if deny_domains is not None else Config.BLOCK_DOMAINS)]
+        self.allow_domains = [d.lower() for d in (allow_domains if allow_domains is not None else Config.ALLOW_DOMAINS)]
+        self.blocked_by_type = Counter()
+        self.blocked_by_domain = Counter()
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+
+    def block_reason(self, url: str, resource_type: str) -> Optional[str]:
+        """Returns why the request should be aborted, or None to let it through."""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            return None
+        host = (parsed.hostname or "").lower()
+        if self.allow_domains and not _host_matches(host, self.allow_domains):
+            return "domain"
+        if _host_matches(host, self.deny_domains):
+            return "domain"
+        if resource_type in self.block_types:
+            return "type"
+        return None
+
+    def install(self, context):
+        context.route("**/*", self._handle)
+        context.on("response", self._on_response)
+        context.on("close", lambda _: logger.info(f"Network: {self.summary()}"))
+
+    def _handle(self, route):
+        request = route.request
+        reason = self.block_reason(request.url, request.resource_type)
+        if reason is None:
+            route.continue_()
+            return
+        self.blocked_by_type[request.resource_type] += 1
+        self.blocked_by_domain[urlparse(request.url).hostname or ""] += 1
+        route.abort("blockedbyclient")
+
+    def _on_response(self, response):
+        self.allowed_requests += 1
+        try:
+            self.allowed_bytes += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    @property
+    def blocked_requests(self) -> int:
+        return sum(self.blocked_by_type.values())
+
+    def stats(self) -> Dict:
+        return {
+            "blocked_requests": self.blocked_requests,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "blocked_by_domain": dict(self.blocked_by_domain),
+            "allowed_requests": self.allowed_requests,
+            "allowed_bytes": self.allowed_bytes,
+        }
+
+    def summary(self) -> str:
+        by_type = ", ".join(f"{k}={v}" for k, v in self.blocked_by_type.most_common()) or "none"
+        return (f"blocked {self.blocked_requests} request(s) ({by_type}); "
+                f"allowed {self.allowed_requests} response(s), {self.allowed_bytes / 1024:.0f} KiB")
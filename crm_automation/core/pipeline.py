@@ -0,0 +1,170 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from crm_automation.core import metrics
+from crm_automation.core.exceptions import CRMAutomationError
+from crm_automation.core.logger import logger
+
+# Step outcomes in the pipeline report (running/succeeded/failed are also sent to progress)
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"
+RESUMED = "resumed"
+
+
+class PipelineDefinitionError(CRMAutomationError):
+    """Unknown dependency, duplicate step name or dependency cycle."""
+    pass
+
+
+class Step:
+    """
+    A unit of the pipeline. `fn` is bound to a page by the caller (see Pipeline.run).
+    `isolated` steps may run on their own page, at the same time as sibling steps.
+    `resumable` steps completed by a previous run are not run again; steps that only set up
+    page state for the others (e.g. selecting the account) must always run.
+    """
+
+    def __init__(self, name: str, fn: Callable, depends_on: Iterable[str] = (), isolated: bool = False,
+                 resumable: bool = True):
+        self.name = name
+        self.fn = fn
+        self.depends_on = tuple(depends_on)
+        self.isolated = isolated
+        self.resumable = resumable
+
+    def __repr__(self):
+        return f"Step({self.name!r}, depends_on={list(self.depends_on)})"
+
+
+class Pipeline:
+    """
+    Small DAG scheduler. Steps run as soon as their dependencies succeeded; steps
+    depending on a failed step are skipped. Non-isolated steps always run on the calling
+    thread (Playwright sync objects are bound to it); isolated steps run on worker threads
+    when `parallelism` > 1 and something else can run alongside them.
+    """
+
+    def __init__(self, steps: List[Step]):
+        self.steps = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise PipelineDefinitionError(f"Duplicate step '{step.name}'")
+            self.steps[step.name] = step
+        for step in steps:
+            unknown = [d for d in step.depends_on if d not in self.steps]
+            if unknown:
+                raise PipelineDefinitionError(f"Step '{step.name}' depends on unknown step(s): {', '.join(unknown)}")
+        self.order = self._topological_order()
+
+    @property
+    def step_names(self) -> List[str]:
+        return [step.name for step in self.order]
+
+    def _topological_order(self) -> List[Step]:
+        order, done, visiting = [], set(), set()
+
+        def visit(step: Step):
+            if step.name in done:
+                return
+            if step.name in visiting:
+                raise PipelineDefinitionError(f"Dependency cycle through step '{step.name}'")
+            visiting.add(step.name)
+            for dep in step.depends_on:
+                visit(self.steps[dep])
+            visiting.discard(step.name)
+            done.add(step.name)
+            order.append(step)
+
+        for step in self.steps.values():
+            visit(step)
+        return order
+
+    def run(self, bind: Callable[[Step, bool], Callable[[], Any]], parallelism: int = 1,
+            progress: Optional[Callable] = None, completed: Iterable[str] = ()) -> List[Dict]:
+        """
+        Runs every step. bind(step, isolated) is called on this thread and returns the
+        zero-argument callable to execute (on a worker thread when isolated is True).
+        Resumable steps listed in `completed` are reported as resumed without running.
+        Returns the per-step report ({name, status, error, started, duration}, times in
+        seconds from the pipeline start) and re-raises the first step failure at the end.
+        """
+        progress = progress or (lambda step, status, error=None: None)
+        started = time.monotonic()
+        results: Dict[str, Dict] = {}
+        errors: List[BaseException] = []
+        running: Dict[Future, Step] = {}
+        pending = list(self.order)
+        completed = set(completed)
+        for step in list(pending):
+            if step.resumable and step.name in completed:
+                pending.remove(step)
+                progress(step.name, SUCCEEDED, None)
+                results[step.name] = {"name": step.name, "status": RESUMED, "error": None,
+                                      "started": None, "duration": 0}
+
+        def begin(step: Step) -> float:
+            progress(step.name, "running", None)
+            return time.monotonic()
+
+        def finish(step: Step, step_started: float, step_finished: float, error: Optional[BaseException] = None):
+            status = FAILED if error is not None else SUCCEEDED
+            progress(step.name, status, str(error) if error is not None else None)
+            results[step.name] = {
+                "name": step.name,
+                "status": status,
+                "error": str(error) if error is not None else None,
+                "started": round(step_started - started, 2),
+                "duration": round(step_finished - step_started, 2),
+            }
+            metrics.observe_step(step.name, step_finished - step_started, status)
+            if error is not None:
+                logger.error(f"Step '{step.name}' failed: {error}")
+                errors.append(error)
+
+        def timed(step: Step, fn: Callable[[], Any]):
+            step_started = begin(step)
+            try:
+                fn()
+            except Exception as e:
+                return step_started, time.monotonic(), e
+            return step_started, time.monotonic(), None
+
+        with ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="pipeline") as executor:
+            while pending or running:
+                # Skip everything downstream of a failure
+                for step in list(pending):
+                    if any(results.get(d, {}).get("status") in (FAILED, SKIPPED) for d in step.depends_on):
+                        pending.remove(step)
+                        results[step.name] = {"name": step.name, "status": SKIPPED, "error": None,
+                                              "started": None, "duration": 0}
+                ready = [s for s in pending
+                         if all(results.get(d, {}).get("status") in (SUCCEEDED, RESUMED) for d in s.depends_on)]
+
+                isolated = [s for s in ready if s.isolated]
+                if parallelism > 1 and isolated and len(isolated) + len(running) > 1:
+                    for step in isolated[:parallelism - len(running)]:
+                        pending.remove(step)
+                        running[executor.submit(timed, step, bind(step, True))] = step
+                elif ready and not running:
+                    step = ready[0]
+                    pending.remove(step)
+                    finish(step, *timed(step, bind(step, False)))
+                    continue
+
+                if not running:
+                    break
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    finish(step, *future.result())
+
+        report = [results[step.name] for step in self.order if step.name in results]
+        logger.info("Pipeline timings: " + ", ".join(
+            f"{r['name']}={r['status']}" + (f" {r['duration']}s" if r["status"] in (SUCCEEDED, FAILED) else "")
+            for r in report
+        ) + f" | total {time.monotonic() - started:.2f}s")
+        if errors:
+            raise errors[0]
+        return report
@@ -0,0 +1,282 @@
+import base64
+import datetime
+import json
+import os
+import re
+import shutil
+import tempfile
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from crm_automation.config import Config
+from crm_automation.core.exceptions import CRMAutomationError
+from crm_automation.core.logger import logger
+
+# Recording archives: the network traffic (HAR) and DOM snapshots of a real run_automation
+# run, replayed later offline so regression and performance runs are repeatable.
+#
+#   <archive>/manifest.json        format version, run settings, step snapshots
+#   <archive>/network.har          every request/response of the run, bodies embedded
+#   <archive>/dom/NNN-<step>.html  page DOM after each step
+#   <archive>/backend_profile.json learned CRM endpoints when the run started (if any)
+#   <archive>/template.<ext>       onboarding template used by the run
+
+ARCHIVE_FORMAT = "crm-automation-recording"
+ARCHIVE_VERSION = 1
+HAR_FILE = "network.har"
+MANIFEST_FILE = "manifest.json"
+DOM_DIR = "dom"
+BACKEND_PROFILE_FILE = "backend_profile.json"
+
+# Describe the recorded body, not the one fulfilled (bodies are stored decoded)
+_DROPPED_HEADERS = {"content-length", "content-encoding", "transfer-encoding"}
+
+
+class RecordingError(CRMAutomationError):
+    """Recording archive missing, unreadable or of another format version."""
+    pass
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", text or "").strip("-").lower()[:40] or "run"
+
+
+class RecordingArchive:
+    """
+    A directory holding one recorded run. create() starts a new archive for recording,
+    open() loads an existing one for replay.
+    """
+
+    def __init__(self, path: str, manifest: Dict[str, Any] = None):
+        self.path = path
+        self.manifest = manifest or {"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION, "snapshots": []}
+
+    @property
+    def har_path(self) -> str:
+        return os.path.join(self.path, HAR_FILE)
+
+    @classmethod
+    def create(cls, path: str = None, account_name: str = None, **info) -> "RecordingArchive":
+        """
+        New archive at `path` (default: recordings/<timestamp>-<account>). Copies the
+        backend profile and the template so replay starts from the same knowledge.
+        `info` (email, step, template...) is stored in the manifest; never the 2FA code.
+        The archive is readable by its owner only: the HAR holds session cookies and tokens.
+        """
+        now = datetime.datetime.now()
+        path = path or os.path.join("recordings", f"{now:%Y%m%d-%H%M%S}-{_slug(account_name)}")
+        if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            raise RecordingError(f"'{path}' already holds a recording. Choose another directory.")
+        for directory in (path, os.path.join(path, DOM_DIR)):
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            # makedirs' mode is masked by the umask and ignored for existing directories
+            os.chmod(directory, 0o700)
+        info.pop("code", None)
+
+        archive = cls(path)
+        archive.manifest.update(info, account_name=account_name, base_url=Config.BASE_URL,
+                                recorded_at=now.isoformat(timespec="seconds"), har=HAR_FILE,
+                                playwright=_playwright_version(), status="running")
+        if os.path.exists(Config.BACKEND_PROFILE):
+            shutil.copyfile(Config.BACKEND_PROFILE, os.path.join(path, BACKEND_PROFILE_FILE))
+            archive.manifest["backend_profile"] = BACKEND_PROFILE_FILE
+        template = info.get("template") or Config.ONBOARDING_TEMPLATE
+        if template and os.path.exists(template):
+            name = "template" + os.path.splitext(template)[1]
+            shutil.copyfile(template, os.path.join(path, name))
+            archive.manifest["template"] = name
+        archive.save()
+        logger.info(f"Recording this run to '{path}'.")
+        return archive
+
+    @classmethod
+    def open(cls, path: str) -> "RecordingArchive":
+        try:
+            with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise RecordingError(f"No readable recording in '{path}': {e}")
+        if manifest.get("format") != ARCHIVE_FORMAT or manifest.get("version") != ARCHIVE_VERSION:
+            raise RecordingError(
+                f"'{path}' is a {manifest.get('format')} v{manifest.get('version')} archive; "
+                f"this version replays {ARCHIVE_FORMAT} v{ARCHIVE_VERSION}. Record it again."
+            )
+        archive = cls(path, manifest)
+        if not os.path.exists(archive.har_path):
+            raise RecordingError(f"Recording '{path}' has no {HAR_FILE} (was the run interrupted?).")
+        return archive
+
+    def file(self, key: str) -> Optional[str]:
+        """Path of an optional archive file named in the manifest (template, backend_profile)."""
+        name = self.manifest.get(key)
+        return os.path.join(self.path, name) if name else None
+
+    def context_options(self) -> Dict[str, Any]:
+        """new_context kwargs that record the context's traffic into the archive (written on close)."""
+        return {"record_har_path": self.har_path, "record_har_content": "embed"}
+
+    def snapshot(self, page, step: str, status: str):
+        """Saves the page DOM as dom/NNN-<step>.html. Never fails the run."""
+        snapshots = self.manifest["snapshots"]
+        name = f"{len(snapshots) + 1:03d}-{_slug(step)}.html"
+        try:
+            html = page.content()
+            with open(os.path.join(self.path, DOM_DIR, name), "w", encoding="utf-8") as f:
+                f.write(html)
+        except Exception as e:
+            logger.warning(f"Could not snapshot the DOM after '{step}': {e}")
+            return
+        snapshots.append({"step": step, "status": status, "url": page.url, "file": f"{DOM_DIR}/{name}"})
+
+    def progress(self, page) -> Callable[[str, str, Optional[str]], None]:
+        """Progress callback (see workflow.ProgressCallback) snapshotting the DOM after each step."""
+        def on_progress(step: str, status: str, error: Optional[str] = None):
+            if status in ("succeeded", "failed"):
+                self.snapshot(page, step, status)
+        return on_progress
+
+    def finish(self, status: str):
+        """Closes the archive once the recorded context is closed (Playwright writes the HAR then)."""
+        if os.path.exists(self.har_path):
+            os.chmod(self.har_path, 0o600)
+        self.manifest.update(status=status, finished_at=datetime.datetime.now().isoformat(timespec="seconds"))
+        self.save()
+
+    def save(self):
+        # The manifest names the account and e-mail
+        fd = os.open(os.path.join(self.path, MANIFEST_FILE), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+
+    @contextmanager
+    def replay_settings(self):
+        """
+        Points Config at the recorded CRM URL, a copy of the recorded backend profile and a
+        throwaway checkpoint database, input strategy and locator caches, so replay takes the
+        recorded path and leaves the real files alone. Panels and tags go through the UI
+        (see ui_engines). Restores the previous settings afterwards.
+        """
+        names = ("BASE_URL", "URL_LOGIN", "URL_PARTNER", "URL_PANELS", "URL_CONTACTS",
+                 "BACKEND_PROFILE", "CHECKPOINT_DB", "INPUT_STRATEGY_CACHE", "LOCATOR_CACHE")
+        previous = {name: getattr(Config, name) for name in names}
+        with tempfile.TemporaryDirectory(prefix="crm-replay-") as workdir, ui_engines():
+            try:
+                Config.use_base_url(self.manifest["base_url"])
+                Config.BACKEND_PROFILE = os.path.join(workdir, BACKEND_PROFILE_FILE)
+                if self.file("backend_profile"):
+                    shutil.copyfile(self.file("backend_profile"), Config.BACKEND_PROFILE)
+                Config.CHECKPOINT_DB = os.path.join(workdir, "checkpoints.db")
+                Config.INPUT_STRATEGY_CACHE = os.path.join(workdir, "input_strategies.json")
+                Config.LOCATOR_CACHE = os.path.join(workdir, "locator_winners.json")
+                yield
+            finally:
+                for name, value in previous.items():
+                    setattr(Config, name, value)
+
+
+@contextmanager
+def ui_engines():
+    """
+    Panels and tags created through the UI only, while recording and replaying. Backend
+    calls go through the APIRequestContext, which context routing does not see: HarReplay
+    could not serve them and a replay would send them to the live CRM.
+    """
+    previous = Config.PANELS_ENGINE, Config.TAGS_ENGINE
+    Config.PANELS_ENGINE = Config.TAGS_ENGINE = "ui"
+    try:
+        yield
+    finally:
+        Config.PANELS_ENGINE, Config.TAGS_ENGINE = previous
+
+
+def _playwright_version() -> Optional[str]:
+    try:
+        from importlib.metadata import version
+        return version("playwright")
+    except Exception:
+        return None
+
+
+class HarReplay:
+    """
+    Serves a recorded HAR to a context instead of the network. Unlike route_from_har,
+    repeated requests get the recorded responses in order (the panel list before and after
+    a creation differ), and the last one again once they run out (polling). Requests are
+    matched by method, URL and body, then by method and URL (bodies with generated values).
+    Anything not recorded is aborted: replay never reaches the network.
+    """
+
+    def __init__(self, har_path: str):
+        try:
+            with open(har_path, encoding="utf-8") as f:
+                entries = json.load(f)["log"]["entries"]
+        except (OSError, ValueError, KeyError) as e:
+            raise RecordingError(f"Unreadable HAR '{har_path}': {e}")
+        self._by_body: Dict[tuple, deque] = defaultdict(deque)
+        self._by_url: Dict[tuple, deque] = defaultdict(deque)
+        self._last: Dict[tuple, Dict] = {}
+        for entry in entries:
+            request = entry["request"]
+            key = (request["method"], request["url"])
+            self._by_body[key + ((request.get("postData") or {}).get("text"),)].append(entry)
+            self._by_url[key].append(entry)
+        self.served = 0
+        self.missed = Counter()
+
+    def install(self, context):
+        # Routes added last run first: this one answers before the ResourceBlocker
+        context.route("**/*", self._handle)
+        context.on("close", lambda _: logger.info(f"Replay: {self.summary()}"))
+
+    def lookup(self, method: str, url: str, post_data: str = None) -> Optional[Dict]:
+        """Next recorded entry for the request (consumed), the last one served for it, or None."""
+        key = (method, url)
+        by_body = self._by_body.get(key + (post_data,))
+        if by_body:
+            entry = by_body.popleft()
+            self._by_url[key].remove(entry)
+        elif self._by_url.get(key):
+            entry = self._by_url[key].popleft()
+            self._by_body[key + ((entry["request"].get("postData") or {}).get("text"),)].remove(entry)
+        else:
+            return self._last.get(key)
+        self._last[key] = entry
+        return entry
+
+    def _handle(self, route):
+        request = route.request
+        entry = self.lookup(request.method, request.url, request.post_data)
+        # Status <= 0: the request failed or was aborted while recording
+        if entry is None or entry["response"].get("status", 0) <= 0:
+            self.missed[f"{request.method} {request.url.split('?')[0]}"] += 1
+            route.abort("internetdisconnected")
+            return
+        self.served += 1
+        route.fulfill(**fulfillment(entry["response"]))
+
+    def summary(self) -> str:
+        missed = ", ".join(f"{k} x{v}" for k, v in self.missed.most_common(5)) or "none"
+        return f"served {self.served} recorded response(s); not recorded (aborted): {missed}"
+
+
+def fulfillment(response: Dict[str, Any]) -> Dict[str, Any]:
+    """route.fulfill kwargs for a HAR response. Repeated Set-Cookie headers are joined by newlines."""
+    headers: Dict[str, str] = {}
+    for header in response.get("headers", []):
+        name = header["name"].lower()
+        if name in _DROPPED_HEADERS:
+            continue
+        if name in headers and name == "set-cookie":
+            headers[name] += "\n" + header["value"]
+        else:
+            headers[name] = header["value"]
+    content = response.get("content") or {}
+    text = content.get("text") or ""
+    body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+    return {"status": response["status"], "headers": headers, "body": body}
+
+
+def replayed_defaults(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """CLI settings of the recorded run that replay reuses when not given again (no 2FA code is recorded)."""
+    return {key: manifest.get(key) for key in ("account_name", "email") if manifest.get(key)}
@@ -0,0 +1,101 @@
+import re
+from typing import Any, Callable, Optional
+
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from tenacity import RetryCallState, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from crm_automation.config import Config
+from crm_automation.core import metrics
+from crm_automation.core.exceptions import CRMAutomationError
+from crm_automation.core.logger import logger
+
+# Playwright errors that a second attempt can get past (the element or page was still settling)
+TRANSIENT_PLAYWRIGHT_ERRORS = re.compile(
+    r"not attached|detached|not visible|not stable|intercepts pointer events|"
+    r"Execution context was destroyed|net::ERR_|Navigation|frame was detached",
+    re.IGNORECASE,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Classifies an error. One an inner retry_call already gave up on is not retried again
+    (nested action, panel and step retries would multiply the attempts). Otherwise our own
+    exceptions say it themselves (CRMAutomationError.retryable); Playwright timeouts and
+    settling errors are retryable; a closed browser/page or anything else (bugs, bad
+    input) is not.
+    """
+    if getattr(error, "retries_exhausted", False):
+        return False
+    if isinstance(error, CRMAutomationError):
+        return error.retryable
+    if isinstance(error, PlaywrightTimeoutError):
+        return True
+    if isinstance(error, PlaywrightError):
+        return bool(TRANSIENT_PLAYWRIGHT_ERRORS.search(str(error)))
+    return False
+
+
+def mark_exhausted(error: BaseException) -> BaseException:
+    """Flags `error` as already retried (or not worth retrying): is_retryable says no from now on."""
+    try:
+        error.retries_exhausted = True
+    except AttributeError:
+        pass
+    return error
+
+
+class RetryPolicy:
+    """Attempt budget and jittered exponential backoff (seconds) for one kind of operation."""
+
+    def __init__(self, attempts: int, backoff: float, max_backoff: float):
+        self.attempts = max(1, attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    @classmethod
+    def for_actions(cls) -> "RetryPolicy":
+        """Single page-object actions (click, fill, one panel modal)."""
+        return cls(Config.RETRY_ACTION_ATTEMPTS, Config.RETRY_BACKOFF, Config.RETRY_MAX_BACKOFF)
+
+    @classmethod
+    def for_steps(cls) -> "RetryPolicy":
+        """Whole pipeline steps, after their own actions gave up."""
+        return cls(Config.RETRY_STEP_ATTEMPTS, Config.RETRY_BACKOFF * 2, Config.RETRY_MAX_BACKOFF * 2)
+
+
+def retry_call(fn: Callable[..., Any], *args, policy: RetryPolicy = None, description: str = None,
+               recover: Optional[Callable[[BaseException], Any]] = None, **kwargs) -> Any:
+    """
+    Calls fn(*args, **kwargs), retrying retryable errors within the policy's budget.
+    recover(error) runs before every new attempt to bring the page back to a usable state
+    (e.g. close a leftover dialog). Errors raised by recover are logged and ignored.
+    The last error is re-raised once the budget is spent, marked as exhausted so that
+    outer retry_calls (panel, step) do not retry it again.
+    """
+    policy = policy or RetryPolicy.for_actions()
+    description = description or getattr(fn, "__name__", "action")
+
+    def before_sleep(state: RetryCallState):
+        error = state.outcome.exception()
+        metrics.record_retry(description, error)
+        logger.warning(f"{description} failed (attempt {state.attempt_number}/{policy.attempts}): {error}. "
+                       f"Retrying in {state.next_action.sleep:.1f}s.")
+        if recover is not None:
+            try:
+                recover(error)
+            except Exception as e:
+                logger.warning(f"Recovery before retrying {description} failed: {e}")
+
+    retrying = Retrying(
+        stop=stop_after_attempt(policy.attempts),
+        wait=wait_random_exponential(multiplier=policy.backoff, max=policy.max_backoff),
+        retry=retry_if_exception(is_retryable),
+        before_sleep=before_sleep,
+        reraise=True,
+    )
+    try:
+        return retrying(fn, *args, **kwargs)
+    except Exception as e:
+        metrics.record_failure(description, e)
+        raise mark_exhausted(e)
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from crm_automation.config import Config
+from crm_automation.core.logger import logger
+
+
+class SessionCache:
+    """
+    Post-login storage states keyed by email, one JSON file per email.
+    Entries expire after `ttl` seconds; callers must still check the session
+    against the CRM before trusting it (see LoginPage.is_session_valid).
+    """
+
+    def __init__(self, directory: str = None, ttl: float = None):
+        self.directory = directory or Config.SESSION_CACHE_DIR
+        self.ttl = ttl if ttl is not None else Config.SESSION_CACHE_TTL
+
+    def _path(self, email: str) -> str:
+        key = hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached storage state for the email, or None if missing/expired."""
+        path = self._path(email)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) <= time.time():
+            self.invalidate(email)
+            return None
+        return entry.get("storage_state")
+
+    def put(self, email: str, storage_state: Dict[str, Any]):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(email)
+            # Auth cookies/tokens: readable by the owner only
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({
+                    "email": email,
+                    "saved_at": time.time(),
+                    "expires_at": time.time() + self.ttl,
+                    "storage_state": storage_state,
+                }, f)
+            logger.info(f"Authenticated session cached for {email}.")
+        except OSError as e:
+            # Read-only filesystems (e.g. Vercel) just lose the cache
+            logger.warning(f"Could not cache session for {email}: {e}")
+
+    def invalidate(self, email: str):
+        try:
+            os.remove(self._path(email))
+            logger.info(f"Cached session for {email} invalidated.")
+        except OSError:
+            pass
@@ -0,0 +1,69 @@
+# In-page scripts used by BasePage.wait_for_idle to detect when the Angular app is idle.
+
+# Counts in-flight XHR/fetch requests. Installed as a context init script so it sees
+# every request from the first byte of the page (zone.js patches on top of it).
+PENDING_REQUESTS_TRACKER = """
+(() => {
+  if (window.__crmPendingRequests !== undefined) return;
+  window.__crmPendingRequests = 0;
+  const started = () => { window.__crmPendingRequests++; };
+  const finished = () => { window.__crmPendingRequests = Math.max(0, window.__crmPendingRequests - 1); };
+
+  const send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function (...args) {
+    started();
+    this.addEventListener('loadend', finished, { once: true });
+    return send.apply(this, args);
+  };
+
+  if (window.fetch) {
+    const fetch = window.fetch;
+    window.fetch = function (...args) {
+      started();
+      return fetch.apply(this, args).finally(finished);
+    };
+  }
+})();
+"""
+
+# Resolves once the app is idle: Angular testabilities stable, no pending XHR/fetch
+# and no DOM mutation for `quietMs`. Always resolves by `timeout` (the ceiling).
+WAIT_FOR_IDLE = """
+({ timeout, quietMs, tracker }) => new Promise((resolve) => {
+  if (window.__crmPendingRequests === undefined) {
+    // Page was not created through new_context: track from now on
+    (0, eval)(tracker);
+  }
+  const start = performance.now();
+  let lastMutation = start;
+  const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+  observer.observe(document.documentElement || document, {
+    subtree: true, childList: true, attributes: true, characterData: true
+  });
+
+  const angularStable = () => {
+    try {
+      if (window.getAllAngularTestabilities) {
+        return window.getAllAngularTestabilities().every((t) => t.isStable());
+      }
+    } catch (e) {}
+    return true;
+  };
+
+  const check = () => {
+    const now = performance.now();
+    const pending = window.__crmPendingRequests || 0;
+    const idle = document.readyState !== 'loading'
+      && pending === 0
+      && angularStable()
+      && now - lastMutation >= quietMs;
+    if (idle || now - start >= timeout) {
+      observer.disconnect();
+      resolve({ idle, waited: Math.round(now - start), pending });
+      return;
+    }
+    setTimeout(check, 25);
+  };
+  check();
+})
+"""
@@ -0,0 +1,152 @@
+from typing import Dict, List, Sequence, Tuple
+
+from crm_automation.core.templates import normalize_name
+
+# In-page scripts used by PanelsPage to edit the stages of the panel modal in a single
+# evaluate call each, instead of several Playwright round trips per stage.
+
+# Deletes every stage row of the last open mat-dialog-container (its trash buttons), one
+# click at a time: Angular may re-render the remaining rows after each removal. After each
+# click a MutationObserver waits, up to `timeout` (ms), for the button count to drop.
+# Resolves to {removed, remaining}.
+CLEAR_STAGES = """
+async ({ timeout }) => {
+  const dialogs = document.querySelectorAll('mat-dialog-container');
+  const dialog = dialogs[dialogs.length - 1];
+  if (!dialog) return { removed: 0, remaining: 0 };
+  const buttons = () => [...dialog.querySelectorAll('mat-icon[data-mat-icon-name="trash"]')]
+    .map((icon) => icon.closest('button')).filter(Boolean);
+
+  const fewer = (count) => new Promise((resolve) => {
+    if (buttons().length < count) return resolve(true);
+    const observer = new MutationObserver(() => {
+      if (buttons().length < count) { observer.disconnect(); clearTimeout(timer); resolve(true); }
+    });
+    const timer = setTimeout(() => { observer.disconnect(); resolve(buttons().length < count); }, timeout);
+    observer.observe(dialog, { subtree: true, childList: true });
+  });
+
+  let removed = 0;
+  for (let count = buttons().length; count > 0; count = buttons().length) {
+    buttons()[0].click();
+    if (!(await fewer(count))) break;
+    removed += count - buttons().length;
+  }
+  return { removed, remaining: buttons().length };
+}
+"""
+
+# Adds one row per stage to the last open mat-dialog-container ("Adicionar fase"), types
+# its name with the events Angular's value accessor listens to and picks its type in the
+# row's mat-select overlay. Every wait is a MutationObserver bounded by `timeout` (ms).
+# Resolves to {start, rows: [{name, type}], errors}: `rows` is every stage row after the
+# edit, `start` the index of the first row it added.
+WRITE_STAGES = """
+async ({ stages, inputSelector, timeout }) => {
+  const dialogs = document.querySelectorAll('mat-dialog-container');
+  const dialog = dialogs[dialogs.length - 1];
+  if (!dialog) return { start: 0, rows: [], errors: ['no open dialog'] };
+
+  const waitFor = (predicate) => new Promise((resolve) => {
+    const found = predicate();
+    if (found) return resolve(found);
+    const observer = new MutationObserver(() => {
+      const value = predicate();
+      if (value) { observer.disconnect(); clearTimeout(timer); resolve(value); }
+    });
+    const timer = setTimeout(() => { observer.disconnect(); resolve(predicate() || null); }, timeout);
+    observer.observe(document.body, { subtree: true, childList: true, attributes: true });
+  });
+
+  const inputs = () => [...dialog.querySelectorAll(inputSelector)];
+  // Smallest ancestor of the name input holding a mat-select but no other stage input
+  const selectOf = (input) => {
+    for (let el = input.parentElement; el && el !== dialog; el = el.parentElement) {
+      if (el.querySelectorAll(inputSelector).length > 1) return null;
+      const select = el.querySelector('mat-select');
+      if (select) return select;
+    }
+    return null;
+  };
+  const selectText = (select) => {
+    const value = select && select.querySelector('.mat-mdc-select-value, .mat-select-value');
+    return ((value || select || {}).textContent || '').trim();
+  };
+  const addButton = () => [...dialog.querySelectorAll('button, [role="button"]')]
+    .find((b) => /adicionar\\s+fase/i.test(b.textContent));
+  const visibleOptions = () => {
+    const options = [...document.querySelectorAll('.cdk-overlay-container mat-option, .cdk-overlay-pane mat-option')];
+    return options.length ? options : null;
+  };
+
+  const setValue = (input, value) => {
+    // The native setter: Angular reads input.value when the 'input' event fires
+    const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    input.focus();
+    setter.call(input, value);
+    input.dispatchEvent(new Event('input', { bubbles: true }));
+    input.dispatchEvent(new Event('change', { bubbles: true }));
+    input.dispatchEvent(new FocusEvent('blur'));
+    input.dispatchEvent(new FocusEvent('focusout', { bubbles: true }));
+  };
+
+  const chooseType = async (select, type) => {
+    const trigger = select.querySelector('.mat-mdc-select-trigger, .mat-select-trigger') || select;
+    trigger.click();
+    const options = await waitFor(visibleOptions);
+    if (!options) return `type '${type}': options did not open`;
+    const wanted = type.trim().toLowerCase();
+    const text = (o) => o.textContent.trim().toLowerCase();
+    const option = options.find((o) => text(o) === wanted) || options.find((o) => text(o).includes(wanted));
+    if (!option) {
+      document.dispatchEvent(new KeyboardEvent('keydown', { key: 'Escape', bubbles: true }));
+      await waitFor(() => !visibleOptions());
+      return `type '${type}': no such option`;
+    }
+    option.click();
+    await waitFor(() => !visibleOptions());
+    return null;
+  };
+
+  const start = inputs().length;
+  const errors = [];
+  for (const [index, [name, type]] of stages.entries()) {
+    const count = inputs().length;
+    const button = addButton();
+    if (!button) { errors.push('"Adicionar fase" button not found'); break; }
+    button.click();
+    let added = await waitFor(() => inputs().length > count);
+    if (!added) {
+      button.click();
+      added = await waitFor(() => inputs().length > count);
+    }
+    if (!added) { errors.push(`stage ${index + 1}: no new row`); break; }
+
+    const input = inputs()[count];
+    setValue(input, name);
+    const select = selectOf(input);
+    const error = select ? await chooseType(select, type) : `type '${type}': row has no mat-select`;
+    if (error) errors.push(`stage ${index + 1} ${error}`);
+  }
+
+  const rows = inputs().map((input) => ({ name: input.value, type: selectText(selectOf(input)) }));
+  return { start, rows, errors };
+}
+"""
+
+
+def stage_mismatches(expected: Sequence[Tuple[str, str]], snapshot: Dict) -> List[str]:
+    """
+    Differences between the stages that should have been added and the rows WRITE_STAGES
+    reported (from its `start` row on). Empty when every stage has its name and type.
+    """
+    written = snapshot.get("rows", [])[snapshot.get("start", 0):]
+    problems = list(snapshot.get("errors", []))
+    if len(written) != len(expected):
+        problems.append(f"{len(written)} stage row(s) added, expected {len(expected)}")
+    for index, ((name, stage_type), row) in enumerate(zip(expected, written), start=1):
+        if normalize_name(row.get("name", "")) != normalize_name(name):
+            problems.append(f"stage {index} name is '{row.get('name')}', expected '{name}'")
+        elif normalize_name(row.get("type", "")) != normalize_name(stage_type):
+            problems.append(f"stage {index} '{name}' type is '{row.get('type')}', expected '{stage_type}'")
+    return problems
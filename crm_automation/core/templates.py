@@ -0,0 +1,152 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+from crm_automation.config import Config
+from crm_automation.core.exceptions import CRMAutomationError
+from crm_automation.core.logger import logger
+
+# Stage types offered by the "Novo painel" modal
+STAGE_TYPES = ("Fase inicial", "Fase intermediária", "Fase final")
+
+
+class TemplateError(CRMAutomationError):
+    """Onboarding template missing, unreadable or invalid."""
+    pass
+
+
+def normalize_name(name: str) -> str:
+    """Comparison key for names typed by people: case and repeated spaces are ignored."""
+    return re.sub(r"\s+", " ", str(name)).strip().casefold()
+
+
+class OnboardingTemplate:
+    """
+    Validated onboarding template: the panels (with stages) and tags an account must have.
+    Panels keep the shape the page objects use: {name, description, stages: [(name, type)]}.
+    """
+
+    def __init__(self, name: str, panels: List[Dict[str, Any]], tags: List[str]):
+        self.name = name
+        self.panels = panels
+        self.tags = tags
+
+    @property
+    def panel_names(self) -> List[str]:
+        return [panel["name"] for panel in self.panels]
+
+    def missing_panels(self, existing: Iterable[str]) -> List[Dict[str, Any]]:
+        """Panels of the template whose name is not in `existing`."""
+        have = {normalize_name(n) for n in existing}
+        return [panel for panel in self.panels if normalize_name(panel["name"]) not in have]
+
+    def missing_tags(self, existing: Iterable[str]) -> List[str]:
+        """Tags of the template not in `existing`."""
+        have = {normalize_name(n) for n in existing}
+        return [tag for tag in self.tags if normalize_name(tag) not in have]
+
+    @classmethod
+    def from_dict(cls, data: Any, source: str = "template") -> "OnboardingTemplate":
+        """Validates raw template data. Raises TemplateError listing every problem found."""
+        errors = []
+        if not isinstance(data, dict):
+            raise TemplateError(f"{source}: expected an object with 'panels' and 'tags'.")
+
+        panels, seen = [], set()
+        raw_panels = data.get("panels", [])
+        if not isinstance(raw_panels, list):
+            errors.append("'panels' must be a list.")
+            raw_panels = []
+        for i, raw in enumerate(raw_panels):
+            where = f"panels[{i}]"
+            if not isinstance(raw, dict) or not str(raw.get("name") or "").strip():
+                errors.append(f"{where}: 'name' is required.")
+                continue
+            name = str(raw["name"]).strip()
+            if normalize_name(name) in seen:
+                errors.append(f"{where}: duplicate panel '{name}'.")
+            seen.add(normalize_name(name))
+            stages = []
+            for j, stage in enumerate(raw.get("stages") or []):
+                stage_name, stage_type = _stage_fields(stage)
+                if not stage_name:
+                    errors.append(f"{where}.stages[{j}]: 'name' is required.")
+                elif stage_type not in STAGE_TYPES:
+                    errors.append(f"{where}.stages[{j}]: type '{stage_type}' is not one of {list(STAGE_TYPES)}.")
+                else:
+                    stages.append((stage_name, stage_type))
+            if not raw.get("stages"):
+                errors.append(f"{where}: at least one stage is required.")
+            panels.append({"name": name, "description": str(raw.get("description") or ""), "stages": stages})
+
+        tags, seen = [], set()
+        raw_tags = data.get("tags", [])
+        if not isinstance(raw_tags, list):
+            errors.append("'tags' must be a list.")
+            raw_tags = []
+        for i, tag in enumerate(raw_tags):
+            if not isinstance(tag, str) or not tag.strip():
+                errors.append(f"tags[{i}]: must be a non-empty string.")
+                continue
+            if normalize_name(tag) in seen:
+                errors.append(f"tags[{i}]: duplicate tag '{tag}'.")
+            seen.add(normalize_name(tag))
+            tags.append(tag.strip())
+
+        if errors:
+            raise TemplateError(f"Invalid onboarding template {source}: " + "; ".join(errors))
+        return cls(str(data.get("name") or os.path.splitext(os.path.basename(source))[0]), panels, tags)
+
+
+def _stage_fields(stage: Any) -> Tuple[str, str]:
+    # {"name": ..., "type": ...} or ["name", "type"]
+    if isinstance(stage, dict):
+        return str(stage.get("name") or "").strip(), stage.get("type")
+    if isinstance(stage, (list, tuple)) and len(stage) == 2:
+        return str(stage[0] or "").strip(), stage[1]
+    return "", None
+
+
+_cache: Dict[str, Tuple[float, OnboardingTemplate]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_template(path: str = None) -> OnboardingTemplate:
+    """
+    Loads, validates and compiles a JSON or YAML template (Config.ONBOARDING_TEMPLATE by default).
+    Compiled templates are cached until the file changes.
+    """
+    path = os.path.abspath(path or Config.ONBOARDING_TEMPLATE)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError as e:
+        raise TemplateError(f"Onboarding template not found: {path} ({e})")
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            if path.endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError:
+                    raise TemplateError("YAML templates need PyYAML (pip install pyyaml). Use JSON otherwise.")
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+    except TemplateError:
+        raise
+    except Exception as e:
+        raise TemplateError(f"Could not parse onboarding template {path}: {e}")
+
+    template = OnboardingTemplate.from_dict(data, source=os.path.basename(path))
+    with _cache_lock:
+        _cache[path] = (mtime, template)
+    logger.info(f"Onboarding template '{template.name}' loaded: "
+                f"{len(template.panels)} panel(s), {len(template.tags)} tag(s).")
+    return template
@@ -1,23 +1,32 @@
 import argparse
 import sys
+from contextlib import nullcontext
 from playwright.sync_api import sync_playwright
 from crm_automation.config import Config
 from crm_automation.core.logger import logger, setup_logger
 from crm_automation.pages.login_page import LoginPage
-from crm_automation.pages.admin_page import AdminPage
-from crm_automation.pages.panels_page import PanelsPage
-from crm_automation.pages.contacts_page import ContactsPage
+from crm_automation.core.browser_pool import BrowserPool, new_context
+from crm_automation.core.session_cache import SessionCache
+from crm_automation.core.instrumentation import Profiler, log_report, profiling
+from crm_automation.core.recording import HarReplay, RecordingArchive, RecordingError, replayed_defaults, ui_engines
+from crm_automation.workflow import run_onboarding, onboard_accounts, read_accounts_file, track_step
 import logging
+import json
 
 import os
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="CRM Automation Tool")
     
-    parser.add_argument("--account-name", required=True, help="Nome da conta a automatizar")
+    # Not required with --replay: the recording names the account
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--account-name", help="Nome da conta a automatizar")
+    target.add_argument("--accounts-file", help="Arquivo com um nome de conta por linha (modo lote, um único login)")
     parser.add_argument("--email", help="Email para login (opcional, pode vir do .env)")
     parser.add_argument("--dry-run", action="store_true", help="Simula ações sem executar mudanças")
     parser.add_argument("--headful", action="store_true", help="Roda com navegador visível")
+    parser.add_argument("--no-block-resources", action="store_true",
+                        help="Não bloqueia imagens/fontes/mídia nem domínios de terceiros")
     parser.add_argument("--screenshot-dir", default="screenshots", help="Diretório para salvar screenshots de falha")
     
     # New Auth Arguments
@@ -25,84 +34,139 @@ def parse_args():
                         help="Passo da automação: 'init-auth' (pede código), 'complete-auth' (envia código), 'full' (interativo)")
     parser.add_argument("--code", help="Código 2FA (obrigatório para --step complete-auth)")
     parser.add_argument("--auth-file", default="auth_state.json", help="Arquivo para salvar/ler sessão de login")
+    parser.add_argument("--no-session-cache", action="store_true",
+                        help="Ignora a sessão autenticada em cache e sempre faz o login 2FA")
+
+    # Batch Arguments
+    parser.add_argument("--concurrency", type=int, default=Config.BATCH_CONCURRENCY,
+                        help="Contas processadas em paralelo no modo lote")
+    parser.add_argument("--report-file", help="Salva o relatório JSON do lote neste arquivo")
+    parser.add_argument("--panel-parallelism", type=int, default=Config.PANEL_PARALLELISM,
+                        help="Painéis criados ao mesmo tempo, cada um em um contexto clonado da sessão")
+    parser.add_argument("--template", default=Config.ONBOARDING_TEMPLATE,
+                        help="Template JSON/YAML com painéis, fases e tags a criar (só o que faltar é criado)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Ignora o checkpoint de uma execução anterior que falhou e recomeça do início")
+    parser.add_argument("--step-parallelism", type=int, default=Config.STEP_PARALLELISM,
+                        help="Etapas independentes (painéis e tags) executadas ao mesmo tempo")
+    parser.add_argument("--profile", nargs="?", const="profile.folded", metavar="ARQUIVO",
+                        help="Mede cada chamada do Playwright por método dos page objects, mostra o relatório "
+                             "no log e salva as pilhas para flame graph (padrão: profile.folded)")
+    parser.add_argument("--record", nargs="?", const="", metavar="DIRETORIO",
+                        help="Grava o tráfego (HAR) e o DOM após cada etapa em um arquivo de gravação "
+                             "(padrão: recordings/<data>-<conta>)")
+    parser.add_argument("--replay", metavar="DIRETORIO",
+                        help="Repete uma gravação sem rede: as respostas vêm do HAR gravado")
     
-    return parser.parse_args()
+    args = parser.parse_args(argv)
+    if not (args.account_name or args.accounts_file or args.replay):
+        parser.error("one of the arguments --account-name --accounts-file is required")
+    if (args.record is not None or args.replay) and args.accounts_file:
+        parser.error("--record/--replay work with a single --account-name")
+    if args.record is not None and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+    return args
+
+def run_automation(args, replay: RecordingArchive = None):
+    if args.replay and replay is None:
+        return run_replay(args)
 
-def run_automation(args):
     email = Config.get_email(args.email)
     if not email:
         logger.error("Email not provided via CLI or .env")
         sys.exit(1)
 
+    recording = None
+    if args.record is not None:
+        try:
+            recording = RecordingArchive.create(args.record or None, args.account_name, email=email, step=args.step,
+                                                template=args.template, dry_run=args.dry_run)
+        except (RecordingError, OSError) as e:
+            logger.error(f"Cannot record: {e}")
+            sys.exit(1)
+    if recording or replay:
+        # One context, one page, every step: the recording covers the whole run and
+        # replay sends the same requests in the same order
+        args.no_session_cache = args.no_resume = True
+        args.panel_parallelism = args.step_parallelism = 1
+
     headless = not args.headful
-    
-    logger.info(f"Starting automation for account: {args.account_name}")
+
+    account_names = read_accounts_file(args.accounts_file) if args.accounts_file else None
+    if account_names is not None:
+        if not account_names:
+            logger.error(f"No account names found in '{args.accounts_file}'")
+            sys.exit(1)
+        logger.info(f"Starting batch automation for {len(account_names)} account(s)")
+    else:
+        logger.info(f"Starting automation for account: {args.account_name}")
     logger.info(f"Mode: {'DRY-RUN' if args.dry_run else 'LIVE'} | Step: {args.step}")
     
-    with sync_playwright() as p:
+    # Recorded runs take the UI path their replay will take (see ui_engines)
+    with sync_playwright() as p, (ui_engines() if recording else nullcontext()):
         # Determine storage state to load
         storage_state_path = args.auth_file if args.step == 'complete-auth' and os.path.exists(args.auth_file) else None
+        if replay:
+            storage_state_path = None
         
-        if args.step == 'complete-auth' and not storage_state_path:
+        if args.step == 'complete-auth' and not storage_state_path and not replay:
              logger.warning(f"Auth file '{args.auth_file}' not found. Starting fresh session (login might fail if not saved).")
 
         browser = p.chromium.launch(headless=headless, slow_mo=500 if args.headful else 0)
-        
-        # Create context with storage state if available
-        context = browser.new_context(storage_state=storage_state_path)
-        page = context.new_page()
+
+        # Reuse a cached post-login session when the CRM still accepts it
+        session_cache = None if args.no_session_cache or args.dry_run else SessionCache()
+        cached_state = session_cache.get(email) if session_cache else None
+        authenticated = False
+        if cached_state:
+            context = new_context(browser, storage_state=cached_state, block_resources=False if args.no_block_resources else None)
+            page = context.new_page()
+            authenticated = LoginPage(page).is_session_valid()
+            if not authenticated:
+                session_cache.invalidate(email)
+                context.close()
+
+        if not authenticated:
+            # Create context with storage state if available
+            context = new_context(browser, storage_state=storage_state_path, block_resources=False if args.no_block_resources else None,
+                                  **(recording.context_options() if recording else {}))
+            if replay:
+                HarReplay(replay.har_path).install(context)
+            page = context.new_page()
         
         # Instantiate Pages
         login_page = LoginPage(page, dry_run=args.dry_run)
-        admin_page = AdminPage(page, dry_run=args.dry_run)
-        panels_page = PanelsPage(page, dry_run=args.dry_run)
-        contacts_page = ContactsPage(page, dry_run=args.dry_run)
+        # Recording: the DOM is saved after login and after each onboarding step
+        progress = recording.progress(page) if recording else None
+        status = "failed"
         
         try:
             # 1. Login Logic
-            if not args.dry_run:
-                # If restoring session, we might be already logged in or need to go to login page to enter code
-                # The requirement says: "Reabre o site já na tela de verificação 2FA"
-                # so we go to the login URL.
-                page.goto(Config.URL_LOGIN if hasattr(Config, 'URL_LOGIN') else "https://crm.infinitegear.app/login")
-            
-            if args.step == 'init-auth':
-                # Part 1: Init Login -> Wait for Code -> Save State -> Exit
-                login_page.initiate_login(email)
-                
-                # Save state
-                context.storage_state(path=args.auth_file)
-                logger.info(f"Session state saved to '{args.auth_file}'. Waiting for 2FA code...")
-                return # Exit successfully after part 1
-
-            elif args.step == 'complete-auth':
-                # Part 2: Submit Code -> Continue
-                if not args.code:
-                    logger.error("--code is required for complete-auth step.")
-                    sys.exit(1)
-                
-                # User Feedback: Must re-do the email entry to get to the code screen
-                # effectively restoring the UI state
-                login_page.initiate_login(email)
-                login_page.submit_otp(args.code)
-                
-            else: # 'full'
-                # Legacy interactive mode
-                login_page.login(email)
+            if authenticated:
+                logger.info("Cached session is still valid. Skipping 2FA login.")
+                if args.step == 'init-auth':
+                    logger.info("No 2FA code needed: run --step complete-auth (any --code) to continue.")
+                    return
+            else:
+                track_step(progress, "login", login, args, email, page, context, login_page)
+                if args.step == 'init-auth':
+                    status = "succeeded"
+                    return # Exit successfully after part 1
+                if session_cache:
+                    session_cache.put(email, context.storage_state())
             
-            # --- POST-LOGIN FLOW (unchanged) ---
-            
-            # 2. Access Admin / Account
-            admin_page.access_account(args.account_name)
-            
-            # 3. Create Panels
-            panels_page.go_to_panels()
-            panels_page.create_all_panels()
-            
-            # 4. Create Tags
-            contacts_page.go_to_contacts()
-            contacts_page.create_tags()
+            if account_names is not None:
+                run_batch(args, context.storage_state(), account_names, headless)
+                return
+
+            # --- POST-LOGIN FLOW (shared with the API) ---
+            with onboarding_pool(args, headless) as pool:
+                run_onboarding(page, args.account_name, dry_run=args.dry_run, progress=progress,
+                               panel_parallelism=args.panel_parallelism,
+                               step_parallelism=args.step_parallelism, template=args.template,
+                               resume=not args.no_resume, pool=pool)
             
+            status = "succeeded"
             logger.info("Automation successfully completed!")
             
         except Exception as e:
@@ -115,9 +179,104 @@ def run_automation(args):
                 logger.info(f"Screenshot saved to {screenshot_path}")
             sys.exit(1)
         finally:
+            if recording:
+                # The HAR is written when its context closes
+                context.close()
+                recording.finish(status)
+                logger.info(f"Recording saved to '{recording.path}'.")
             browser.close()
 
+def run_replay(args):
+    """run_automation against a recording (--replay): no network, the CRM answers from the HAR."""
+    try:
+        archive = RecordingArchive.open(args.replay)
+    except RecordingError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    for key, value in replayed_defaults(archive.manifest).items():
+        if not getattr(args, key, None):
+            setattr(args, key, value)
+    # Same login requests as any recorded step. The code is not recorded: a dummy one gets
+    # the recorded OTP response (requests are matched by URL when the body differs)
+    args.step = "complete-auth"
+    args.code = args.code or "000000"
+    args.template = archive.file("template") or args.template
+    logger.info(f"Replaying '{args.replay}' (recorded {archive.manifest.get('recorded_at')} "
+                f"against {archive.manifest.get('base_url')}).")
+    with archive.replay_settings():
+        return run_automation(args, replay=archive)
+
+def run_profiled(args):
+    """run_automation under the Playwright profiler (--profile or PLAYWRIGHT_PROFILE=true)."""
+    if not (args.profile or Config.PLAYWRIGHT_PROFILE):
+        return run_automation(args)
+    profiler = Profiler(args.account_name or args.accounts_file or args.replay)
+    try:
+        with profiling(profiler):
+            run_automation(args)
+    finally:
+        log_report(profiler, args.profile or "profile.folded")
+
+def login(args, email, page, context, login_page):
+    if not args.dry_run:
+        # If restoring session, we might be already logged in or need to go to login page to enter code
+        # The requirement says: "Reabre o site já na tela de verificação 2FA"
+        # so we go to the login URL.
+        page.goto(Config.URL_LOGIN)
+    
+    if args.step == 'init-auth':
+        # Part 1: Init Login -> Wait for Code -> Save State -> Exit
+        login_page.initiate_login(email)
+        
+        # Save state
+        context.storage_state(path=args.auth_file)
+        logger.info(f"Session state saved to '{args.auth_file}'. Waiting for 2FA code...")
+
+    elif args.step == 'complete-auth':
+        # Part 2: Submit Code -> Continue
+        if not args.code:
+            logger.error("--code is required for complete-auth step.")
+            sys.exit(1)
+        
+        # User Feedback: Must re-do the email entry to get to the code screen
+        # effectively restoring the UI state
+        login_page.initiate_login(email)
+        login_page.submit_otp(args.code)
+        
+    else: # 'full'
+        # Legacy interactive mode
+        login_page.login(email)
+
+def onboarding_pool(args, headless):
+    """
+    The CLI has no app pool: a private one for the contexts run_onboarding clones the
+    session into (steps and panels side by side), or nullcontext() when the run needs none.
+    """
+    size = sum(n for n in (args.step_parallelism, args.panel_parallelism) if n > 1) if not args.dry_run else 0
+    return BrowserPool(size=size, headless=headless) if size else nullcontext()
+
+def run_batch(args, storage_state, account_names, headless):
+    """Onboards every account from the logged-in storage state, in parallel browsers."""
+    concurrency = max(1, min(args.concurrency, len(account_names)))
+    with BrowserPool(size=concurrency, headless=headless) as pool:
+        results = onboard_accounts(pool, storage_state, account_names,
+                                   concurrency=concurrency, dry_run=args.dry_run, template=args.template,
+                                   resume=not args.no_resume)
+
+    for result in results:
+        suffix = f" - {result['error']}" if result["error"] else ""
+        logger.info(f"[{result['status'].upper()}] {result['account_name']} ({result['duration']}s){suffix}")
+
+    if args.report_file:
+        with open(args.report_file, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        logger.info(f"Batch report saved to '{args.report_file}'")
+
+    if any(r["status"] != "succeeded" for r in results):
+        sys.exit(1)
+    logger.info("Batch automation successfully completed!")
+
 if __name__ == "__main__":
     args = parse_args()
     setup_logger(level=logging.INFO)
-    run_automation(args)
+    run_profiled(args)
@@ -0,0 +1,3 @@
+from crm_automation.mock_crm.server import MockCRMServer, MockCRMState
+
+__all__ = ["MockCRMServer", "MockCRMState"]
@@ -0,0 +1,33 @@
+import argparse
+import logging
+
+from crm_automation.config import Config
+from crm_automation.core.logger import setup_logger
+from crm_automation.mock_crm.server import MockCRMServer
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="CRM mock local para execuções offline e benchmarks")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço do servidor")
+    parser.add_argument("--port", type=int, default=8765, help="Porta do servidor")
+    parser.add_argument("--latency-ms", type=int, default=Config.MOCK_CRM_LATENCY_MS,
+                        help="Atraso de cada resposta da API, em ms")
+    parser.add_argument("--ui-delay-ms", type=int, default=Config.MOCK_CRM_UI_DELAY_MS,
+                        help="Atraso de abertura de modais, popovers e seletores, em ms")
+    parser.add_argument("--otp", default=Config.MOCK_CRM_OTP or None,
+                        help="Único código 2FA aceito (padrão: qualquer código de 6 dígitos)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    setup_logger(level=logging.INFO)
+    server = MockCRMServer(args.host, args.port, latency_ms=args.latency_ms,
+                           ui_delay_ms=args.ui_delay_ms, otp_code=args.otp)
+    print(f"Rode a automação com BASE_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
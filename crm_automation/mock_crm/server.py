@@ -0,0 +1,315 @@
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from crm_automation.config import Config
+from crm_automation.core.logger import logger
+from crm_automation.core.templates import normalize_name
+
+# Local stand-in for the CRM: serves a small single-page app (app.html) with the same
+# selectors, modals and XHR shapes the page objects rely on, backed by an in-memory store.
+
+APP_HTML = os.path.join(os.path.dirname(__file__), "app.html")
+
+# Pages that need a logged-in session (the others redirect to /login)
+APP_ROUTES = ("/dashboard", "/admin/company/partner", "/panels", "/contacts")
+STAGE_TYPE_CODES = {"Fase inicial": "INITIAL", "Fase intermediária": "INTERMEDIATE", "Fase final": "FINAL"}
+
+DEFAULT_PARTNERS = ("Clínica Exemplo", "Clínica Sorriso", "Consultório Vida", "Odonto Center")
+DEFAULT_USERS = ("Dr. Daniel Dorta - SuperAdmin", "Ana Souza - Atendimento", "Bruno Lima - Comercial")
+DEFAULT_CONTACTS = (("Maria Oliveira", "+55 11 90000-0001"), ("João Santos", "+55 11 90000-0002"),
+                    ("Carla Mendes", "+55 11 90000-0003"))
+
+
+class MockCRMState:
+    """In-memory data of the mock CRM: partners (accounts), sessions and per-account panels/tags."""
+
+    def __init__(self, partners=DEFAULT_PARTNERS, users=DEFAULT_USERS, otp_code: str = None):
+        self.lock = threading.Lock()
+        self.otp_code = otp_code
+        self.partners = [{"id": i + 1, "name": name} for i, name in enumerate(partners)]
+        self.users = list(users)
+        self.pending_logins: Dict[str, str] = {}
+        self.sessions: Dict[str, str] = {}
+        self.companies: Dict[int, Dict[str, Any]] = {}
+        # Requests served, by "METHOD /path", so benchmarks can count round trips
+        self.calls = Counter()
+        self._ids = 0
+
+    def next_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    def company(self, company_id: int) -> Dict[str, Any]:
+        if company_id not in self.companies:
+            self.companies[company_id] = {
+                "panels": [],
+                "tags": [],
+                "contacts": [{"id": self.next_id(), "name": name, "phone": phone, "tag_ids": []}
+                             for name, phone in DEFAULT_CONTACTS],
+            }
+        return self.companies[company_id]
+
+    def partner(self, name: str) -> Optional[Dict[str, Any]]:
+        return next((p for p in self.partners if normalize_name(p["name"]) == normalize_name(name)), None)
+
+    def panels(self, partner_name: str) -> List[Dict[str, Any]]:
+        """Panels created for an account (for tests and benchmarks)."""
+        with self.lock:
+            return list(self.company(self.partner(partner_name)["id"])["panels"])
+
+    def tags(self, partner_name: str) -> List[str]:
+        """Tag names of an account (for tests and benchmarks)."""
+        with self.lock:
+            return [tag["name"] for tag in self.company(self.partner(partner_name)["id"])["tags"]]
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MockCRM/1.0"
+    # Set on the subclass built by MockCRMServer
+    state: MockCRMState = None
+    latency = 0.0
+    ui_delay_ms = 0
+
+    def log_message(self, fmt, *args):
+        logger.debug("Mock CRM: " + fmt % args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    # --- Plumbing --------------------------------------------------------------
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        if not url.path.startswith("/api/"):
+            return self._page(url.path)
+
+        if self.latency:
+            time.sleep(self.latency)
+        route = re.sub(r"/\d+(?=/|$)", "/{id}", url.path)
+        with self.state.lock:
+            self.state.calls[f"{method} {route}"] += 1
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"null") if length else None
+            status, data, cookies = self._api(method, url.path, parse_qs(url.query), body)
+        except ApiError as e:
+            status, data, cookies = e.status, {"error": str(e)}, {}
+        except ValueError:
+            status, data, cookies = 400, {"error": "Invalid JSON body."}, {}
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json", cookies)
+
+    def _send(self, status: int, payload: bytes, content_type: str, cookies: Dict[str, str] = None,
+              headers: Dict[str, str] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-store")
+        for name, value in (cookies or {}).items():
+            self.send_header("Set-Cookie", f"{name}={value}; Path=/; SameSite=Lax")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _cookies(self) -> Dict[str, str]:
+        cookie = SimpleCookie(self.headers.get("Cookie") or "")
+        return {name: morsel.value for name, morsel in cookie.items()}
+
+    def _session(self) -> Optional[str]:
+        auth = self.headers.get("Authorization") or ""
+        token = auth[7:] if auth.startswith("Bearer ") else self._cookies().get("crm_session")
+        return token if token in self.state.sessions else None
+
+    def _company(self) -> Dict[str, Any]:
+        raw = self.headers.get("X-Company-Id") or self._cookies().get("crm_company")
+        if not raw or not raw.isdigit():
+            raise ApiError(400, "No account selected.")
+        return self.state.company(int(raw))
+
+    def _page(self, path: str):
+        path = path.rstrip("/") or "/"
+        logged_in = self._session() is not None
+        if path == "/":
+            return self._send(302, b"", "text/html", headers={"Location": "/dashboard" if logged_in else "/login"})
+        if path != "/login" and path not in APP_ROUTES:
+            return self._send(404, b"Not found", "text/plain")
+        if path != "/login" and not logged_in:
+            return self._send(302, b"", "text/html", headers={"Location": "/login"})
+        with open(APP_HTML, encoding="utf-8") as f:
+            html = f.read().replace("__UI_DELAY_MS__", str(int(self.ui_delay_ms)))
+        self._send(200, html.encode("utf-8"), "text/html")
+
+    # --- API -------------------------------------------------------------------
+
+    def _api(self, method: str, path: str, query: Dict[str, List[str]], body: Any):
+        state = self.state
+        if (method, path) == ("POST", "/api/auth/login"):
+            email = str((body or {}).get("email") or "").strip()
+            if "@" not in email:
+                raise ApiError(400, "Invalid email.")
+            with state.lock:
+                state.pending_logins[email.lower()] = state.otp_code or ""
+            logger.info(f"Mock CRM: 2FA code requested for {email} ({state.otp_code or 'any 6 digits'}).")
+            return 200, {"sent": True}, {}
+
+        if (method, path) == ("POST", "/api/auth/verify"):
+            email = str((body or {}).get("email") or "").strip().lower()
+            code = str((body or {}).get("code") or "")
+            with state.lock:
+                expected = state.pending_logins.get(email)
+                if expected is None or not re.fullmatch(r"\d{6}", code) or (expected and code != expected):
+                    raise ApiError(401, "Código inválido.")
+                del state.pending_logins[email]
+                token = secrets.token_hex(16)
+                state.sessions[token] = email
+            return 200, {"token": token}, {"crm_session": token}
+
+        if self._session() is None:
+            raise ApiError(401, "Not authenticated.")
+
+        if (method, path) == ("GET", "/api/partners"):
+            search = normalize_name((query.get("search") or [""])[0])
+            partners = [p for p in state.partners if search in normalize_name(p["name"])]
+            # Exact match first, as the real search ranks it
+            partners.sort(key=lambda p: normalize_name(p["name"]) != search)
+            return 200, {"data": partners}, {}
+
+        match = re.fullmatch(r"/api/partners/(\d+)/(users|access)", path)
+        if match:
+            partner = next((p for p in state.partners if p["id"] == int(match.group(1))), None)
+            if partner is None:
+                raise ApiError(404, "Partner not found.")
+            if match.group(2) == "users" and method == "GET":
+                return 200, {"data": [{"name": name} for name in state.users]}, {}
+            if match.group(2) == "access" and method == "POST":
+                if (body or {}).get("user") not in state.users:
+                    raise ApiError(400, "Unknown user.")
+                with state.lock:
+                    state.company(partner["id"])
+                return 200, {"company_id": partner["id"]}, {"crm_company": str(partner["id"])}
+
+        with state.lock:
+            company = self._company()
+            if (method, path) == ("GET", "/api/panels"):
+                return 200, {"data": company["panels"]}, {}
+            if (method, path) == ("POST", "/api/panels"):
+                return 201, {"data": self._create_panel(company, body or {})}, {}
+            if (method, path) == ("GET", "/api/contacts"):
+                return 200, {"data": company["contacts"]}, {}
+            if (method, path) == ("GET", "/api/tags"):
+                return 200, {"data": company["tags"]}, {}
+            if (method, path) == ("POST", "/api/tags"):
+                return 201, {"data": self._create_tag(company, body or {})}, {}
+            match = re.fullmatch(r"/api/contacts/(\d+)/tags", path)
+            if match and method == "PUT":
+                contact = next((c for c in company["contacts"] if c["id"] == int(match.group(1))), None)
+                if contact is None:
+                    raise ApiError(404, "Contact not found.")
+                known = {tag["id"] for tag in company["tags"]}
+                contact["tag_ids"] = [i for i in (body or {}).get("tag_ids") or [] if i in known]
+                return 200, {"data": contact}, {}
+        raise ApiError(404, f"No route for {method} {path}.")
+
+    def _create_panel(self, company: Dict[str, Any], body: Dict[str, Any]) -> Dict[str, Any]:
+        name = str(body.get("name") or "").strip()
+        if not name:
+            raise ApiError(400, "Título é obrigatório.")
+        stages = body.get("stages") or []
+        if not stages or any(not str(s.get("name") or "").strip() or s.get("type") not in STAGE_TYPE_CODES.values()
+                             for s in stages):
+            raise ApiError(400, "Cada fase precisa de nome e tipo.")
+        panel = {
+            "id": self.state.next_id(),
+            "name": name,
+            "description": str(body.get("description") or ""),
+            "visibility": body.get("visibility"),
+            "stages": [{"id": self.state.next_id(), "name": s["name"], "type": s["type"],
+                        "position": s.get("position")} for s in stages],
+        }
+        company["panels"].append(panel)
+        return panel
+
+    def _create_tag(self, company: Dict[str, Any], body: Dict[str, Any]) -> Dict[str, Any]:
+        name = str(body.get("name") or "").strip()
+        if not name:
+            raise ApiError(400, "Nome da etiqueta é obrigatório.")
+        if any(normalize_name(tag["name"]) == normalize_name(name) for tag in company["tags"]):
+            raise ApiError(409, f"Etiqueta '{name}' já existe.")
+        tag = {"id": self.state.next_id(), "name": name, "color": body.get("color") or "#607d8b"}
+        company["tags"].append(tag)
+        return tag
+
+
+class MockCRMServer:
+    """
+    Local mock of the CRM for offline end-to-end runs and benchmarks.
+    `latency_ms` delays every API response, `ui_delay_ms` delays dialogs, popovers and
+    select overlays (their opening animation). `otp_code` is the only 2FA code accepted
+    (None accepts any 6 digits). Point the automation at it with Config.use_base_url(server.url)
+    or BASE_URL=<url>.
+
+        with MockCRMServer(latency_ms=100) as crm:
+            Config.use_base_url(crm.url)
+            ...
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: int = None,
+                 ui_delay_ms: int = None, otp_code: str = None, state: MockCRMState = None):
+        self.state = state or MockCRMState(otp_code=otp_code if otp_code is not None else Config.MOCK_CRM_OTP or None)
+        handler = type("MockCRMHandler", (_Handler,), {
+            "state": self.state,
+            "latency": (latency_ms if latency_ms is not None else Config.MOCK_CRM_LATENCY_MS) / 1000,
+            "ui_delay_ms": ui_delay_ms if ui_delay_ms is not None else Config.MOCK_CRM_UI_DELAY_MS,
+        })
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockCRMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-crm", daemon=True)
+        self._thread.start()
+        logger.info(f"Mock CRM listening on {self.url}")
+        return self
+
+    def serve_forever(self):
+        logger.info(f"Mock CRM listening on {self.url}")
+        self.httpd.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -1,27 +1,24 @@
 from crm_automation.pages.base_page import BasePage
 from crm_automation.selectors import Selectors
 from crm_automation.core.logger import logger
+from crm_automation.config import Config
 
 class AdminPage(BasePage):
     def access_account(self, account_name: str):
         # 4. Navigate to Partner URL
         if not self.dry_run:
-            self.page.goto("https://crm.infinitegear.app/admin/company/partner")
+            self.page.goto(Config.URL_PARTNER)
         logger.info("Navigated to Admin Partner Page")
 
         # 5. Search Account
-        # Use type behavior to ensure Angular inputs trigger change detection
-        self.click(Selectors.ADMIN_SEARCH_INPUT, "Search Input")
+        # Verified input strategy (fires the input events Angular's change detection needs)
+        self.fill(Selectors.ADMIN_SEARCH_INPUT, account_name, "Search Input")
         if not self.dry_run:
-            self.page.type(Selectors.ADMIN_SEARCH_INPUT, account_name, delay=100)
             self.page.keyboard.press("Enter")
-            logger.info(f"Typed '{account_name}' into search and pressed Enter")
+            logger.info(f"Searched '{account_name}' and pressed Enter")
         
-        # Wait for results to filter - expect "1 conta encontrada" or at least checks
-        if not self.dry_run:
-            self.page.wait_for_timeout(2000) # Initial wait for xhr
-            # Ideally wait for the count to change or spinner to stop
-            # We can also wait for the specific account name to appear in the list header or body if not there before
+        # Wait for results to filter (search XHR + list re-render)
+        self.wait_for_idle()
         
         # Click "Acessar" button directly
         self.click('text="Acessar"', "Access Button")
@@ -35,13 +32,12 @@ class AdminPage(BasePage):
             # This avoids issues with strict role attributes or background elements
             modal_search_selector = 'input:near(:text("Selecione com qual usuário deseja acessar:"))'
             
-            # Type the specific profile name
-            self.click(modal_search_selector, "Modal Search Input")
+            # Enter the specific profile name
             profile_name = "Dr. Daniel Dorta - SuperAdmin" 
-            self.page.type(modal_search_selector, profile_name, delay=50)
+            self.fill(modal_search_selector, profile_name, "Modal Search Input")
             self.page.keyboard.press("Enter")
             
-            self.page.wait_for_timeout(1000) # Wait for local filter
+            self.wait_for_idle() # Wait for local filter
             
             # Click the "Acessar" button specifically for the SuperAdmin user
             # Using :right-of or :near to ensure we click the button associated with the text
@@ -49,8 +45,7 @@ class AdminPage(BasePage):
             
             self.click(access_btn_selector, "Confirm Access Button")
 
-        # Wait for dashboard switch (URL change or element)
-        if not self.dry_run:
-             self.page.wait_for_timeout(5000)
+        # Wait for dashboard switch (account token exchange + reload)
+        self.wait_for_idle(timeout=15000)
              
         logger.info(f"Accessing account '{account_name}' initiated.")
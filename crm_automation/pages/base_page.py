@@ -1,31 +1,47 @@
+from typing import Dict, Optional
 from playwright.sync_api import Page, Locator, TimeoutError as PlaywrightTimeoutError
 from crm_automation.core.logger import logger
 from crm_automation.core.exceptions import ElementNotFoundError, ActionFailedError
+from crm_automation.core import metrics
+from crm_automation.core.input_strategies import enter_text
+from crm_automation.core.instrumentation import instrument
+from crm_automation.core.locator_race import UNKNOWN_VERSION, app_version, race
+from crm_automation.core.retry import retry_call
+from crm_automation.core.stability import PENDING_REQUESTS_TRACKER, WAIT_FOR_IDLE
+from crm_automation.config import Config
 
 class BasePage:
     def __init__(self, page: Page, dry_run: bool = False):
-        self.page = page
+        # Timed proxy when a profiler is active (see core/instrumentation.py)
+        self.page = instrument(page)
         self.dry_run = dry_run
+        self._app_version = UNKNOWN_VERSION
 
     def navigate(self, url: str):
         logger.info(f"Navigating to {url}")
         if not self.dry_run:
             try:
-                self.page.goto(url)
+                with metrics.time_action("navigate", url):
+                    self.page.goto(url)
             except Exception as e:
                 raise ActionFailedError(f"Failed to navigate to {url}: {e}")
 
     def click(self, selector: str, description: str = "element"):
         logger.info(f"Clicking {description} ({selector})")
         if not self.dry_run:
-            try:
+            retry_call(self._click, selector, description, description=f"Click {description}",
+                       recover=self.dismiss_overlays)
+
+    def _click(self, selector: str, description: str):
+        try:
+            with metrics.time_action("click", selector):
                 self.page.click(selector)
-            except PlaywrightTimeoutError:
-                raise ElementNotFoundError(f"Element not found for click: {selector}")
-            except Exception as e:
-                raise ActionFailedError(f"Failed to click {description}: {e}")
+        except PlaywrightTimeoutError:
+            raise ElementNotFoundError(f"Element not found for click: {selector}")
+        except Exception as e:
+            raise ActionFailedError(f"Failed to click {description}: {e}")
 
-    def fill(self, selector: str, value: str, description: str = "field"):
+    def fill(self, selector: str, value: str, description: str = "field", boxes: bool = False):
         if "password" in description.lower() or "código" in description.lower():
             safe_value = "***"
         else:
@@ -33,12 +49,32 @@ class BasePage:
             
         logger.info(f"Filling {description} with '{safe_value}'")
         if not self.dry_run:
-            try:
-                self.page.fill(selector, value)
-            except PlaywrightTimeoutError:
-                raise ElementNotFoundError(f"Element not found for fill: {selector}")
-            except Exception as e:
-                raise ActionFailedError(f"Failed to fill {description}: {e}")
+            retry_call(self._fill, selector, value, description, boxes, description=f"Fill {description}",
+                       recover=self.dismiss_overlays)
+
+    def _fill(self, selector: str, value: str, description: str, boxes: bool = False):
+        try:
+            self.enter_text(selector, value, boxes=boxes)
+        except PlaywrightTimeoutError:
+            raise ElementNotFoundError(f"Element not found for fill: {selector}")
+        except ActionFailedError:
+            raise
+        except Exception as e:
+            raise ActionFailedError(f"Failed to fill {description}: {e}")
+
+    def enter_text(self, target, value: str, key: str = None, boxes: bool = False) -> Optional[str]:
+        """
+        Sets a text field (selector or Locator, first match only; with `boxes` every match,
+        for a multi-box field such as the OTP) with the fastest input strategy known to work
+        for it, verified once (core/input_strategies.py). Locators need a stable `key` for
+        the strategy cache. Returns the strategy used.
+        """
+        if self.dry_run:
+            return None
+        key = key or target
+        locator = self.page.locator(target) if isinstance(target, str) else target
+        with metrics.time_action("fill", key):
+            return enter_text(self.page, locator, value, key, boxes=boxes)
 
     def exists(self, selector: str, timeout: int = 5000) -> bool:
         """Checks if element exists. Always checks for real, even in dry-run, if possible, 
@@ -53,6 +89,95 @@ class BasePage:
         except:
             return False
 
+    def first_visible(self, element: str, candidates: Dict[str, str], timeout: int = 5000) -> Optional[str]:
+        """
+        Races the candidate selectors ({name: selector}) of an element, or of the screens
+        the page may be on, and returns the name of the first one visible (None after
+        `timeout` ms). The winner is remembered per page object and CRM version
+        (core/locator_race.py). Checks for real, even in dry-run, like exists().
+        """
+        if self._app_version == UNKNOWN_VERSION:
+            self._app_version = app_version(self.page)
+        winner = race(self.page, f"{type(self).__name__}.{element}", candidates, timeout, version=self._app_version)
+        logger.debug(f"{element}: {winner or 'none'} of {', '.join(candidates)}")
+        return winner
+
+    def wait_for_idle(self, timeout: int = None, quiet_ms: int = None) -> bool:
+        """
+        Waits until the app is actually idle instead of sleeping a fixed time:
+        Angular testabilities stable, no pending XHR/fetch and no DOM mutation
+        for `quiet_ms`. Never waits longer than `timeout` (ms). Returns True if idle.
+        """
+        if self.dry_run:
+            return True
+
+        args = {
+            "timeout": timeout if timeout is not None else Config.IDLE_TIMEOUT,
+            "quietMs": quiet_ms if quiet_ms is not None else Config.IDLE_QUIET_MS,
+            "tracker": PENDING_REQUESTS_TRACKER,
+        }
+        for attempt in range(2):
+            try:
+                result = self.page.evaluate(WAIT_FOR_IDLE, args)
+                break
+            except Exception as e:
+                # A navigation destroys the execution context mid-wait: wait for the new document
+                logger.debug(f"Idle wait interrupted ({e}). Retrying after load.")
+                try:
+                    self.page.wait_for_load_state("domcontentloaded")
+                except Exception:
+                    pass
+        else:
+            return False
+
+        if not result["idle"]:
+            logger.debug(f"Idle wait hit ceiling after {result['waited']}ms ({result['pending']} pending requests).")
+        return result["idle"]
+
+    def dismiss_overlays(self, error: Exception = None):
+        """
+        Recovery before retrying a single action: closes a leftover mat-select/menu overlay
+        (not dialogs, the action may target one) and lets the app settle.
+        """
+        if self.dry_run:
+            return
+        if self.page.locator(".cdk-overlay-pane mat-option, .cdk-overlay-pane .mat-mdc-menu-panel").count():
+            self.page.keyboard.press("Escape")
+        self.wait_for_idle(timeout=2000)
+
+    def close_dialogs(self, error: Exception = None, max_dialogs: int = 3):
+        """
+        Recovery before retrying a modal flow: closes every open mat-dialog-container,
+        discarding unsaved input (Escape first, then the dialog's cancel/close button).
+        """
+        if self.dry_run:
+            return
+        dialogs = self.page.locator("mat-dialog-container")
+        for _ in range(max_dialogs):
+            if dialogs.count() == 0:
+                break
+            logger.info("Closing leftover dialog before retrying...")
+            self.page.keyboard.press("Escape")
+            try:
+                dialogs.last.wait_for(state="detached", timeout=2000)
+                continue
+            except PlaywrightTimeoutError:
+                pass
+            close_btn = dialogs.last.locator(
+                'button:has-text("Cancelar"), button:has(mat-icon[data-mat-icon-name="x"]), [mat-dialog-close]'
+            ).first
+            if close_btn.count():
+                close_btn.click(force=True)
+                try:
+                    dialogs.last.wait_for(state="detached", timeout=2000)
+                except PlaywrightTimeoutError:
+                    pass
+        self.dismiss_overlays()
+
+    def recover(self, error: Exception = None):
+        """Recovery before retrying a whole step: no dialogs or overlays left, app idle."""
+        self.close_dialogs(error)
+
     def wait_for_url(self, url_snippet: str):
         logger.info(f"Waiting for URL to contain: {url_snippet}")
         if not self.dry_run:
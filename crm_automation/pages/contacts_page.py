@@ -1,19 +1,96 @@
 from crm_automation.pages.base_page import BasePage
 from crm_automation.selectors import Selectors
 from crm_automation.core.logger import logger
+from crm_automation.core.backend import TagsBackend
+from crm_automation.core import metrics
+from crm_automation.core.checkpoints import AccountCheckpoint
+from crm_automation.core.exceptions import ActionFailedError
+from crm_automation.core.retry import mark_exhausted, retry_call
+from crm_automation.core.templates import OnboardingTemplate, load_template
+from crm_automation.config import Config
 
 class ContactsPage(BasePage):
+    def __init__(self, page, dry_run: bool = False, engine: str = None):
+        super().__init__(page, dry_run)
+        # "auto": backend API once learned, UI otherwise | "api": no UI fallback | "ui": UI only
+        self.engine = engine or Config.TAGS_ENGINE
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None and self.engine != "ui" and not self.dry_run:
+            self._backend = TagsBackend(self.page)
+        return self._backend
+
     def go_to_contacts(self):
-        self.navigate(Selectors.CONTACTS_URL)
+        # Start capturing XHRs before the app loads so the session auth headers are seen
+        _ = self.backend
+        self.navigate(Config.URL_CONTACTS)
 
-    def create_tags(self):
+    def create_tags(self, template: OnboardingTemplate = None, checkpoint: AccountCheckpoint = None):
         """
-        Creates tags (labels) for a contact.
+        Creates the template tags (labels) the account does not have yet: through the backend
+        API when learned, otherwise through a contact's tag editor.
+        Tags recorded in `checkpoint` by a previous run are not checked again.
+        Raises ActionFailedError when a tag is still missing afterwards (e.g. the account
+        has no contact whose tag editor could be opened).
         """
         logger.info("--- Creating Tags ---")
-        
+
+        tags_to_add = (template or load_template()).tags
+        if checkpoint is not None:
+            tags_to_add = [t for t in tags_to_add if not checkpoint.done("tag", t)]
+            if not tags_to_add:
+                logger.info("All tags were completed by a previous run.")
+                return
+
+        if self.create_tags_via_backend(tags_to_add):
+            present = tags_to_add
+        else:
+            mark = self.backend.mark() if self.backend else None
+            present = self.create_tags_ui(tags_to_add)
+
+            # Learn the endpoints from the UI flow so next runs skip it
+            if self.backend is not None and not self.backend.ready:
+                self.backend.learn(mark, tags_to_add)
+
+        if checkpoint is not None:
+            for tag_name in present:
+                checkpoint.mark("tag", tag_name)
+
+        missing = [t for t in tags_to_add if t not in present]
+        if missing and not self.dry_run:
+            # Every tag had its own retries: the step does not run them again
+            raise mark_exhausted(ActionFailedError(f"Tag(s) not created: {', '.join(missing)}"))
+        logger.info("Tags creation flow complete.")
+
+    def create_tags_via_backend(self, tags_to_add: list) -> bool:
+        """
+        Lists the existing tags and creates the missing ones with direct backend requests.
+        Returns False when the caller should use the UI flow instead.
+        """
+        backend = self.backend
+        if backend is None or not backend.ready:
+            return False
+
+        writes_before = backend.client.writes
+        try:
+            backend.create_tags(tags_to_add)
+            return True
+        except Exception as e:
+            if self.engine == "api" or backend.client.writes != writes_before:
+                raise
+            logger.warning(f"Backend tag creation failed ({e}). Falling back to UI and relearning.")
+            backend.profile.forget(TagsBackend.SECTION)
+            return False
+
+    def create_tags_ui(self, tags_to_add: list) -> list:
+        """
+        Creates tags (labels) for a contact.
+        Returns the tags the account has afterwards (already existing or saved now).
+        """
         # 1. Navigate to Contacts
-        self.navigate(Selectors.CONTACTS_URL)
+        self.navigate(Config.URL_CONTACTS)
         
         # 2. Click on the first contact
         logger.info("Accessing first contact to manage tags...")
@@ -23,33 +100,52 @@ class ContactsPage(BasePage):
             except:
                 logger.error("Contacts list did not load or is empty!")
                 self.page.screenshot(path="screenshots/error_contacts_list.png")
-                return
+                # Tags are edited on a contact: without one there is nothing to open
+                raise mark_exhausted(ActionFailedError(
+                    "No contact in this account to open the tag editor on. Create a contact and run again."))
 
         self.click(Selectors.FIRST_CONTACT_ROW, "First Contact Row")
         
         # 3. Open Tags Edit Modal/Section
         # Wait for the side panel/modal to load
-        if not self.dry_run:
-            self.page.wait_for_timeout(2000)
+        self.wait_for_idle()
 
-        # Try to find the edit tags button
-        # Selector "Editar etiquetas" might be a tooltip or aria-label
+        # Find the edit tags button: the pencil and the fallback (a button in the
+        # "Etiquetas" block) are raced; the pencil wins when both are there
+        edit_buttons = {"pencil": Selectors.TAGS_EDIT_ICON, "etiquetas_block": 'div:has-text("Etiquetas") >> button'}
+        edit_button = self.first_visible("edit_tags", edit_buttons, timeout=5000)
+        if edit_button is None and not self.dry_run:
+            logger.error("Failed to find Edit Tags button.")
+            self.page.screenshot(path="screenshots/error_edit_tags_btn.png")
+            return []
+        if edit_button == "etiquetas_block":
+            logger.warning("Edit tags button not found with primary selector. Using fallback.")
         try:
-            self.page.wait_for_selector(Selectors.TAGS_EDIT_ICON, timeout=5000)
-            self.click(Selectors.TAGS_EDIT_ICON, "Edit Tags Pencil")
-        except:
-            logger.warning("Edit tags button not found with primary selector. Trying fallback...")
-            # Fallback: look for a pencil icon near "Etiquetas"
-            try:
-                self.page.locator('div:has-text("Etiquetas")').locator('button').first.click()
-            except Exception as e:
-                logger.error(f"Failed to find Edit Tags button: {e}")
-                self.page.screenshot(path="screenshots/error_edit_tags_btn.png")
-                return
-        
-        # Define tags to add
-        tags_to_add = ["Paciente", "Lead", "Equipe"]
+            self.click(edit_buttons[edit_button or "pencil"], "Edit Tags Pencil")
+        except Exception as e:
+            logger.error(f"Failed to click Edit Tags button: {e}")
+            self.page.screenshot(path="screenshots/error_edit_tags_btn.png")
+            return []
         
+        present = []
+        if not self.dry_run:
+            # Tags the account already has are listed in the editor: apply only the difference
+            try:
+                self.page.wait_for_selector(Selectors.ADD_TAG_BTN, timeout=5000)
+            except Exception:
+                pass
+            editor = self.page.locator(Selectors.TAG_EDITOR).last
+            existing = {t for t in tags_to_add if editor.get_by_text(t, exact=True).count() > 0}
+            for tag_name in tags_to_add:
+                if tag_name in existing:
+                    logger.info(f"Tag '{tag_name}' already exists. Skipping.")
+            tags_to_add = [t for t in tags_to_add if t not in existing]
+            if not tags_to_add:
+                logger.info("All template tags already exist.")
+                self.page.keyboard.press("Escape")
+                return list(existing)
+            present = list(existing)
+
         for tag_name in tags_to_add:
             if self.dry_run:
                 logger.info(f"[DRY RUN] Would add tag: {tag_name}")
@@ -58,47 +154,17 @@ class ContactsPage(BasePage):
             logger.info(f"Processing Tag: {tag_name}")
             
             try:
-                # Ensure the Tag Editor popover is open
-                if not self.page.locator(Selectors.ADD_TAG_BTN).is_visible():
-                    logger.info("Opening Tag Editor popover...")
-                    self.click(Selectors.TAGS_EDIT_ICON, "Edit Tags Pencil")
-                    self.page.wait_for_selector(Selectors.ADD_TAG_BTN, timeout=5000)
-
-                # 4. Click "+" (Add tag button)
-                self.click(Selectors.ADD_TAG_BTN, "Add Tag Plus Button")
-                
-                # 5. Handle the "Criando nova etiqueta" Modal
-                modal_selector = 'mat-dialog-container'
-                self.page.wait_for_selector(modal_selector, state='visible', timeout=7000)
-                # Wait for any potential overlap/animation
-                self.page.wait_for_timeout(500)
-                
-                active_modal = self.page.locator(modal_selector).last
-                tag_input = active_modal.locator('input').first
-                
-                logger.info(f"Filling tag: {tag_name}")
-                tag_input.wait_for(state='visible', timeout=3000)
-                tag_input.click()
-                tag_input.fill("") # Clear existing if any
-                tag_input.fill(tag_name)
-                
-                # 6. Save INDIVIDUAL Tag (The 'Salvar' button inside the modal)
-                # Using get_by_role for better accuracy in Angular/Material apps
-                save_modal_btn = active_modal.get_by_role("button", name="Salvar", exact=True)
-                save_modal_btn.click()
-                
-                # Wait for modal to disappear (Critical: save must finish)
-                active_modal.wait_for(state='hidden', timeout=10000)
-                logger.info(f"Tag '{tag_name}' saved successfully.")
-                self.page.wait_for_timeout(300) # Short breather
-                
+                with metrics.time_step(f"tag:{tag_name}"):
+                    retry_call(self._add_tag_attempt(tag_name), description=f"Tag {tag_name}",
+                               recover=self.close_dialogs)
+                present.append(tag_name)
             except Exception as e:
                 logger.error(f"Failed to add tag '{tag_name}': {e}")
                 self.page.screenshot(path=f"screenshots/error_tag_{tag_name}.png")
                 # Try to recover
                 try: 
                     self.page.keyboard.press("Escape")
-                    self.page.wait_for_timeout(500)
+                    self.wait_for_idle()
                 except: pass
 
         # 7. Final Save (The 'Salvar etiquetas' button at the bottom of the popover)
@@ -106,7 +172,7 @@ class ContactsPage(BasePage):
         try:
             # 1. Be absolutely sure the tag creation modal is gone
             self.page.locator('mat-dialog-container').wait_for(state='detached', timeout=5000)
-            self.page.wait_for_timeout(500) # UI Settlement
+            self.wait_for_idle() # UI Settlement
 
             # 2. Find the button using the specific selector
             final_save_btn = self.page.locator(Selectors.TAG_FINAL_SAVE_BTN).last
@@ -119,11 +185,56 @@ class ContactsPage(BasePage):
             final_save_btn.evaluate("el => el.click()")
             logger.info("Final 'Salvar etiquetas' clicked successfully (JS).")
                 
-            self.page.wait_for_timeout(2000)
+            self.wait_for_idle() # Save request
             
         except Exception as e:
             logger.error(f"Failed to click final 'Salvar etiquetas': {e}")
             self.page.screenshot(path="screenshots/error_final_save_tags.png")
 
+        return present
 
-        logger.info("Tags creation flow complete.")
+    def _add_tag_attempt(self, tag_name: str):
+        """
+        One attempt at creating a tag through the "Criando nova etiqueta" modal, for retry_call.
+        A retry is skipped when the failed attempt saved the tag anyway.
+        """
+        attempted = []
+
+        def attempt():
+            if attempted and self.page.locator(Selectors.TAG_EDITOR).last.get_by_text(tag_name, exact=True).count() > 0:
+                logger.info(f"Tag '{tag_name}' was saved by the failed attempt.")
+                return
+            attempted.append(True)
+            # Ensure the Tag Editor popover is open
+            if not self.page.locator(Selectors.ADD_TAG_BTN).is_visible():
+                logger.info("Opening Tag Editor popover...")
+                self.click(Selectors.TAGS_EDIT_ICON, "Edit Tags Pencil")
+                self.page.wait_for_selector(Selectors.ADD_TAG_BTN, timeout=5000)
+
+            # 4. Click "+" (Add tag button)
+            self.click(Selectors.ADD_TAG_BTN, "Add Tag Plus Button")
+
+            # 5. Handle the "Criando nova etiqueta" Modal
+            modal_selector = 'mat-dialog-container'
+            self.page.wait_for_selector(modal_selector, state='visible', timeout=7000)
+            # Wait for any potential overlap/animation
+            self.wait_for_idle(quiet_ms=100)
+
+            active_modal = self.page.locator(modal_selector).last
+            tag_input = active_modal.locator('input').first
+
+            logger.info(f"Filling tag: {tag_name}")
+            tag_input.wait_for(state='visible', timeout=3000)
+            self.enter_text(tag_input, tag_name, key="tag modal input")
+
+            # 6. Save INDIVIDUAL Tag (The 'Salvar' button inside the modal)
+            # Using get_by_role for better accuracy in Angular/Material apps
+            save_modal_btn = active_modal.get_by_role("button", name="Salvar", exact=True)
+            save_modal_btn.click()
+
+            # Wait for modal to disappear (Critical: save must finish)
+            active_modal.wait_for(state='hidden', timeout=10000)
+            logger.info(f"Tag '{tag_name}' saved successfully.")
+            self.wait_for_idle(quiet_ms=50) # Tag list refresh
+
+        return attempt
@@ -1,7 +1,7 @@
 from crm_automation.pages.base_page import BasePage
 from crm_automation.selectors import Selectors
 from crm_automation.core.logger import logger
-import time
+from crm_automation.config import Config
 
 class LoginPage(BasePage):
     def initiate_login(self, email: str):
@@ -11,14 +11,17 @@ class LoginPage(BasePage):
         """
         logger.info(f"Initiating login for {email}...")
         
-        # 2. Click "Entrar com e-mail" if exists
-        if self.exists(Selectors.LOGIN_START_BTN, timeout=5000):
+        # 2. Click "Entrar com e-mail" if the login starts on it (raced against the e-mail
+        # form, so an absent button costs no timeout)
+        entry = self.first_visible("login_entry", {
+            "start_button": Selectors.LOGIN_START_BTN,
+            "email_input": Selectors.LOGIN_EMAIL_INPUT,
+        }, timeout=5000)
+        if entry == "start_button":
             if not self.dry_run:
                 self.page.click(Selectors.LOGIN_START_BTN, force=True) 
             logger.info("Clicking Login with Email Button (forced)")
-            
-            if not self.dry_run:
-                self.page.wait_for_timeout(1000)
+            self.wait_for_idle()
 
         # 3. Fill Email - Explicit Wait for Visibility (Critical for Slow Render/Network)
         if not self.dry_run:
@@ -30,9 +33,8 @@ class LoginPage(BasePage):
 
         self.fill(Selectors.LOGIN_EMAIL_INPUT, email, "Email Input")
         
-        # 4. Click Check/Next to send code
-        if not self.dry_run:
-            self.page.wait_for_timeout(2000)
+        # 4. Click Check/Next to send code (once the form validated the email)
+        self.wait_for_idle()
         
         if not self.dry_run:
              self.page.click(Selectors.LOGIN_SUBMIT_BTN, force=True)
@@ -55,32 +57,48 @@ class LoginPage(BasePage):
         if not code:
             raise ValueError("Verification code is required.")
 
-        # 6. Fill Code using 6 separate inputs with keyboard events
-        try:
+        # 6. Fill Code: 6 separate inputs, read back joined (the input strategy that
+        # spreads the digits over the boxes is remembered for the next logins). A code that
+        # could not be entered fails the login instead of submitting empty boxes.
+        if not self.dry_run:
             self.page.wait_for_selector(Selectors.LOGIN_CODE_INPUT, state="visible", timeout=30000)
-            inputs = self.page.query_selector_all(Selectors.LOGIN_CODE_INPUT)
-            
-            if len(inputs) >= 6 and len(code) == 6:
-                logger.info("Filling 6-digit OTP with keyboard events...")
-                for i, digit in enumerate(code):
-                    inputs[i].focus()
-                    self.page.wait_for_timeout(50)
-                    inputs[i].type(digit, delay=50)
-                    self.page.wait_for_timeout(150) 
-            else:
-                logger.warning(f"Found {len(inputs)} inputs for {len(code)} digits. Trying standard fill.")
-                self.fill(Selectors.LOGIN_CODE_INPUT, code, "Code Input")
-        except Exception as e:
-            logger.error(f"Error filling OTP: {e}")
+        self.fill(Selectors.LOGIN_CODE_INPUT, code, "Código 2FA", boxes=True)
 
-        # 7. Click Verify/Login
-        if self.exists(Selectors.LOGIN_SUBMIT_OTP_BTN, timeout=2000):
+        # 7. Click Verify/Login (both buttons raced at once)
+        submit = self.first_visible("otp_submit", {
+            "otp": Selectors.LOGIN_SUBMIT_OTP_BTN,
+            "fallback": Selectors.LOGIN_SUBMIT_BTN,
+        }, timeout=4000)
+        if submit == "otp":
             self.click(Selectors.LOGIN_SUBMIT_OTP_BTN, "Final Login Button (OTP)")
-        elif self.exists(Selectors.LOGIN_SUBMIT_BTN, timeout=2000):
+        elif submit == "fallback":
              self.click(Selectors.LOGIN_SUBMIT_BTN, "Final Login Button (Fallback)")
         
         logger.info("Login credential submission complete.")
-        time.sleep(2) 
+        self.wait_for_idle()
+
+    def is_session_valid(self, timeout: int = 15000) -> bool:
+        """
+        Check for a restored (cached) session: opens the admin partner page once and sees
+        whether the app renders it or bounces back to the login screen. A plain HTTP request
+        cannot tell: the CRM serves the same Angular shell on every route, and the app itself
+        decides, from the tokens in its storage, whether the user is logged in.
+        """
+        if self.dry_run:
+            return False
+
+        try:
+            self.page.goto(Config.URL_PARTNER, wait_until='domcontentloaded')
+            logged_in = self.page.locator(Selectors.ADMIN_SEARCH_INPUT)
+            logged_out = self.page.locator(Selectors.LOGIN_EMAIL_INPUT).or_(self.page.locator(Selectors.LOGIN_START_BTN))
+            logged_in.or_(logged_out).first.wait_for(state="visible", timeout=timeout)
+            valid = "/login" not in self.page.url and logged_in.first.is_visible()
+        except Exception as e:
+            logger.warning(f"Could not verify cached session: {e}")
+            return False
+
+        logger.info(f"Cached session is {'valid' if valid else 'expired'}.")
+        return valid
 
     def login(self, email: str):
         """
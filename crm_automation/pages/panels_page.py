@@ -1,10 +1,63 @@
+import time
+
 from crm_automation.pages.base_page import BasePage
 from crm_automation.selectors import Selectors
 from crm_automation.core.logger import logger
+from crm_automation.core.backend import PanelsBackend
+from crm_automation.core.browser_pool import snapshot_session
+from crm_automation.core.exceptions import ActionFailedError
+from crm_automation.core.instrumentation import current_profiler, profiling
+from crm_automation.core.retry import mark_exhausted, retry_call
+from crm_automation.core.stage_editor import CLEAR_STAGES, WRITE_STAGES, stage_mismatches
+from crm_automation.core import metrics
+from crm_automation.core.checkpoints import AccountCheckpoint
+from crm_automation.core.templates import OnboardingTemplate, load_template, normalize_name
+from crm_automation.config import Config
+
+
+def _panel_result(panel: dict, duration: float, error: str = None, status: str = None) -> dict:
+    if status is None:
+        metrics.observe_step(f"panel:{panel['name']}", duration, "failed" if error else "succeeded")
+    return {
+        "name": panel["name"],
+        "status": status or ("failed" if error else "succeeded"),
+        "error": error,
+        "duration": round(duration, 2),
+    }
+
+
+def _check_panel_report(report: list) -> list:
+    """Logs every panel's result. Raises ActionFailedError listing the failed ones, else returns `report`."""
+    for result in report:
+        suffix = f" - {result['error']}" if result["error"] else ""
+        logger.info(f"[{result['status'].upper()}] Panel {result['name']} ({result['duration']}s){suffix}")
+
+    failed = [r["name"] for r in report if r["status"] != "succeeded"]
+    if failed:
+        # Every panel had its own retries: the step does not run them again
+        raise mark_exhausted(ActionFailedError(f"Failed to create panel(s): {', '.join(failed)}"))
+    return report
+
 
 class PanelsPage(BasePage):
+    def __init__(self, page, dry_run: bool = False, engine: str = None):
+        super().__init__(page, dry_run)
+        # "auto": backend API once learned, UI otherwise | "api": no UI fallback | "ui": UI only
+        self.engine = engine or Config.PANELS_ENGINE
+        # "bulk": stages written by one in-page script | "ui": one action at a time
+        self.stage_editor = Config.STAGE_EDITOR
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None and self.engine != "ui" and not self.dry_run:
+            self._backend = PanelsBackend(self.page)
+        return self._backend
+
     def go_to_panels(self):
-        self.navigate(Selectors.PANELS_URL)
+        # Start capturing XHRs before the app loads so the session auth headers are seen
+        _ = self.backend
+        self.navigate(Config.URL_PANELS)
 
     def create_panel(self, name: str, description: str, stages_data: list):
         """
@@ -35,21 +88,9 @@ class PanelsPage(BasePage):
             try:
                 inp = modal.locator(element_type).nth(index)
                 inp.wait_for(state='visible', timeout=3000)
-                inp.click()
-                self.page.wait_for_timeout(200) # Small wait for focus
-                self.page.keyboard.press("Control+A")
-                self.page.keyboard.press("Delete")
-                inp.type(value)
+                # Verified once; the strategy that worked is remembered for this field
+                self.enter_text(inp, value, key=f"panel modal {element_type}[{index}]")
                 logger.info(f"Filled {log_name} with '{value}'")
-                
-                # Verify
-                actual = inp.input_value()
-                if actual != value:
-                    logger.warning(f"Value mismatch for {log_name}. Expected '{value}', got '{actual}'. Retrying...")
-                    inp.click()
-                    self.page.keyboard.press("Control+A")
-                    self.page.keyboard.press("Delete")
-                    inp.type(value)
             except Exception as e:
                  logger.error(f"Failed to fill {log_name}: {e}")
                  self.page.screenshot(path=f"screenshots/error_fill_{log_name}.png")
@@ -61,47 +102,113 @@ class PanelsPage(BasePage):
 
         # Excluir todas as fases padrões
         if not self.dry_run:
-            logger.info("Clearing default stages...")
+            if self.stage_editor == "bulk":
+                self.clear_stages(modal)
+            else:
+                self.clear_stages_one_by_one(modal)
+
+        # Add Stages
+        if self.stage_editor == "bulk" and not self.dry_run:
+            self.write_stages(stages_data)
+        else:
+            self.add_stages(modal, stages_data)
+
+        # Save Panel (Inside modal)
+        save_btn = modal.locator('button:has-text("Salvar")')
+        save_btn.scroll_into_view_if_needed()
+        save_btn.click()
+        
+        # Wait for modal to disappear
+        if not self.dry_run:
+             try:
+                modal.wait_for(state='hidden', timeout=5000)
+                logger.info(f"Panel {name} saved.")
+             except:
+                logger.warning("Modal might not have closed properly.")
+
+    def clear_stages(self, modal):
+        """
+        Deletes every default stage of the open panel modal in a single evaluate call
+        (core/stage_editor.py): each deletion is confirmed by a MutationObserver instead of
+        a wait per row. Rows the script could not remove, or all of them when the script
+        itself fails, go through the one-by-one loop.
+        """
+        logger.info("Clearing default stages in one pass...")
+        try:
+            result = self.page.evaluate(CLEAR_STAGES, {"timeout": 5000})
+        except Exception as e:
+            logger.warning(f"Bulk stage delete failed ({e}). Deleting one by one...")
+            self.clear_stages_one_by_one(modal)
+            return
+        logger.info(f"Deleted {result['removed']} default stage(s).")
+        if result["remaining"]:
+            logger.warning(f"{result['remaining']} stage(s) left after the bulk delete. Deleting one by one...")
+            self.clear_stages_one_by_one(modal)
+
+    def clear_stages_one_by_one(self, modal):
+        """Deletes the default stages one trash button per round trip (STAGE_EDITOR=ui, fallback)."""
+        logger.info("Clearing default stages...")
+        
+        # Focus on description and scroll down
+        try:
+            modal.locator('textarea').first.click()
+            self.page.keyboard.press("PageDown")
+            self.page.keyboard.press("PageDown")
+            self.wait_for_idle()
+        except: pass
+
+        max_attempts = 15
+        for attempt in range(max_attempts):
+            delete_buttons = modal.locator('button:has(mat-icon[data-mat-icon-name="trash"])')
+            stage_rows = delete_buttons.count()
+            
+            if stage_rows == 0:
+                 self.wait_for_idle()
+                 stage_rows = delete_buttons.count()
+            
+            if stage_rows == 0:
+                logger.info("No more stages to delete.")
+                break
+            
+            logger.info(f"Deleting 1 of {stage_rows} stages...")
+            delete_btn = delete_buttons.first
             
-            # Focus on description and scroll down
             try:
-                modal.locator('textarea').first.click()
-                self.page.keyboard.press("PageDown")
-                self.page.keyboard.press("PageDown")
-                self.page.wait_for_timeout(500)
-            except: pass
-
-            max_attempts = 15
-            for attempt in range(max_attempts):
-                delete_buttons = modal.locator('button:has(mat-icon[data-mat-icon-name="trash"])')
-                stage_rows = delete_buttons.count()
-                
-                if stage_rows == 0:
-                     self.page.wait_for_timeout(1000)
-                     stage_rows = delete_buttons.count()
-                
-                if stage_rows == 0:
-                    logger.info("No more stages to delete.")
-                    break
-                
-                logger.info(f"Deleting 1 of {stage_rows} stages...")
-                delete_btn = delete_buttons.first
-                
-                try:
-                    # Scroll into view if needed
-                    delete_btn.scroll_into_view_if_needed()
+                # Scroll into view if needed
+                delete_btn.scroll_into_view_if_needed()
+                if delete_btn.is_visible():
+                    delete_btn.click(force=True)
+                    self.wait_for_idle()
+                else:
+                     # Try scrolling container manually if scroll_into_view fails
+                    modal.locator('mat-dialog-content').evaluate('(el) => el.scrollTop += 100')
                     if delete_btn.is_visible():
-                        delete_btn.click(force=True)
-                        self.page.wait_for_timeout(1000)
-                    else:
-                         # Try scrolling container manually if scroll_into_view fails
-                        modal.locator('mat-dialog-content').evaluate('(el) => el.scrollTop += 100')
-                        if delete_btn.is_visible():
-                             delete_btn.click(force=True)
-                except Exception as e:
-                    logger.error(f"Error deleting stage: {e}")
+                         delete_btn.click(force=True)
+            except Exception as e:
+                logger.error(f"Error deleting stage: {e}")
 
-        # Add Stages
+    def write_stages(self, stages_data: list):
+        """
+        Adds, names and types every stage of the open panel modal in a single evaluate call
+        (core/stage_editor.py), then checks the rows the script reports. A mismatch raises
+        ActionFailedError and switches this page to the one-action-at-a-time loop, so the
+        retry of the panel does not depend on the script.
+        """
+        logger.info(f"Adding {len(stages_data)} stage(s) in one pass...")
+        started = time.monotonic()
+        snapshot = self.page.evaluate(WRITE_STAGES, {
+            "stages": [[stage_name, stage_type] for stage_name, stage_type in stages_data],
+            "inputSelector": Selectors.STAGE_NAME_INPUT,
+            "timeout": 5000,
+        })
+        problems = stage_mismatches(stages_data, snapshot)
+        if problems:
+            self.stage_editor = "ui"
+            raise ActionFailedError("Bulk stage editor: " + "; ".join(problems))
+        logger.info(f"Added {len(stages_data)} stage(s) in {time.monotonic() - started:.2f}s.")
+
+    def add_stages(self, modal, stages_data: list):
+        """Adds the stages one Playwright action at a time (STAGE_EDITOR=ui, dry-run, fallback)."""
         for idx, (stage_name, stage_type) in enumerate(stages_data):
             logger.info(f"Adding stage {idx + 1}/{len(stages_data)}: {stage_name} ({stage_type})")
             
@@ -119,20 +226,20 @@ class PanelsPage(BasePage):
                 
                 add_btn.click(force=True)
                 
-                # Wait for count to increase - Reduced timeout to ~1s as requested
+                # Wait for count to increase - resolves as soon as the new row is attached (max ~1s)
                 def wait_for_new_input():
-                    for _ in range(10): # 1 second (10 * 100ms)
-                        if modal.locator(Selectors.STAGE_NAME_INPUT).count() > initial_count:
-                            return True
-                        self.page.wait_for_timeout(100)
-                    return False
+                    try:
+                        modal.locator(Selectors.STAGE_NAME_INPUT).nth(initial_count).wait_for(state='attached', timeout=1000)
+                        return True
+                    except Exception:
+                        return False
 
                 if not wait_for_new_input():
                     # Retry click if count didn't increase
                     logger.warning("Stage input count did not increase. Retrying click...")
                     add_btn.click(force=True)
                     if not wait_for_new_input():
-                         raise Exception("Failed to add new stage input row")
+                         raise ActionFailedError("Failed to add new stage input row")
 
             except Exception as e:
                 logger.error(f"Failed to click add stage: {e}")
@@ -145,13 +252,7 @@ class PanelsPage(BasePage):
                 stage_input = stage_inputs.nth(initial_count) # Index of new item is equal to initial count
                 
                 stage_input.scroll_into_view_if_needed()
-                stage_input.click()
-                
-                # Double check empty just in case
-                self.page.keyboard.press("Control+A")
-                self.page.keyboard.press("Delete")
-                
-                stage_input.type(stage_name)
+                self.enter_text(stage_input, stage_name, key=Selectors.STAGE_NAME_INPUT)
                 
                 # Select stage type
                 try:
@@ -166,19 +267,22 @@ class PanelsPage(BasePage):
                     
                     stage_type_select.scroll_into_view_if_needed()
                     stage_type_select.click()
-                    self.page.wait_for_timeout(200) # Reduced from 500ms
+                    # Wait for the overlay panel instead of a fixed delay
+                    try:
+                        self.page.locator('mat-option').first.wait_for(state='visible', timeout=2000)
+                    except Exception:
+                        pass
                     
                     option = self.page.locator('mat-option').filter(has_text=stage_type).first
                     if option.is_visible():
                         option.click()
-                        self.page.wait_for_timeout(200) # Reduced from 500ms
+                        self.wait_for_idle(quiet_ms=50) # Overlay close animation
                         logger.info(f"Selected {stage_type}")
-                        self.page.wait_for_timeout(200) # Reduced from 300ms
                     else:
                         option = self.page.locator('mat-option').get_by_text(stage_type, exact=True).first
                         if option.is_visible():
                              option.click()
-                             self.page.wait_for_timeout(300)
+                             self.wait_for_idle(quiet_ms=50)
                         else:
                              # Try partial match/fallback
                              logger.warning(f"Exact option '{stage_type}' not found. Trying contains.")
@@ -193,84 +297,173 @@ class PanelsPage(BasePage):
                     add_btn_next = modal.locator(Selectors.ADD_STAGE_BTN)
                     # Force the button into view so it's ready for the next iteration
                     add_btn_next.evaluate('(el) => el.scrollIntoView({block: "center", behavior: "auto"})')
-                    self.page.wait_for_timeout(300)
+                    self.wait_for_idle(timeout=1000, quiet_ms=50)
                 except Exception as e:
                      logger.warning(f"Scroll to Add Button failed: {e}")
 
-        # Save Panel (Inside modal)
-        save_btn = modal.locator('button:has-text("Salvar")')
-        save_btn.scroll_into_view_if_needed()
-        save_btn.click()
-        
-        # Wait for modal to disappear
-        if not self.dry_run:
-             try:
-                modal.wait_for(state='hidden', timeout=5000)
-                logger.info(f"Panel {name} saved.")
-             except:
-                logger.warning("Modal might not have closed properly.")
+    def existing_panels(self, names: list) -> set:
+        """
+        Which of `names` the account already has: from the learned panel listing endpoint,
+        otherwise from the panel names shown on the panels page.
+        """
+        if self.dry_run:
+            return set()
+        backend = self.backend
+        if backend is not None and backend.ready:
+            try:
+                listed = backend.existing_panels()
+                if listed is not None:
+                    return listed
+            except Exception as e:
+                logger.warning(f"Could not list panels via backend ({e}). Reading the page instead.")
+        self.wait_for_idle()
+        listing = self.page.locator(Selectors.PANEL_LIST).first
+        return {name for name in names if listing.get_by_text(name, exact=True).count() > 0}
+
+    def create_panel_with_retry(self, name: str, description: str, stages_data: list):
+        """
+        create_panel with retries on transient errors. The failed modal is closed (discarding
+        its input) before the next attempt, which is skipped if the panel got saved anyway.
+        """
+        attempted = []
+
+        def attempt():
+            if attempted and normalize_name(name) in {normalize_name(n) for n in self.existing_panels([name])}:
+                logger.info(f"Panel {name} was saved by the failed attempt.")
+                return
+            attempted.append(True)
+            self.create_panel(name, description, stages_data)
 
-    def create_all_panels(self):
-        # Definições exatas conforme solicitado pelo usuário
-        panels = [
-            {
-                "name": "Pré-Consulta",
-                "description": "Nesse painel está a jornada do lead desde o primeiro contato até o comparecimento à consulta.",
-                "stages": [
-                    ("Em Contato", "Fase inicial"),
-                    ("Follow-Up", "Fase intermediária"),
-                    ("Não Respondeu Follow-Up", "Fase intermediária"),
-                    ("Interessado", "Fase intermediária"),
-                    ("Não Respondeu Agendamento", "Fase intermediária"),
-                    ("Agendado", "Fase final"),
-                    ("Confirmado", "Fase final"),
-                    ("Compareceu na Consulta", "Fase final"),
-                    ("Remarcação", "Fase intermediária"),
-                    ("Não Interessado", "Fase final")
-                ]
-            },
-            {
-                "name": "Pós-Consulta",
-                "description": "Nesse painel está a jornada do paciente após a consulta para fidelização e novos agendamentos.",
-                "stages": [
-                    ("Pós-Consulta Imediato", "Fase inicial"),
-                    ("3 dias", "Fase intermediária"),
-                    ("7 dias", "Fase intermediária"),
-                    ("15 dias", "Fase intermediária"),
-                    ("30 dias", "Fase intermediária"),
-                    ("3 meses", "Fase intermediária"),
-                    ("6 meses", "Fase intermediária"),
-                    ("1 ano", "Fase intermediária"),
-                    ("Nova Consulta", "Fase final")
-                ]
-            },
-            {
-                "name": "Indicação",
-                "description": "Nesse painel está a jornada do paciente indicado, desde a sua indicação até o seu comparecimento na consulta.",
-                "stages": [
-                    ("Indicado", "Fase inicial"),
-                    ("Validado", "Fase intermediária"),
-                    ("Em Contato", "Fase intermediária"),
-                    ("Não Respondeu", "Fase intermediária"),
-                    ("Agendado", "Fase intermediária"),
-                    ("Compareceu", "Fase final"),
-                    ("Não Interessado", "Fase final")
-                ]
-            },
-            {
-                "name": "Tarefas",
-                "description": "Nesse painel ficam as tarefas de todos os setores da clínica.",
-                "stages": [
-                    ("Não Iniciadas", "Fase inicial"),
-                    ("Em Andamento", "Fase intermediária"),
-                    ("Concluídas", "Fase final")
-                ]
-            }
-        ]
+        retry_call(attempt, description=f"Panel {name}", recover=self.recover)
 
+    def create_all_panels(self, parallelism: int = None, template: OnboardingTemplate = None,
+                          checkpoint: AccountCheckpoint = None, pool=None):
+        """
+        Creates the template panels the account does not have yet (Config.ONBOARDING_TEMPLATE
+        by default). Panels recorded in `checkpoint` by a previous run are not checked again.
+        With parallelism > 1 and the backend endpoints not learned yet, panels are created
+        concurrently in contexts cloned from this session, on idle slots leased from `pool`.
+        Every panel is tried; raises ActionFailedError listing the failed ones.
+        Returns the per-panel report ({name, status, error, duration}).
+        """
+        template = template or load_template()
+        pending = [p for p in template.panels if checkpoint is None or not checkpoint.done("panel", p["name"])]
+        if len(pending) < len(template.panels):
+            logger.info(f"{len(template.panels) - len(pending)} panel(s) completed by a previous run.")
+        existing = self.existing_panels([p["name"] for p in pending]) if pending else set()
+        missing = {panel["name"] for panel in template.missing_panels(existing)}
+        panels = [panel for panel in pending if panel["name"] in missing]
+
+        skipped = [_panel_result(panel, 0, status="skipped") for panel in template.panels
+                   if panel["name"] not in missing or panel not in pending]
+        for panel in pending:
+            if panel["name"] not in missing:
+                logger.info(f"Panel '{panel['name']}' already exists. Skipping.")
+                if checkpoint is not None:
+                    checkpoint.mark("panel", panel["name"])
+        if not panels:
+            return skipped
+
+        parallelism = min(parallelism or Config.PANEL_PARALLELISM, len(panels))
+        backend_ready = self.backend is not None and self.backend.ready
+        if parallelism > 1 and not self.dry_run and not backend_ready and pool is not None:
+            with pool.lease(parallelism) as lease:
+                if lease.size > 1:
+                    return skipped + self.create_panels_parallel(panels, lease, checkpoint)
+            logger.info("No idle browsers for parallel panels. Creating them one by one.")
+
+        report = []
         for panel in panels:
+            started = time.monotonic()
             logger.info(f"--- Processing Panel: {panel['name']} ---")
-            self.create_panel(panel["name"], panel["description"], panel["stages"])
-            # Wait a bit between panels
-            if not self.dry_run:
-                self.page.wait_for_timeout(3000)
+            try:
+                self.create_panel_sequentially(panel)
+            except Exception as e:
+                logger.error(f"Panel '{panel['name']}' failed: {e}")
+                report.append(_panel_result(panel, time.monotonic() - started, error=str(e)))
+                # The next panel starts from the panel list, not from a leftover modal
+                try:
+                    self.recover(e)
+                except Exception as recover_error:
+                    logger.warning(f"Recovery after panel '{panel['name']}' failed: {recover_error}")
+                continue
+            if checkpoint is not None:
+                checkpoint.mark("panel", panel["name"])
+            report.append(_panel_result(panel, time.monotonic() - started))
+        return skipped + _check_panel_report(report)
+
+    def create_panel_sequentially(self, panel: dict):
+        """One panel on this page: backend requests when learned, the UI modal otherwise."""
+        if self.create_panel_via_backend(panel["name"], panel["description"], panel["stages"]):
+            return
+        mark = self.backend.mark() if self.backend else None
+        self.create_panel_with_retry(panel["name"], panel["description"], panel["stages"])
+        # Wait for the panel list to refresh after the save
+        self.wait_for_idle()
+
+        # Learn the endpoints from the UI save so the next panels skip the modal
+        if self.backend is not None and not self.backend.ready:
+            self.backend.learn(mark, panel["name"], panel["description"], panel["stages"])
+
+    def create_panels_parallel(self, panels: list, pool, checkpoint: AccountCheckpoint = None):
+        """
+        Creates the panels concurrently, one browser context per worker.
+        The sync Playwright API cannot drive several tabs from one thread, so each worker
+        runs on its own slot of `pool` (a BrowserPool or a SlotLease, one panel per slot at
+        a time) with a context cloned from this page's session (cookies, localStorage and
+        sessionStorage, i.e. the same selected account).
+        Raises ActionFailedError listing the failed panels after all of them were tried.
+        """
+        snapshot = snapshot_session(self.page)
+        engine = self.engine
+        profiler = current_profiler()
+
+        def create(context, panel):
+            started = time.monotonic()
+            with profiling(profiler):
+                create_in(context, panel)
+            return time.monotonic() - started
+
+        def create_in(context, panel):
+            worker = PanelsPage(context.new_page(), engine=engine)
+            worker.go_to_panels()
+            mark = worker.backend.mark() if worker.backend else None
+            worker.create_panel_with_retry(panel["name"], panel["description"], panel["stages"])
+            worker.wait_for_idle()
+            if worker.backend is not None and not worker.backend.ready:
+                worker.backend.learn(mark, panel["name"], panel["description"], panel["stages"])
+
+        logger.info(f"Creating {len(panels)} panel(s) with parallelism {pool.size}")
+        report = []
+        futures = [(panel, pool.submit(lambda context, panel=panel: create(context, panel), **snapshot))
+                   for panel in panels]
+        for panel, future in futures:
+            try:
+                report.append(_panel_result(panel, future.result()))
+                if checkpoint is not None:
+                    checkpoint.mark("panel", panel["name"])
+            except Exception as e:
+                logger.error(f"Panel '{panel['name']}' failed: {e}")
+                report.append(_panel_result(panel, 0, error=str(e)))
+        return _check_panel_report(report)
+
+    def create_panel_via_backend(self, name: str, description: str, stages_data: list) -> bool:
+        """
+        Creates the panel with direct backend requests when the endpoints are known.
+        Returns False when the caller should use the UI modal instead.
+        """
+        backend = self.backend
+        if backend is None or not backend.ready:
+            return False
+
+        writes_before = backend.client.writes
+        try:
+            backend.create_panel(name, description, stages_data)
+            return True
+        except Exception as e:
+            if self.engine == "api" or backend.client.writes != writes_before:
+                # Part of the panel already exists: the UI fallback would duplicate it
+                raise
+            logger.warning(f"Backend panel creation failed ({e}). Falling back to UI and relearning.")
+            backend.profile.forget(PanelsBackend.SECTION)
+            return False
@@ -1,3 +1,5 @@
+from crm_automation.config import Config
+
 class Selectors:
     # Login
     LOGIN_START_BTN = 'text="Entrar com e-mail"' # Botão inicial
@@ -14,12 +16,14 @@ class Selectors:
     # We will likely build dynamic xpath or css in the page object
 
     # Panels
-    PANELS_URL = "https://crm.infinitegear.app/panels"
+    PANELS_URL = Config.URL_PANELS # Pages read Config.URL_PANELS at call time (see Config.use_base_url)
     NEW_PANEL_BTN = 'text="Novo painel"' # Corrected case based on screenshot
     # Using relative selectors based on labels because placeholders might be absent/different
     PANEL_NAME_INPUT = 'input:near(:text("Título"))' 
     PANEL_DESCRIPTION_INPUT = 'textarea:near(:text("Descrição"))' 
     PANEL_SAVE_BTN = 'button:has-text("Salvar")'
+    # Page body holding the panel cards: keeps the top bar and open modals out of name lookups
+    PANEL_LIST = 'main'
     
     # Stages (Fases) usually inside the panel creation modal
     ADD_STAGE_BTN = 'text=/Adicionar [fF]ase/' # Regex case insensitive
@@ -32,7 +36,7 @@ class Selectors:
     DELETE_STAGE_BTN = 'button:has(svg.lucide-trash), button[aria-label="Excluir"], button:has(svg)'
 
     # Contacts/Tags
-    CONTACTS_URL = "https://crm.infinitegear.app/contacts"
+    CONTACTS_URL = Config.URL_CONTACTS
     FIRST_CONTACT_ROW = 'tbody tr:first-child' # Selecionar primeiro contato
     TAGS_EDIT_ICON = 'button:has(mat-icon[data-mat-icon-name="pencil"]):right-of(:text("Etiquetas"))'
     ADD_TAG_BTN = 'button:has(mat-icon[data-mat-icon-name="plus-circle"])'
@@ -40,3 +44,6 @@ class Selectors:
     TAG_SAVE_BTN = 'button:has-text("Salvar")' # Scoped locally in page object
     # User provided HTML: <div class="... cursor-pointer ..."><div> Salvar etiquetas </div></div>
     TAG_FINAL_SAVE_BTN = 'div.cursor-pointer:has-text("Salvar etiquetas")'
+    # Tag editor popover: the nearest block around the "+" button that also holds "Salvar etiquetas".
+    # Lists every tag of the account, unlike the contact's own chips next to the pencil
+    TAG_EDITOR = f'{ADD_TAG_BTN} >> xpath=ancestor::*[contains(., "Salvar etiquetas")][1]'
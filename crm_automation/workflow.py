@@ -0,0 +1,203 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Callable, Dict, List, Optional
+
+from crm_automation.config import Config
+from crm_automation.core import metrics
+from crm_automation.core.browser_pool import snapshot_session
+from crm_automation.core.checkpoints import AccountCheckpoint, CheckpointStore
+from crm_automation.core.instrumentation import current_profiler, profiling
+from crm_automation.core.logger import logger
+from crm_automation.core.pipeline import Pipeline, Step
+from crm_automation.core.retry import RetryPolicy, retry_call
+from crm_automation.core.templates import load_template
+from crm_automation.pages.admin_page import AdminPage
+from crm_automation.pages.base_page import BasePage
+from crm_automation.pages.panels_page import PanelsPage
+from crm_automation.pages.contacts_page import ContactsPage
+
+# progress(step_name, status, error) with status in: running, succeeded, failed
+ProgressCallback = Callable[[str, str, Optional[str]], None]
+
+
+def _noop_progress(step: str, status: str, error: Optional[str] = None):
+    pass
+
+
+def track_step(progress: Optional[ProgressCallback], step: str, fn: Callable, *args, **kwargs):
+    """Runs fn reporting running/succeeded/failed for the given step name."""
+    progress = progress or _noop_progress
+    progress(step, "running", None)
+    # Per-account steps (account:<name>) are left out of the metrics: unbounded labels
+    observed = not step.startswith("account:")
+    started = time.monotonic()
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        progress(step, "failed", str(e))
+        if observed:
+            metrics.observe_step(step, time.monotonic() - started, "failed")
+        raise
+    progress(step, "succeeded", None)
+    if observed:
+        metrics.observe_step(step, time.monotonic() - started)
+    return result
+
+
+# Post-login steps. Each step runs fn(page, params) once its dependencies succeeded.
+def _access_account(page, params: Dict):
+    AdminPage(page, dry_run=params["dry_run"]).access_account(params["account_name"])
+
+
+def _create_panels(page, params: Dict):
+    panels_page = PanelsPage(page, dry_run=params["dry_run"])
+    panels_page.go_to_panels()
+    panels_page.create_all_panels(parallelism=params["panel_parallelism"], template=params["template"],
+                                  checkpoint=params["checkpoint"], pool=params["pool"])
+
+
+def _create_tags(page, params: Dict):
+    contacts_page = ContactsPage(page, dry_run=params["dry_run"])
+    contacts_page.go_to_contacts()
+    contacts_page.create_tags(template=params["template"], checkpoint=params["checkpoint"])
+
+
+# Single definition of the onboarding flow, shared by the CLI, the API and background jobs.
+# Panels and tags only need the selected account, so they can run side by side.
+ONBOARDING_PIPELINE = Pipeline([
+    # Selecting the account is page state, never skipped on resume
+    Step("access_account", _access_account, resumable=False),
+    Step("create_panels", _create_panels, depends_on=["access_account"], isolated=True),
+    Step("create_tags", _create_tags, depends_on=["access_account"], isolated=True),
+])
+ONBOARDING_STEPS = ONBOARDING_PIPELINE.step_names
+
+
+def run_onboarding(page, account_name: str, dry_run: bool = False, progress: Optional[ProgressCallback] = None,
+                   panel_parallelism: int = None, step_parallelism: int = None, template: str = None,
+                   resume: bool = None, pool=None) -> List[Dict]:
+    """
+    Post-login flow: access the client account, then create the panels and tags of the
+    onboarding template (path, Config.ONBOARDING_TEMPLATE by default) it does not have yet.
+    Expects `page` to be already authenticated. With step_parallelism > 1, independent
+    steps run at the same time, each on a page in a context cloned from `page`'s session,
+    on idle slots leased from `pool` (the caller's BrowserPool, usually the one `page`
+    itself runs on); parallel panels lease theirs from it too. Without a pool or an idle
+    slot, the steps (and panels) run one after another.
+    Completed steps, panels and tags are checkpointed per account: after a failure the next
+    run resumes from the first incomplete unit (resume=False starts over).
+    Returns the per-step timings reported by the pipeline.
+    """
+    # Validated before touching the account: a broken template fails fast
+    params = {"account_name": account_name, "dry_run": dry_run, "panel_parallelism": panel_parallelism,
+              "template": load_template(template), "checkpoint": None, "pool": None if dry_run else pool}
+    parallelism = 1 if dry_run or pool is None else max(1, step_parallelism or Config.STEP_PARALLELISM)
+    resume = Config.RESUME if resume is None else resume
+    lease = None
+    snapshot = None
+    leases = ExitStack()
+    # Isolated steps run on pool threads: the active profiler must follow them
+    profiler = current_profiler()
+
+    store = None if dry_run else CheckpointStore()
+    checkpoint = params["checkpoint"] = AccountCheckpoint(store, account_name) if store else None
+    completed = []
+    if checkpoint is not None:
+        if not resume:
+            checkpoint.clear()
+        elif checkpoint.resuming:
+            completed = [name for name in ONBOARDING_STEPS if checkpoint.done("step", name)]
+            logger.info(f"Resuming onboarding of '{account_name}' from its last checkpoint.")
+
+    # Leased up front: the pipeline must know whether isolated steps can run side by side
+    if parallelism > 1:
+        lease = leases.enter_context(pool.lease(parallelism))
+        if lease.size < 2:
+            logger.info("No idle browser to run the steps side by side. Running them one after another.")
+            leases.close()
+            parallelism = 1
+
+    def bind(step: Step, isolated: bool):
+        nonlocal snapshot
+
+        def run_step(step_page):
+            # A failed step is retried in place (checkpoints and the template diff skip
+            # what it already did) instead of failing the whole run
+            retry_call(step.fn, step_page, params, policy=RetryPolicy.for_steps(), description=f"Step {step.name}",
+                       recover=BasePage(step_page, dry_run=dry_run).recover)
+            if checkpoint is not None:
+                checkpoint.mark("step", step.name)
+
+        if not isolated:
+            return lambda: run_step(page)
+        if snapshot is None:
+            # Cloned after the dependencies ran, so the copies are on the selected account
+            snapshot = snapshot_session(page)
+
+        def run_isolated(context):
+            with profiling(profiler):
+                run_step(context.new_page())
+        return lambda: lease.run(run_isolated, **snapshot)
+
+    try:
+        report = ONBOARDING_PIPELINE.run(bind, parallelism=parallelism, progress=progress, completed=completed)
+        if checkpoint is not None:
+            # Done: the next run starts over (and only creates what is missing)
+            checkpoint.clear()
+    finally:
+        leases.close()
+        if store is not None:
+            store.close()
+
+    logger.info(f"Onboarding flow finished for '{account_name}'.")
+    return report
+
+
+def read_accounts_file(path: str) -> List[str]:
+    """One account name per line. Blank lines and lines starting with '#' are ignored."""
+    with open(path, encoding="utf-8") as f:
+        names = [line.strip() for line in f]
+    return [name for name in names if name and not name.startswith("#")]
+
+
+def onboard_accounts(pool, storage_state, account_names: List[str], concurrency: int = None,
+                     dry_run: bool = False, progress: Optional[ProgressCallback] = None,
+                     template: str = None, resume: bool = None) -> List[Dict]:
+    """
+    Batch mode: onboards many accounts from a single admin login.
+    Every account runs in its own context cloned from the authenticated `storage_state`,
+    at most `concurrency` at a time. Failures are reported per account and never stop the batch.
+    """
+    concurrency = max(1, min(concurrency or Config.BATCH_CONCURRENCY, len(account_names) or 1))
+    profiler = current_profiler()
+    logger.info(f"Batch onboarding {len(account_names)} account(s) with concurrency {concurrency}")
+
+    def onboard(account_name: str) -> Dict:
+        started = time.monotonic()
+
+        def run(context):
+            page = context.new_page()
+            with profiling(profiler):
+                # Steps side by side only on slots the batch leaves idle
+                run_onboarding(page, account_name, dry_run=dry_run, template=template, resume=resume, pool=pool)
+
+        try:
+            track_step(progress, f"account:{account_name}", pool.run, run, storage_state=storage_state)
+            status, error = "succeeded", None
+        except Exception as e:
+            logger.error(f"Onboarding failed for '{account_name}': {e}")
+            status, error = "failed", str(e)
+        return {
+            "account_name": account_name,
+            "status": status,
+            "error": error,
+            "duration": round(time.monotonic() - started, 2),
+        }
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as executor:
+        results = list(executor.map(onboard, account_names))
+
+    failed = sum(1 for r in results if r["status"] != "succeeded")
+    logger.info(f"Batch finished: {len(results) - failed} succeeded, {failed} failed.")
+    return results
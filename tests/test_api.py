@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from crm_automation import api
+from crm_automation.core.browser_pool import BrowserPool
+from crm_automation.core.exceptions import SessionMismatchError
+from crm_automation.core.live_sessions import LiveSessionRegistry
+
+@pytest.fixture
+def pool_and_sessions():
+    with patch("crm_automation.core.browser_pool.sync_playwright"):
+        with BrowserPool(size=2, health_interval=5) as pool:
+            registry = LiveSessionRegistry(pool, ttl=60)
+            with patch.object(api, "browser_pool", pool), patch.object(api, "live_sessions", registry):
+                yield pool, registry
+            registry.close()
+
+def make_request(**kwargs):
+    data = {"email": "a@b.com", "code": "123456", "account_name": "Clinic"}
+    data.update(kwargs)
+    return api.CompleteAuthRequest(**data)
+
+def test_complete_resumes_parked_page(pool_and_sessions):
+    pool, registry = pool_and_sessions
+    token, _ = registry.open(lambda context, page: "parked").result(timeout=5)
+    assert len(registry) == 1
+
+    flow = MagicMock(return_value="done")
+    with patch.object(api, "complete_auth_flow", return_value=flow):
+        result = api.start_complete_auth(make_request(session_token=token)).result(timeout=5)
+
+    assert result == "done"
+    assert flow.call_args[0][1] is not None  # got the live page
+    assert len(registry) == 0
+
+def test_live_session_is_bound_to_the_email_that_opened_it(pool_and_sessions):
+    pool, registry = pool_and_sessions
+    token, _ = registry.open(lambda context, page: "parked", email="a@b.com").result(timeout=5)
+
+    flow = MagicMock(return_value="done")
+    with patch.object(api, "complete_auth_flow", return_value=flow):
+        with pytest.raises(SessionMismatchError):
+            api.start_complete_auth(make_request(email="other@b.com", session_token=token))
+    flow.assert_not_called()
+    # The leaked token is spent: the owner starts over from /auth/init
+    assert len(registry) == 0
+
+def test_live_session_email_ignores_case_and_spaces(pool_and_sessions):
+    pool, registry = pool_and_sessions
+    token, _ = registry.open(lambda context, page: "parked", email="A@b.com").result(timeout=5)
+    assert registry.take(token, email=" a@B.com ") is not None
+
+def test_complete_replays_login_without_live_session(pool_and_sessions):
+    flow = MagicMock(return_value="done")
+    with patch.object(api, "complete_auth_flow", return_value=flow):
+        result = api.start_complete_auth(make_request(session_token="gone", session_state={"cookies": []}))
+        assert result.result(timeout=5) == "done"
+    assert flow.call_args[0][1:] == ()
+
+def test_complete_without_session_or_state_is_rejected(pool_and_sessions):
+    with pytest.raises(api.SessionExpiredError):
+        api.start_complete_auth(make_request(session_token="gone"))
+
+def test_init_auth_never_returns_a_cached_session(pool_and_sessions, tmp_path, monkeypatch):
+    import asyncio
+    from crm_automation.config import Config
+    from crm_automation.core.session_cache import SessionCache
+    monkeypatch.setattr(Config, "SESSION_CACHE_DIR", str(tmp_path))
+    cache = SessionCache(ttl=60)
+    cache.put("a@b.com", {"cookies": [{"name": "sid", "value": "logged-in"}], "origins": []})
+
+    from crm_automation.core import live_sessions
+    with patch.object(api, "LoginPage") as login_page, \
+            patch.object(live_sessions, "new_context", wraps=live_sessions.new_context) as new_context:
+        result = asyncio.run(api.init_auth(api.InitAuthRequest(email="a@b.com")))
+
+    assert result["status"] == "waiting_code"
+    login_page.return_value.initiate_login.assert_called_once_with("a@b.com")
+    # A fresh context: the cached post-login state is never loaded nor returned
+    assert new_context.call_args.kwargs["storage_state"] is None
+    assert result["session_state"] != cache.get("a@b.com")
+
+def test_api_login_is_not_cached(tmp_path, monkeypatch):
+    from crm_automation.config import Config
+    monkeypatch.setattr(Config, "SESSION_CACHE_DIR", str(tmp_path / "session_cache"))
+    with patch.object(api, "LoginPage"):
+        api.authenticate(MagicMock(), MagicMock(), make_request())
+    assert not (tmp_path / "session_cache").exists()
@@ -0,0 +1,87 @@
+import json
+from unittest.mock import MagicMock
+from crm_automation.core.backend import BackendProfile, PanelsBackend, render
+
+STAGES = [("Em Contato", "Fase inicial"), ("Follow-Up", "Fase intermediária"), ("Agendado", "Fase final")]
+TYPE_CODES = {"Fase inicial": "INITIAL", "Fase intermediária": "MIDDLE", "Fase final": "FINAL"}
+
+def fake_request(method, url, body, response=None):
+    request = MagicMock()
+    request.method = method
+    request.url = url
+    request.resource_type = "xhr"
+    request.headers = {"authorization": "Bearer abc", "x-company-id": "42"}
+    request.post_data = json.dumps(body) if body is not None else None
+    request.response.return_value.json.return_value = response
+    return request
+
+def make_backend(tmp_path, requests):
+    page = MagicMock()
+    backend = PanelsBackend(page, BackendProfile(str(tmp_path / "profile.json")))
+    mark = backend.mark()
+    for request in requests:
+        backend.client.recorder._on_request(request)
+    return page, backend, mark
+
+def test_learns_panel_body_with_nested_stages(tmp_path):
+    body = {
+        "title": "Pré-Consulta", "description": "Jornada", "companyId": 42,
+        "steps": [{"name": n, "type": TYPE_CODES[t], "order": i, "color": "#fff"} for i, (n, t) in enumerate(STAGES)],
+    }
+    page, backend, mark = make_backend(tmp_path, [fake_request("POST", "https://api.crm/panels", body)])
+    assert backend.learn(mark, "Pré-Consulta", "Jornada", STAGES)
+
+    backend.create_panel("Tarefas", "Todas", [("Não Iniciadas", "Fase inicial"), ("Concluídas", "Fase final")])
+    url = page.request.fetch.call_args[0][0]
+    kwargs = page.request.fetch.call_args[1]
+    sent = json.loads(kwargs["data"])
+    assert url == "https://api.crm/panels"
+    assert kwargs["headers"]["authorization"] == "Bearer abc"
+    assert sent["title"] == "Tarefas" and sent["companyId"] == 42
+    assert sent["steps"] == [
+        {"name": "Não Iniciadas", "type": "INITIAL", "order": 0, "color": "#fff"},
+        {"name": "Concluídas", "type": "FINAL", "order": 1, "color": "#fff"},
+    ]
+
+def test_learns_one_request_per_stage(tmp_path):
+    requests = [fake_request("POST", "https://api.crm/panels", {"title": "Pré-Consulta", "description": "Jornada"},
+                             response={"data": {"id": "p-1"}})]
+    requests += [fake_request("POST", "https://api.crm/panels/p-1/stages",
+                              {"label": n, "kind": TYPE_CODES[t], "position": i + 1, "panelId": "p-1"})
+                 for i, (n, t) in enumerate(STAGES)]
+    page, backend, mark = make_backend(tmp_path, requests)
+    assert backend.learn(mark, "Pré-Consulta", "Jornada", STAGES)
+
+    spec = backend.profile.get("panels")
+    assert spec["create_stage"]["url"] == "https://api.crm/panels/{{panel_id}}/stages"
+    assert render(spec["create_stage"]["body"], {"name": "X", "position": 1, "panel_id": "p-9", "type_kind": "FINAL"}) == \
+        {"label": "X", "kind": "FINAL", "position": 1, "panelId": "p-9"}
+
+def test_learning_fails_without_matching_request(tmp_path):
+    page, backend, mark = make_backend(tmp_path, [fake_request("POST", "https://api.crm/other", {"foo": "bar"})])
+    assert backend.learn(mark, "Pré-Consulta", "Jornada", STAGES) is False
+    assert not backend.ready
+
+def test_tags_learn_then_create_only_missing(tmp_path):
+    from crm_automation.core.backend import TagsBackend
+    tags = ["Paciente", "Lead", "Equipe"]
+    listing = fake_request("GET", "https://api.crm/tags?companyId=42", None,
+                           response={"data": [{"id": 1, "title": "VIP"}, {"id": 2, "title": "Paciente"}]})
+    creates = [fake_request("POST", "https://api.crm/tags", {"title": t, "color": c, "companyId": "42"})
+               for t, c in zip(tags, ["#f00", "#0f0", "#00f"])]
+
+    page = MagicMock()
+    backend = TagsBackend(page, BackendProfile(str(tmp_path / "profile.json")))
+    mark = backend.mark()
+    for request in creates + [listing]:
+        backend.client.recorder._on_request(request)
+    assert backend.learn(mark, tags)
+
+    spec = backend.profile.get("tags")
+    assert spec["list"]["url"] == "https://api.crm/tags?companyId={{hdr_x_company_id}}"
+    assert spec["create"]["body"] == {"title": "{{name}}", "color": "#f00", "companyId": "{{hdr_x_company_id}}"}
+
+    page.request.fetch.return_value.json.return_value = {"data": [{"id": 2, "title": "Paciente"}]}
+    assert backend.create_tags(tags) == ["Lead", "Equipe"]
+    posted = [json.loads(c[1]["data"])["title"] for c in page.request.fetch.call_args_list if c[1]["method"] == "POST"]
+    assert posted == ["Lead", "Equipe"]
@@ -0,0 +1,52 @@
+from benchmarks.harness import step_deltas, step_totals
+from benchmarks.onboarding import compare, load_baselines, save_baselines, summarize
+from crm_automation.core import metrics
+
+def sample(wall, steps, round_trips=100):
+    return {"wall": wall, "steps": steps, "round_trips": round_trips, "crm_requests": 20,
+            "browser_cpu_seconds": None, "browser_peak_rss_mb": None}
+
+def test_step_deltas_come_from_the_step_histogram():
+    before = step_totals()
+    metrics.observe_step("bench_probe", 1.5)
+    metrics.observe_step("bench_probe", 0.5)
+    metrics.observe_step("bench_probe_failed", 3, "failed")
+    assert step_deltas(before, step_totals()) == {"bench_probe": 2.0}
+
+def test_summary_takes_medians_of_steps_every_run_reported():
+    summary = summarize([
+        sample(10, {"login": 2, "create_panels": 5}),
+        sample(12, {"login": 3, "create_panels": 6, "create_tags": 1}),
+        sample(30, {"login": 9, "create_panels": 7}, round_trips=120),
+    ])
+    assert summary["wall"] == 12
+    assert summary["round_trips"] == 100
+    assert summary["steps"] == {"create_panels": 6, "login": 3}
+    assert summary["browser_cpu_seconds"] is None
+
+def test_compare_flags_steps_beyond_threshold_and_slack():
+    baseline = summarize([sample(10, {"login": 2.0, "create_panels": 5.0, "tiny": 0.1})])
+    current = summarize([sample(10.5, {"login": 2.6, "create_panels": 7.0, "tiny": 0.4}, round_trips=130)])
+
+    regressions = compare(current, baseline, threshold=0.25, min_delta=0.5)
+
+    assert any(r.startswith("step create_panels") for r in regressions)
+    assert any(r.startswith("round_trips") for r in regressions)
+    # Within threshold + slack: 2.6 <= 2.0 * 1.25 + 0.5, 0.4 <= 0.1 * 1.25 + 0.5
+    assert not any(r.startswith(("step login", "step tiny", "wall")) for r in regressions)
+
+def test_baselines_round_trip(tmp_path):
+    path = str(tmp_path / "baselines" / "onboarding.json")
+    assert load_baselines(path) == {"version": 1, "scenarios": {}}
+    save_baselines(path, {"version": 1, "scenarios": {"cli": {"wall": 12}}})
+    assert load_baselines(path)["scenarios"]["cli"]["wall"] == 12
+
+def test_load_levels_report_percentiles():
+    from benchmarks.load import format_levels, percentile
+    assert percentile([], 50) is None
+    assert percentile([4, 1, 3, 2], 50) == 2
+    assert percentile([4, 1, 3, 2], 90) == 4
+    level = {"concurrency": 2, "requests": 4, "succeeded": 3, "error_rate": 0.25, "throughput_per_min": 6.0,
+             "latency": {"p50": 20.0, "p90": 31.5, "p99": 31.5}, "process_peak_rss_mb": 180.0,
+             "browser_peak_rss_mb": None}
+    assert "25.0%" in format_levels([level]).splitlines()[1]
@@ -0,0 +1,43 @@
+from unittest.mock import MagicMock, patch
+from crm_automation.core.browser_pool import BrowserPool
+
+def test_pool_leases_fresh_context_per_task():
+    with patch("crm_automation.core.browser_pool.sync_playwright") as mock_sync:
+        playwright = mock_sync.return_value.__enter__.return_value
+        browser = playwright.chromium.launch.return_value
+
+        with BrowserPool(size=2, health_interval=5) as pool:
+            results = [pool.submit(lambda ctx, i=i: i * 2) for i in range(4)]
+            assert [f.result(timeout=5) for f in results] == [0, 2, 4, 6]
+
+            health = pool.health()
+            assert health["size"] == 2
+            assert health["healthy"] is True
+            assert sum(s["served"] for s in health["slots"]) == 4
+
+        # Browsers are launched once per slot, contexts once per task
+        assert playwright.chromium.launch.call_count == 2
+        assert browser.new_context.call_count == 4
+        assert browser.new_context.return_value.close.call_count == 4
+
+def test_task_leases_only_idle_slots_for_its_subtasks():
+    with patch("crm_automation.core.browser_pool.sync_playwright"):
+        with BrowserPool(size=2, health_interval=5) as pool:
+            def onboarding(context):
+                with pool.lease(2) as lease:
+                    # Its own slot is busy: one left, and the sub-tasks run on it
+                    sizes = [lease.size, [f.result(timeout=5) for f in [lease.submit(lambda ctx, i=i: i) for i in range(3)]]]
+                with pool.lease(1) as lease:
+                    sizes.append(lease.size)
+                return sizes
+
+            assert pool.run(onboarding, timeout=10) == [1, [0, 1, 2], 1]
+            assert not any(slot["reserved"] for slot in pool.health()["slots"])
+
+        with BrowserPool(size=1, health_interval=5) as pool:
+            def leased(context):
+                with pool.lease(2) as lease:
+                    return lease.size
+
+            # No idle slot: nothing to wait for, the caller runs its steps itself
+            assert pool.run(leased, timeout=10) == 0
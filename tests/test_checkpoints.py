@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock
+from crm_automation.core.checkpoints import AccountCheckpoint, CheckpointStore
+from crm_automation.core.pipeline import Pipeline, Step
+from crm_automation.pages.panels_page import PanelsPage
+
+def test_checkpoints_persist_per_account(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    store = CheckpointStore(path)
+    checkpoint = AccountCheckpoint(store, "Clínica Sorriso")
+    checkpoint.mark("panel", "Tarefas")
+    store.close()
+
+    reopened = AccountCheckpoint(CheckpointStore(path), "  clínica sorriso ")
+    assert reopened.resuming and reopened.done("panel", "Tarefas")
+    assert not AccountCheckpoint(reopened.store, "Outra Clínica").resuming
+
+    reopened.clear()
+    assert not AccountCheckpoint(reopened.store, "Clínica Sorriso").resuming
+
+def test_pipeline_resumes_completed_steps_but_reruns_setup():
+    ran, progress = [], []
+    pipeline = Pipeline([
+        Step("account", lambda: ran.append("account"), resumable=False),
+        Step("panels", lambda: ran.append("panels"), depends_on=["account"]),
+        Step("tags", lambda: ran.append("tags"), depends_on=["account"]),
+    ])
+    report = pipeline.run(lambda step, isolated: step.fn, completed=["account", "panels"],
+                          progress=lambda *event: progress.append(event))
+
+    assert ran == ["account", "tags"]
+    assert [r["status"] for r in report] == ["succeeded", "resumed", "succeeded"]
+    assert ("panels", "succeeded", None) in progress
+
+def test_create_all_panels_skips_checkpointed_panels(monkeypatch):
+    checked, created = [], []
+    monkeypatch.setattr(PanelsPage, "existing_panels", lambda self, names: checked.extend(names) or set())
+    monkeypatch.setattr(PanelsPage, "create_panel", lambda self, name, desc, stages: created.append(name))
+    monkeypatch.setattr(PanelsPage, "wait_for_idle", lambda self, **kw: True)
+    checkpoint = AccountCheckpoint(CheckpointStore(":memory:"), "Clinic")
+    checkpoint.mark("panel", "Pré-Consulta")
+    checkpoint.mark("panel", "Pós-Consulta")
+
+    PanelsPage(MagicMock(), engine="ui").create_all_panels(checkpoint=checkpoint)
+
+    assert checked == created == ["Indicação", "Tarefas"]
+    assert checkpoint.done("panel", "Tarefas")
@@ -0,0 +1,29 @@
+import pytest
+from unittest.mock import MagicMock
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from crm_automation.core.exceptions import ActionFailedError
+from crm_automation.core.retry import is_retryable
+from crm_automation.core.templates import OnboardingTemplate
+from crm_automation.pages.contacts_page import ContactsPage
+
+TEMPLATE = OnboardingTemplate.from_dict({
+    "panels": [{"name": "Vendas", "description": "Funil", "stages": [{"name": "Novo", "type": "Fase inicial"}]}],
+    "tags": ["VIP", "Lead"],
+})
+
+def test_account_without_contacts_fails_instead_of_reporting_success():
+    page = MagicMock()
+    page.wait_for_selector.side_effect = PlaywrightTimeoutError("Timeout 15000ms exceeded")
+    checkpoint = MagicMock()
+    checkpoint.done.return_value = False
+
+    with pytest.raises(ActionFailedError, match="No contact") as error:
+        ContactsPage(page, engine="ui").create_tags(template=TEMPLATE, checkpoint=checkpoint)
+    assert not is_retryable(error.value)
+    checkpoint.mark.assert_not_called()
+
+def test_tags_still_missing_fail_the_step(monkeypatch):
+    contacts = ContactsPage(MagicMock(), engine="ui")
+    monkeypatch.setattr(contacts, "create_tags_ui", lambda tags: ["VIP"])
+    with pytest.raises(ActionFailedError, match="Lead"):
+        contacts.create_tags(template=TEMPLATE)
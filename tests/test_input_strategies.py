@@ -0,0 +1,100 @@
+import pytest
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from crm_automation.core import input_strategies
+from crm_automation.core.exceptions import ActionFailedError
+from crm_automation.core.input_strategies import InputStrategyCache, enter_text
+
+class Field:
+    """Locator stand-in: `accepts` maps each strategy to what the field ends up holding."""
+    def __init__(self, accepts):
+        self.accepts = accepts
+        self.value = ""
+
+    @property
+    def first(self):
+        return self
+
+    def evaluate_all(self, script, *args):
+        return self.value
+
+class Inputs:
+    """Locator stand-in over several inputs sharing one `values` list (real strategies)."""
+    def __init__(self, values, indexes=None):
+        self.values = values
+        self.indexes = list(range(len(values))) if indexes is None else indexes
+
+    @property
+    def first(self):
+        return Inputs(self.values, self.indexes[:1])
+
+    def fill(self, value):
+        self.values[self.indexes[0]] = value
+
+    def evaluate_all(self, script, *args):
+        if script == input_strategies._CLEAR:
+            for index in self.indexes:
+                self.values[index] = ""
+            return None
+        return "".join(self.values[index] for index in self.indexes)
+
+@pytest.fixture
+def strategies(monkeypatch):
+    calls = []
+
+    def make(name):
+        def strategy(page, locator, value):
+            calls.append(name)
+            outcome = locator.accepts.get(name, "")
+            if isinstance(outcome, Exception):
+                raise outcome
+            locator.value = value if outcome is True else outcome
+        return strategy
+
+    monkeypatch.setattr(input_strategies, "STRATEGIES", {n: make(n) for n in ("fill", "insert_text", "paste", "type")})
+    return calls
+
+def test_first_verified_strategy_is_remembered(tmp_path, strategies):
+    cache = InputStrategyCache(str(tmp_path / "input_strategies.json"))
+    otp = Field({"fill": "6", "insert_text": RuntimeError("detached"), "paste": True, "type": True})
+
+    assert enter_text(None, otp, "123456", "input.otp-input", cache=cache, boxes=True) == "paste"
+    assert strategies == ["fill", "insert_text", "paste"]
+
+    strategies.clear()
+    reloaded = InputStrategyCache(str(tmp_path / "input_strategies.json"))
+    assert enter_text(None, otp, "123456", "input.otp-input", cache=reloaded, boxes=True) == "paste"
+    assert strategies == ["paste"]
+
+def test_no_working_strategy_raises_without_the_value(tmp_path, strategies):
+    cache = InputStrategyCache(str(tmp_path / "input_strategies.json"))
+    with pytest.raises(ActionFailedError) as error:
+        enter_text(None, Field({}), "s3cret", "input.password", cache=cache)
+    assert "s3cret" not in str(error.value)
+    assert cache.get("input.password") is None
+
+def test_missing_field_fails_at_once(tmp_path, strategies):
+    cache = InputStrategyCache(str(tmp_path / "input_strategies.json"))
+    with pytest.raises(PlaywrightTimeoutError):
+        enter_text(None, Field({"fill": PlaywrightTimeoutError("timeout")}), "x", "input.gone", cache=cache)
+    assert strategies == ["fill"]
+
+def test_order_drops_unknown_strategies(tmp_path):
+    cache = InputStrategyCache(str(tmp_path / "input_strategies.json"))
+    cache.remember("input.search", "type", 0.4)
+    assert cache.order("input.search", ["fill", "telepathy", "type"]) == ["type", "fill"]
+
+def test_selector_matching_several_inputs_touches_the_first_only(tmp_path):
+    cache = InputStrategyCache(str(tmp_path / "input_strategies.json"))
+    values = ["", "unrelated"]
+    assert enter_text(None, Inputs(values), "Clínica", "input:near(:text('Perfil'))", cache=cache) == "fill"
+    assert values == ["Clínica", "unrelated"]
+
+def test_otp_that_cannot_be_entered_is_not_submitted(monkeypatch):
+    from unittest.mock import MagicMock
+    from crm_automation.pages.login_page import LoginPage
+    page = LoginPage(MagicMock())
+    monkeypatch.setattr(page, "_fill", MagicMock(side_effect=ActionFailedError("No input strategy set the value")))
+    monkeypatch.setattr(page, "first_visible", MagicMock(return_value="otp"))
+    with pytest.raises(ActionFailedError):
+        page.submit_otp("123456")
+    page.first_visible.assert_not_called()
@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock
+from crm_automation.core.instrumentation import Profiler, instrument, profiling
+from crm_automation.pages.base_page import BasePage
+
+class FakePanelsPage(BasePage):
+    def create_panel(self):
+        self.click("button.novo", "Novo painel")
+        self.page.locator("mat-dialog-container").first.fill("Tarefas")
+        self.page.wait_for_timeout(1000)
+        self.wait_for_idle()
+
+FakePanelsPage.__module__ = "crm_automation.pages.fake_panels_page"
+
+def test_page_is_wrapped_only_while_profiling():
+    page = MagicMock()
+    assert BasePage(page).page is page
+    with profiling(Profiler()):
+        wrapped = BasePage(page).page
+        assert wrapped is not page
+        assert instrument(wrapped) is wrapped
+
+def test_calls_are_attributed_to_page_object_methods():
+    page = MagicMock()
+    page.evaluate.return_value = {"idle": True}
+    profiler = Profiler("acme")
+    with profiling(profiler):
+        FakePanelsPage(page).create_panel()
+
+    calls = {(stack[-1], call, selector) for stack, call, selector, _ in profiler.records}
+    assert ("FakePanelsPage._click", "click", "button.novo") in calls
+    assert ("FakePanelsPage.create_panel", "fill", "mat-dialog-container >> first") in calls
+    assert ("FakePanelsPage.create_panel", "wait_for_timeout", "1000ms") in calls
+    # Typed values never reach the report
+    assert "Tarefas" not in profiler.report()
+    page.locator.return_value.first.fill.assert_called_once_with("Tarefas")
+
+    totals = profiler.totals()
+    assert set(totals) == {"actions", "real_waits", "fixed_sleeps"}
+    assert profiler.summary()["calls"] == 4
+    kinds = {profiler.category(stack, call) for stack, call, _, _ in profiler.records}
+    assert kinds == {"actions", "real_waits", "fixed_sleeps"}
+
+    folded = profiler.folded()
+    assert any(line.startswith("FakePanelsPage.create_panel;FakePanelsPage.click;FakePanelsPage._click;click button.novo ")
+               for line in folded)
@@ -8,3 +8,18 @@ def test_login_page_init():
     assert isinstance(page, BasePage)
     assert page.dry_run is True
     assert page.page == mock_page
+
+def test_wait_for_idle_retries_after_navigation():
+    mock_page = MagicMock()
+    mock_page.evaluate.side_effect = [Exception("Execution context was destroyed"),
+                                      {"idle": True, "waited": 40, "pending": 0}]
+    page = BasePage(mock_page)
+    assert page.wait_for_idle(timeout=500) is True
+    assert mock_page.evaluate.call_count == 2
+    assert mock_page.evaluate.call_args[0][1]["timeout"] == 500
+    mock_page.wait_for_load_state.assert_called_once()
+
+def test_wait_for_idle_is_noop_in_dry_run():
+    mock_page = MagicMock()
+    assert BasePage(mock_page, dry_run=True).wait_for_idle() is True
+    mock_page.evaluate.assert_not_called()
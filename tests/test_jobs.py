@@ -0,0 +1,46 @@
+import time
+from crm_automation.core.jobs import JobStore, JobQueue, SUCCEEDED, FAILED
+
+def wait_for_job(store, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get(job_id)
+        if job["status"] in (SUCCEEDED, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("Job did not finish")
+
+def test_job_reports_steps_and_result():
+    store = JobStore(":memory:")
+    queue = JobQueue(store, workers=1)
+
+    def job(progress):
+        progress("login", "running")
+        progress("login", "succeeded")
+        return {"ok": True}
+
+    job_id = queue.submit("onboarding", ["login", "create_tags"], job)
+    job = wait_for_job(store, job_id)
+    assert job["status"] == SUCCEEDED
+    assert job["result"] == {"ok": True}
+    assert [s["status"] for s in job["steps"]] == ["succeeded", "pending"]
+
+def test_failed_job_keeps_error():
+    store = JobStore(":memory:")
+    queue = JobQueue(store, workers=1)
+
+    def job(progress):
+        progress("login", "running")
+        progress("login", "failed", "boom")
+        raise RuntimeError("boom")
+
+    job = wait_for_job(store, queue.submit("onboarding", ["login"], job))
+    assert job["status"] == FAILED
+    assert job["error"] == "boom"
+    assert job["steps"][0]["error"] == "boom"
+
+def test_unfinished_jobs_fail_on_restart():
+    store = JobStore(":memory:")
+    job_id = store.create("onboarding", ["login"])
+    store.fail_unfinished()
+    assert store.get(job_id)["status"] == FAILED
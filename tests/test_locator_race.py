@@ -0,0 +1,81 @@
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from crm_automation.core.locator_race import LocatorCache, race
+
+class Locator:
+    def __init__(self, page, selectors):
+        self.page = page
+        self.selectors = selectors
+
+    def count(self):
+        self.page.calls.append(("count", self.selectors))
+        return sum(1 for s in self.selectors if s.split(" >> ")[0] in self.page.visible)
+
+    def or_(self, other):
+        return Locator(self.page, self.selectors + other.selectors)
+
+    @property
+    def first(self):
+        return self
+
+    def wait_for(self, state, timeout):
+        self.page.calls.append(("wait", self.selectors))
+        if not self.count():
+            raise PlaywrightTimeoutError("timeout")
+
+class Page:
+    def __init__(self, visible):
+        self.visible = set(visible)
+        self.calls = []
+
+    def locator(self, selector):
+        return Locator(self, [selector])
+
+CANDIDATES = {"otp": "#otp-submit", "fallback": "#sign-in"}
+
+def test_race_returns_the_visible_candidate_and_remembers_it(tmp_path):
+    cache = LocatorCache(str(tmp_path / "locator_winners.json"))
+    page = Page({"#sign-in"})
+    assert race(page, "LoginPage.otp_submit", CANDIDATES, 4000, version="ng17 main.abc.js", cache=cache) == "fallback"
+    # One wait on the union of every candidate
+    assert [c for c in page.calls if c[0] == "wait"] == [("wait", ["#otp-submit >> visible=true", "#sign-in >> visible=true"])]
+
+    reloaded = LocatorCache(str(tmp_path / "locator_winners.json"))
+    assert reloaded.get("ng17 main.abc.js", "LoginPage.otp_submit") == "fallback"
+    page.calls.clear()
+    assert race(page, "LoginPage.otp_submit", CANDIDATES, 4000, version="ng17 main.abc.js", cache=reloaded) == "fallback"
+    # No wait: the winner is visible and the other candidates are not
+    assert page.calls == [("count", ["#sign-in >> visible=true"]), ("count", ["#otp-submit >> visible=true"])]
+
+def test_remembered_winner_does_not_jump_ahead_of_an_earlier_candidate(tmp_path):
+    # The email field won last time (already open), but now the start button is also
+    # visible: it has to be clicked first
+    entry = {"start_button": 'text="Entrar com e-mail"', "email_input": '[data-cy="input-email"]'}
+    cache = LocatorCache(str(tmp_path / "locator_winners.json"))
+    cache.remember("ng17", "LoginPage.login_entry", "email_input")
+    page = Page({'text="Entrar com e-mail"', '[data-cy="input-email"]'})
+    assert race(page, "LoginPage.login_entry", entry, 4000, version="ng17", cache=cache) == "start_button"
+    assert not [c for c in page.calls if c[0] == "wait"]
+    assert cache.get("ng17", "LoginPage.login_entry") == "email_input"
+
+def test_declaration_order_breaks_ties_and_versions_are_separate(tmp_path):
+    cache = LocatorCache(str(tmp_path / "locator_winners.json"))
+    cache.remember("ng16", "LoginPage.otp_submit", "fallback")
+    page = Page({"#otp-submit", "#sign-in"})
+    assert race(page, "LoginPage.otp_submit", CANDIDATES, 4000, version="ng17", cache=cache) == "otp"
+
+def test_race_without_a_match_returns_none(tmp_path):
+    cache = LocatorCache(str(tmp_path / "locator_winners.json"))
+    assert race(Page(set()), "LoginPage.otp_submit", CANDIDATES, 10, cache=cache) is None
+    assert cache.data["apps"] == {}
+
+def test_winner_of_an_older_app_version_is_dropped(tmp_path):
+    cache = LocatorCache(str(tmp_path / "locator_winners.json"))
+    assert race(Page({"#sign-in"}), "LoginPage.otp_submit", CANDIDATES, 4000, version="ng17 main.abc.js",
+                cache=cache) == "fallback"
+
+    # New deploy: the old winner is not trusted (a real wait on every candidate) nor kept
+    page = Page({"#otp-submit", "#sign-in"})
+    assert race(page, "LoginPage.otp_submit", CANDIDATES, 4000, version="ng17 main.def.js", cache=cache) == "otp"
+    assert ("wait", ["#otp-submit >> visible=true", "#sign-in >> visible=true"]) in page.calls
+    reloaded = LocatorCache(str(tmp_path / "locator_winners.json"))
+    assert reloaded.data["apps"] == {"ng17 main.def.js": {"LoginPage.otp_submit": "otp"}}
@@ -0,0 +1,38 @@
+import pytest
+from unittest.mock import MagicMock
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from crm_automation import api
+from crm_automation.core.pipeline import Pipeline, Step
+from crm_automation.core.retry import RetryPolicy, retry_call
+
+def sample(name, **labels):
+    from prometheus_client import REGISTRY
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_pipeline_steps_and_retries_are_recorded():
+    before_steps = sample("crm_step_duration_seconds_count", step="metrics_probe", status="succeeded")
+    before_retries = sample("crm_retries_total", operation="Probe click")
+    before_timeouts = sample("crm_timeouts_total", operation="Probe click")
+
+    Pipeline([Step("metrics_probe", lambda: None)]).run(lambda step, isolated: step.fn)
+    fn = MagicMock(side_effect=[PlaywrightTimeoutError("slow"), None])
+    retry_call(fn, policy=RetryPolicy(2, 0, 0), description="Probe click")
+
+    assert sample("crm_step_duration_seconds_count", step="metrics_probe", status="succeeded") == before_steps + 1
+    assert sample("crm_retries_total", operation="Probe click") == before_retries + 1
+    assert sample("crm_timeouts_total", operation="Probe click") == before_timeouts + 1
+
+def test_metrics_endpoint_reports_pool_usage(monkeypatch):
+    pool = MagicMock()
+    pool.health.return_value = {"busy": 1, "queued": 3, "slots": [
+        {"alive": True, "connected": True}, {"alive": True, "connected": True}, {"alive": False, "connected": False}]}
+    monkeypatch.setattr(api, "browser_pool", pool)
+    monkeypatch.setattr(api, "live_sessions", None)
+
+    response = api.prometheus_metrics()
+    body = response.body.decode()
+
+    assert response.media_type.startswith("text/plain")
+    assert 'crm_browser_pool_slots{state="busy"} 1.0' in body
+    assert 'crm_browser_pool_slots{state="idle"} 1.0' in body
+    assert "crm_browser_pool_queued_tasks 3.0" in body
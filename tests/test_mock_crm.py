@@ -0,0 +1,121 @@
+import json
+import time
+import urllib.error
+import urllib.request
+import pytest
+from crm_automation.config import Config
+from crm_automation.mock_crm import MockCRMServer
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+opener = urllib.request.build_opener(NoRedirect)
+
+def call(server, method, path, body=None, headers=None):
+    request = urllib.request.Request(server.url + path, method=method, headers=dict(headers or {}),
+                                     data=json.dumps(body).encode() if body is not None else None)
+    try:
+        with opener.open(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def login(server, code="123456"):
+    call(server, "POST", "/api/auth/login", {"email": "ops@example.com"})
+    status, _, body = call(server, "POST", "/api/auth/verify", {"email": "ops@example.com", "code": code})
+    return status, json.loads(body)
+
+@pytest.fixture
+def crm():
+    with MockCRMServer(otp_code="123456") as server:
+        yield server
+
+def test_pages_require_login(crm):
+    status, headers, _ = call(crm, "GET", "/panels")
+    assert status == 302 and headers["Location"] == "/login"
+    assert call(crm, "GET", "/login")[0] == 200
+    assert login(crm, code="000000")[0] == 401
+
+    status, data = login(crm)
+    assert status == 200
+    status, _, body = call(crm, "GET", "/panels", headers={"Cookie": f"crm_session={data['token']}"})
+    assert status == 200 and b'data-cy' in body
+
+def test_panels_and_tags_are_scoped_to_the_accessed_account(crm):
+    token = login(crm)[1]["token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    partner = json.loads(call(crm, "GET", "/api/partners?search=cl%C3%ADnica%20exemplo", headers=auth)[2])["data"][0]
+    assert partner["name"] == "Clínica Exemplo"
+    assert call(crm, "GET", "/api/panels", headers=auth)[0] == 400
+
+    body = json.loads(call(crm, "POST", f"/api/partners/{partner['id']}/access",
+                           {"user": "Dr. Daniel Dorta - SuperAdmin"}, headers=auth)[2])
+    account = dict(auth, **{"X-Company-Id": str(body["company_id"])})
+    panel = {"name": "Vendas", "description": "Funil", "stages": [{"name": "Novo", "type": "INITIAL", "position": 1}]}
+    assert call(crm, "POST", "/api/panels", panel, headers=account)[0] == 201
+    assert call(crm, "POST", "/api/panels", dict(panel, stages=[]), headers=account)[0] == 400
+    assert call(crm, "POST", "/api/tags", {"name": "VIP"}, headers=account)[0] == 201
+    assert call(crm, "POST", "/api/tags", {"name": " vip "}, headers=account)[0] == 409
+
+    assert [p["name"] for p in crm.state.panels("Clínica Exemplo")] == ["Vendas"]
+    assert crm.state.tags("Clínica Exemplo") == ["VIP"]
+    assert crm.state.panels("Clínica Sorriso") == []
+    assert crm.state.calls["POST /api/panels"] == 2
+
+def test_api_latency_is_configurable():
+    with MockCRMServer(latency_ms=150) as server:
+        started = time.monotonic()
+        call(server, "POST", "/api/auth/login", {"email": "ops@example.com"})
+        assert time.monotonic() - started >= 0.15
+
+def test_config_urls_follow_base_url(monkeypatch):
+    for name in ("BASE_URL", "URL_LOGIN", "URL_PARTNER", "URL_PANELS", "URL_CONTACTS"):
+        monkeypatch.setattr(Config, name, getattr(Config, name))
+    Config.use_base_url("http://127.0.0.1:8765/")
+    assert Config.URL_LOGIN == "http://127.0.0.1:8765/login"
+    assert Config.URL_PARTNER == "http://127.0.0.1:8765/admin/company/partner"
+    assert Config.URL_CONTACTS == "http://127.0.0.1:8765/contacts"
+
+def test_onboarding_runs_end_to_end_against_the_mock(crm, monkeypatch, tmp_path):
+    from playwright.sync_api import Error as PlaywrightError, sync_playwright
+    from crm_automation.core.browser_pool import new_context
+    from crm_automation.core.templates import OnboardingTemplate
+    from crm_automation.pages.admin_page import AdminPage
+    from crm_automation.pages.contacts_page import ContactsPage
+    from crm_automation.pages.login_page import LoginPage
+    from crm_automation.pages.panels_page import PanelsPage
+
+    for name in ("BASE_URL", "URL_LOGIN", "URL_PARTNER", "URL_PANELS", "URL_CONTACTS"):
+        monkeypatch.setattr(Config, name, getattr(Config, name))
+    monkeypatch.setattr(Config, "BACKEND_PROFILE", str(tmp_path / "backend_profile.json"))
+    Config.use_base_url(crm.url)
+    template = OnboardingTemplate.from_dict({
+        "panels": [{"name": "Vendas", "description": "Funil", "stages": [
+            {"name": "Novo", "type": "Fase inicial"}, {"name": "Ganho", "type": "Fase final"}]}],
+        "tags": ["VIP", "Lead"],
+    })
+
+    with sync_playwright() as p:
+        try:
+            browser = p.chromium.launch()
+        except PlaywrightError as e:
+            pytest.skip(f"Chromium not available: {e}")
+        try:
+            page = new_context(browser).new_page()
+            page.goto(Config.URL_LOGIN)
+            login_page = LoginPage(page)
+            login_page.initiate_login("ops@example.com")
+            login_page.submit_otp("123456")
+            AdminPage(page).access_account("Clínica Exemplo")
+            panels = PanelsPage(page, engine="ui")
+            panels.go_to_panels()
+            panels.create_all_panels(template=template)
+            ContactsPage(page, engine="ui").create_tags(template=template)
+        finally:
+            browser.close()
+
+    created = crm.state.panels("Clínica Exemplo")
+    assert [p["name"] for p in created] == ["Vendas"]
+    assert [(s["name"], s["type"]) for s in created[0]["stages"]] == [("Novo", "INITIAL"), ("Ganho", "FINAL")]
+    assert sorted(crm.state.tags("Clínica Exemplo")) == ["Lead", "VIP"]
@@ -0,0 +1,15 @@
+from crm_automation.core.network import ResourceBlocker
+
+def test_blocks_heavy_resource_types():
+    blocker = ResourceBlocker(block_types=["image", "font"], deny_domains=[], allow_domains=[])
+    assert blocker.block_reason("https://crm.infinitegear.app/logo.png", "image") == "type"
+    assert blocker.block_reason("https://crm.infinitegear.app/main.js", "script") is None
+    assert blocker.block_reason("data:image/png;base64,xx", "image") is None
+
+def test_deny_and_allow_lists_match_subdomains():
+    blocker = ResourceBlocker(block_types=[], deny_domains=["googletagmanager.com"], allow_domains=[])
+    assert blocker.block_reason("https://www.googletagmanager.com/gtm.js", "script") == "domain"
+
+    strict = ResourceBlocker(block_types=[], deny_domains=[], allow_domains=["infinitegear.app"])
+    assert strict.block_reason("https://api.infinitegear.app/v1/panels", "xhr") is None
+    assert strict.block_reason("https://cdn.example.com/lib.js", "script") == "domain"
@@ -0,0 +1,50 @@
+import threading
+import pytest
+from crm_automation.core.pipeline import Pipeline, PipelineDefinitionError, Step
+
+def make_bind(calls):
+    def bind(step, isolated):
+        def run():
+            calls.append((step.name, isolated, threading.current_thread().name))
+            step.fn()
+        return run
+    return bind
+
+def test_pipeline_runs_in_dependency_order_and_skips_after_failure():
+    def fail():
+        raise RuntimeError("panel modal did not open")
+
+    pipeline = Pipeline([
+        Step("tags", lambda: None, depends_on=["account"]),
+        Step("account", lambda: None),
+        Step("panels", fail, depends_on=["account"]),
+        Step("report", lambda: None, depends_on=["panels"]),
+    ])
+    calls, progress = [], []
+    with pytest.raises(RuntimeError, match="panel modal"):
+        pipeline.run(make_bind(calls), progress=lambda *event: progress.append(event))
+
+    assert [c[0] for c in calls] == ["account", "tags", "panels"]
+    assert ("panels", "failed", "panel modal did not open") in progress
+    assert not any(event[0] == "report" for event in progress)
+
+def test_pipeline_runs_isolated_siblings_concurrently():
+    # Both siblings must be inside run() at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    pipeline = Pipeline([
+        Step("account", lambda: None),
+        Step("panels", barrier.wait, depends_on=["account"], isolated=True),
+        Step("tags", barrier.wait, depends_on=["account"], isolated=True),
+    ])
+    calls = []
+    report = pipeline.run(make_bind(calls), parallelism=2)
+
+    assert [r["status"] for r in report] == ["succeeded"] * 3
+    assert calls[0] == ("account", False, threading.current_thread().name)
+    assert {(name, isolated) for name, isolated, _ in calls[1:]} == {("panels", True), ("tags", True)}
+
+def test_pipeline_rejects_cycles_and_unknown_dependencies():
+    with pytest.raises(PipelineDefinitionError, match="cycle"):
+        Pipeline([Step("a", None, depends_on=["b"]), Step("b", None, depends_on=["a"])])
+    with pytest.raises(PipelineDefinitionError, match="unknown"):
+        Pipeline([Step("a", None, depends_on=["missing"])])
@@ -0,0 +1,118 @@
+import json
+import os
+import pytest
+from crm_automation.config import Config
+from crm_automation.core.recording import (ARCHIVE_VERSION, HarReplay, RecordingArchive, RecordingError,
+                                           fulfillment, replayed_defaults)
+
+def entry(method, url, status=200, body="", post=None, headers=()):
+    request = {"method": method, "url": url, "headers": []}
+    if post is not None:
+        request["postData"] = {"mimeType": "application/json", "text": post}
+    return {"request": request, "response": {"status": status, "headers": [{"name": k, "value": v} for k, v in headers],
+                                             "content": {"mimeType": "application/json", "text": body}}}
+
+def write_har(path, entries):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"log": {"version": "1.2", "entries": entries}}, f)
+
+def test_archive_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "BACKEND_PROFILE", str(tmp_path / "missing_profile.json"))
+    path = str(tmp_path / "rec")
+    archive = RecordingArchive.create(path, "Clínica Exemplo", email="ops@example.com", code="123456")
+    assert archive.manifest["template"] == "template.json"
+    assert "code" not in archive.manifest
+    write_har(archive.har_path, [])
+    os.chmod(archive.har_path, 0o644)  # as Playwright leaves it
+
+    class Page:
+        url = "https://crm.example/panels"
+        def content(self):
+            return "<html>panels</html>"
+
+    archive.progress(Page())("create_panels", "running")
+    archive.progress(Page())("create_panels", "succeeded")
+    archive.finish("succeeded")
+
+    opened = RecordingArchive.open(path)
+    assert opened.manifest["status"] == "succeeded"
+    assert opened.manifest["snapshots"] == [{"step": "create_panels", "status": "succeeded",
+                                             "url": "https://crm.example/panels", "file": "dom/001-create-panels.html"}]
+    assert os.path.exists(os.path.join(path, "dom", "001-create-panels.html"))
+    assert replayed_defaults(opened.manifest) == {"account_name": "Clínica Exemplo", "email": "ops@example.com"}
+    # Owner only: the HAR holds session cookies and tokens
+    assert os.stat(path).st_mode & 0o777 == 0o700
+    assert os.stat(archive.har_path).st_mode & 0o777 == 0o600
+    assert os.stat(os.path.join(path, "manifest.json")).st_mode & 0o777 == 0o600
+    with pytest.raises(RecordingError):
+        RecordingArchive.create(path, "Clínica Exemplo")
+
+def test_replay_leaves_the_real_caches_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "BACKEND_PROFILE", str(tmp_path / "missing_profile.json"))
+    monkeypatch.setattr(Config, "INPUT_STRATEGY_CACHE", str(tmp_path / "input_strategies.json"))
+    monkeypatch.setattr(Config, "LOCATOR_CACHE", str(tmp_path / "locator_winners.json"))
+    archive = RecordingArchive.create(str(tmp_path / "rec"), "Clínica Exemplo")
+    with archive.replay_settings():
+        assert not Config.INPUT_STRATEGY_CACHE.startswith(str(tmp_path))
+        assert not Config.LOCATOR_CACHE.startswith(str(tmp_path))
+    assert Config.INPUT_STRATEGY_CACHE == str(tmp_path / "input_strategies.json")
+    assert Config.LOCATOR_CACHE == str(tmp_path / "locator_winners.json")
+
+def test_replay_with_a_backend_profile_never_calls_the_backend(tmp_path, monkeypatch):
+    from unittest.mock import MagicMock
+    from crm_automation.pages.contacts_page import ContactsPage
+    from crm_automation.pages.panels_page import PanelsPage
+    profile = tmp_path / "backend_profile.json"
+    profile.write_text(json.dumps({"version": 1, "panels": {"create": {"method": "POST", "url": "/api/panels"}}}))
+    monkeypatch.setattr(Config, "BACKEND_PROFILE", str(profile))
+    monkeypatch.setattr(Config, "PANELS_ENGINE", "auto")
+    archive = RecordingArchive.create(str(tmp_path / "rec"), "Clínica Exemplo")
+    assert archive.manifest["backend_profile"] == "backend_profile.json"
+
+    page = MagicMock()
+    with archive.replay_settings():
+        # page.request.fetch bypasses context routing: the HAR could not answer it
+        assert not PanelsPage(page).create_panel_via_backend("Vendas", "Funil", [("Novo", "Fase inicial")])
+        assert ContactsPage(page).backend is None
+    page.request.fetch.assert_not_called()
+    assert Config.PANELS_ENGINE == "auto"
+
+def test_archive_of_another_version_is_rejected(tmp_path):
+    (tmp_path / "manifest.json").write_text(json.dumps({"format": "crm-automation-recording",
+                                                        "version": ARCHIVE_VERSION + 1}))
+    with pytest.raises(RecordingError):
+        RecordingArchive.open(str(tmp_path))
+
+def test_replay_serves_repeated_requests_in_recorded_order(tmp_path):
+    url = "https://crm.example/api/panels"
+    har = str(tmp_path / "network.har")
+    write_har(har, [
+        entry("GET", url, body="[]"),
+        entry("POST", url, status=201, body='{"id": 1}', post='{"name": "Vendas", "color": "#123"}'),
+        entry("GET", url, body='[{"id": 1}]'),
+    ])
+    replay = HarReplay(har)
+
+    assert replay.lookup("GET", url)["response"]["content"]["text"] == "[]"
+    # Generated values in the body: falls back to method + URL
+    assert replay.lookup("POST", url, '{"name": "Vendas", "color": "#456"}')["response"]["status"] == 201
+    assert replay.lookup("GET", url)["response"]["content"]["text"] == '[{"id": 1}]'
+    # Out of recorded responses: the last one again (polling)
+    assert replay.lookup("GET", url)["response"]["content"]["text"] == '[{"id": 1}]'
+    assert replay.lookup("GET", "https://crm.example/api/tags") is None
+
+def test_fulfillment_drops_encoding_headers_and_keeps_cookies():
+    response = entry("GET", "https://crm.example/", body="aGk=", headers=[
+        ("Content-Encoding", "gzip"), ("Content-Length", "20"), ("Set-Cookie", "a=1"), ("Set-Cookie", "b=2"),
+    ])["response"]
+    response["content"]["encoding"] = "base64"
+    assert fulfillment(response) == {"status": 200, "headers": {"set-cookie": "a=1\nb=2"}, "body": b"hi"}
+
+def test_record_and_replay_flags():
+    from crm_automation.main import parse_args
+    assert parse_args(["--replay", "recordings/x"]).account_name is None
+    assert parse_args(["--account-name", "A", "--record"]).record == ""
+    with pytest.raises(SystemExit):
+        parse_args(["--accounts-file", "contas.txt", "--record"])
+    with pytest.raises(SystemExit):
+        parse_args([])
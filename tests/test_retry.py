@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import MagicMock
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from crm_automation.core.exceptions import ElementNotFoundError, InputRejectedError, LoginFailedError
+from crm_automation.core.retry import RetryPolicy, is_retryable, retry_call
+from crm_automation.pages.base_page import BasePage
+from crm_automation.pages.contacts_page import ContactsPage
+from crm_automation.pages.panels_page import PanelsPage
+from crm_automation.selectors import Selectors
+
+NO_WAIT = RetryPolicy(attempts=3, backoff=0, max_backoff=0)
+
+def test_errors_are_classified_by_hierarchy():
+    assert is_retryable(ElementNotFoundError("gone"))
+    assert is_retryable(PlaywrightTimeoutError("Timeout 30000ms exceeded"))
+    assert is_retryable(PlaywrightError("Element is not attached to the DOM"))
+    assert not is_retryable(PlaywrightError("Target page, context or browser has been closed"))
+    assert not is_retryable(LoginFailedError("wrong code"))
+    assert not is_retryable(ValueError("bug"))
+
+def test_retry_call_recovers_between_attempts():
+    fn = MagicMock(side_effect=[PlaywrightTimeoutError("slow"), PlaywrightTimeoutError("slow"), "saved"])
+    recover = MagicMock()
+    assert retry_call(fn, "Tarefas", policy=NO_WAIT, recover=recover) == "saved"
+    assert fn.call_count == 3 and recover.call_count == 2
+
+def test_retry_call_gives_up_on_budget_and_non_retryable_errors():
+    fn = MagicMock(side_effect=ElementNotFoundError("missing"))
+    with pytest.raises(ElementNotFoundError):
+        retry_call(fn, policy=NO_WAIT)
+    assert fn.call_count == 3
+
+    fn = MagicMock(side_effect=LoginFailedError("wrong code"))
+    with pytest.raises(LoginFailedError):
+        retry_call(fn, policy=NO_WAIT)
+    assert fn.call_count == 1
+
+def test_base_page_click_retries_transient_timeouts(monkeypatch):
+    monkeypatch.setattr("crm_automation.core.retry.Config.RETRY_BACKOFF", 0)
+    page = MagicMock()
+    page.click.side_effect = [PlaywrightTimeoutError("overlay"), None]
+    page.locator.return_value.count.return_value = 0
+    BasePage(page).click("text=Novo painel", "New Panel Button")
+    assert page.click.call_count == 2
+
+def test_nested_retries_do_not_multiply_attempts():
+    inner = MagicMock(side_effect=ElementNotFoundError("missing"))
+    outer = MagicMock(side_effect=lambda: retry_call(inner, policy=NO_WAIT))
+    with pytest.raises(ElementNotFoundError) as error:
+        retry_call(outer, policy=NO_WAIT)
+    assert inner.call_count == 3 and outer.call_count == 1
+    assert not is_retryable(error.value)
+
+def test_rejected_input_is_not_retried():
+    fn = MagicMock(side_effect=InputRejectedError("No input strategy set the value of input.search"))
+    with pytest.raises(InputRejectedError):
+        retry_call(fn, policy=NO_WAIT)
+    assert fn.call_count == 1
+
+def test_panel_retry_skips_a_panel_saved_with_other_spacing_or_case(monkeypatch):
+    monkeypatch.setattr("crm_automation.core.retry.Config.RETRY_BACKOFF", 0)
+    panels = PanelsPage(MagicMock(), engine="ui")
+    panels.create_panel = MagicMock(side_effect=PlaywrightTimeoutError("modal did not close"))
+    panels.recover = MagicMock()
+    panels.existing_panels = MagicMock(return_value={"vendas  b2b"})
+    panels.create_panel_with_retry("Vendas B2B", "Funil", [])
+    assert panels.create_panel.call_count == 1
+
+def test_tag_retry_looks_for_the_tag_in_the_editor_only():
+    page = MagicMock()
+    contacts = ContactsPage(page, engine="ui")
+    contacts.click = MagicMock(side_effect=PlaywrightTimeoutError("overlay"))
+    page.locator.return_value.is_visible.return_value = True
+    attempt = contacts._add_tag_attempt("VIP")
+    with pytest.raises(PlaywrightTimeoutError):
+        attempt()
+    page.locator.return_value.last.get_by_text.return_value.count.return_value = 1
+    attempt()
+    assert contacts.click.call_count == 1
+    page.locator.assert_any_call(Selectors.TAG_EDITOR)
+    page.get_by_text.assert_not_called()
@@ -0,0 +1,19 @@
+from crm_automation.core.session_cache import SessionCache
+
+def test_cache_roundtrip_is_case_insensitive(tmp_path):
+    cache = SessionCache(directory=str(tmp_path), ttl=60)
+    state = {"cookies": [{"name": "sid"}], "origins": []}
+    cache.put("Admin@Example.com", state)
+    assert cache.get("admin@example.com") == state
+
+def test_expired_entry_is_dropped(tmp_path):
+    cache = SessionCache(directory=str(tmp_path), ttl=0)
+    cache.put("admin@example.com", {"cookies": []})
+    assert cache.get("admin@example.com") is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_invalidate(tmp_path):
+    cache = SessionCache(directory=str(tmp_path), ttl=60)
+    cache.put("admin@example.com", {"cookies": []})
+    cache.invalidate("admin@example.com")
+    assert cache.get("admin@example.com") is None
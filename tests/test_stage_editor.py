@@ -0,0 +1,97 @@
+import pytest
+from unittest.mock import MagicMock
+from crm_automation.core.stage_editor import CLEAR_STAGES, WRITE_STAGES, stage_mismatches
+from crm_automation.pages.panels_page import PanelsPage
+
+STAGES = [("Novo", "Fase inicial"), ("Ganho", "Fase final")]
+
+def test_written_rows_matching_the_stages_pass():
+    snapshot = {"start": 1, "errors": [], "rows": [
+        {"name": "Leftover", "type": "Fase inicial"},
+        {"name": "Novo", "type": "Fase inicial"},
+        {"name": "Ganho ", "type": "fase final"},
+    ]}
+    assert stage_mismatches(STAGES, snapshot) == []
+
+def test_missing_rows_and_wrong_types_are_reported():
+    snapshot = {"start": 0, "errors": ["stage 2: no new row"], "rows": [{"name": "Novo", "type": "Tipo da fase"}]}
+    problems = stage_mismatches(STAGES, snapshot)
+    assert problems[0] == "stage 2: no new row"
+    assert "1 stage row(s) added, expected 2" in problems
+    assert any(p.startswith("stage 1 'Novo' type is 'Tipo da fase'") for p in problems)
+
+def panels_page(evaluate):
+    page = MagicMock()
+    page.evaluate.side_effect = evaluate
+    panels = PanelsPage(page, engine="ui")
+    panels.clear_stages_one_by_one = MagicMock()
+    return panels
+
+def test_clear_stages_uses_the_script_counts():
+    panels = panels_page(lambda script, args: {"removed": 3, "remaining": 0})
+    panels.clear_stages("modal")
+    assert panels.page.evaluate.call_args[0][0] == CLEAR_STAGES
+    panels.clear_stages_one_by_one.assert_not_called()
+
+def test_clear_stages_falls_back_to_the_ui_loop():
+    panels = panels_page(lambda script, args: {"removed": 1, "remaining": 2})
+    panels.clear_stages("modal")
+    panels.clear_stages_one_by_one.assert_called_once_with("modal")
+
+    def broken(script, args):
+        raise RuntimeError("Execution context was destroyed")
+    panels = panels_page(broken)
+    panels.clear_stages("modal")
+    panels.clear_stages_one_by_one.assert_called_once_with("modal")
+
+def test_dry_run_deletes_nothing(monkeypatch):
+    page = MagicMock()
+    panels = PanelsPage(page, dry_run=True)
+    for name in ("clear_stages", "clear_stages_one_by_one", "add_stages"):
+        monkeypatch.setattr(panels, name, MagicMock())
+    panels.create_panel("Vendas", "Funil", STAGES)
+    panels.clear_stages.assert_not_called()
+    panels.clear_stages_one_by_one.assert_not_called()
+    page.evaluate.assert_not_called()
+    panels.add_stages.assert_called_once()
+
+def test_scripts_edit_the_mock_panel_modal(monkeypatch, tmp_path):
+    from playwright.sync_api import Error as PlaywrightError, sync_playwright
+    from crm_automation.config import Config
+    from crm_automation.core.browser_pool import new_context
+    from crm_automation.mock_crm import MockCRMServer
+    from crm_automation.pages.admin_page import AdminPage
+    from crm_automation.pages.login_page import LoginPage
+    from crm_automation.selectors import Selectors
+
+    for name in ("BASE_URL", "URL_LOGIN", "URL_PARTNER", "URL_PANELS", "URL_CONTACTS"):
+        monkeypatch.setattr(Config, name, getattr(Config, name))
+    for name, file in (("INPUT_STRATEGY_CACHE", "input_strategies.json"), ("LOCATOR_CACHE", "locator_winners.json")):
+        monkeypatch.setattr(Config, name, str(tmp_path / file))
+
+    with MockCRMServer(otp_code="123456") as crm, sync_playwright() as p:
+        Config.use_base_url(crm.url)
+        try:
+            browser = p.chromium.launch()
+        except PlaywrightError as e:
+            pytest.skip(f"Chromium not available: {e}")
+        try:
+            page = new_context(browser).new_page()
+            page.goto(Config.URL_LOGIN)
+            LoginPage(page).initiate_login("ops@example.com")
+            LoginPage(page).submit_otp("123456")
+            AdminPage(page).access_account("Clínica Exemplo")
+            page.goto(Config.URL_PANELS)
+            page.click(Selectors.NEW_PANEL_BTN)
+            modal = page.locator("mat-dialog-container")
+            trash = modal.locator('button:has(mat-icon[data-mat-icon-name="trash"])')
+            trash.first.wait_for()
+            defaults = trash.count()
+
+            assert page.evaluate(CLEAR_STAGES, {"timeout": 2000}) == {"removed": defaults, "remaining": 0}
+            assert trash.count() == 0
+            snapshot = page.evaluate(WRITE_STAGES, {"stages": [list(s) for s in STAGES],
+                                                   "inputSelector": Selectors.STAGE_NAME_INPUT, "timeout": 2000})
+            assert stage_mismatches(STAGES, snapshot) == []
+        finally:
+            browser.close()
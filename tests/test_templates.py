@@ -0,0 +1,51 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from crm_automation.core.templates import TemplateError, load_template
+from crm_automation.pages.panels_page import PanelsPage
+
+def test_default_template_matches_built_in_onboarding():
+    template = load_template()
+    assert template.panel_names == ["Pré-Consulta", "Pós-Consulta", "Indicação", "Tarefas"]
+    assert template.tags == ["Paciente", "Lead", "Equipe"]
+    assert template.panels[3]["stages"] == [("Não Iniciadas", "Fase inicial"),
+                                            ("Em Andamento", "Fase intermediária"),
+                                            ("Concluídas", "Fase final")]
+
+def test_template_diff_ignores_case_and_spacing():
+    template = load_template()
+    missing = template.missing_panels(["pré-consulta", "Indicação  "])
+    assert [p["name"] for p in missing] == ["Pós-Consulta", "Tarefas"]
+    assert template.missing_tags(["LEAD"]) == ["Paciente", "Equipe"]
+
+def test_invalid_template_lists_every_problem(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text(json.dumps({
+        "panels": [{"name": "A", "stages": [{"name": "X", "type": "Fase única"}]}, {"name": "a", "stages": []}],
+        "tags": ["Lead", ""],
+    }), encoding="utf-8")
+    with pytest.raises(TemplateError) as exc:
+        load_template(str(path))
+    message = str(exc.value)
+    assert "Fase única" in message and "duplicate panel" in message and "tags[1]" in message
+
+def test_yaml_template(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "clinic.yaml"
+    path.write_text("panels:\n  - name: Vendas\n    stages:\n      - [Novo, Fase inicial]\n      - [Ganho, Fase final]\n"
+                    "tags: [VIP]\n", encoding="utf-8")
+    template = load_template(str(path))
+    assert template.name == "clinic"
+    assert template.panels[0]["stages"] == [("Novo", "Fase inicial"), ("Ganho", "Fase final")]
+
+def test_create_all_panels_only_creates_missing(monkeypatch):
+    created = []
+    monkeypatch.setattr(PanelsPage, "existing_panels", lambda self, names: {"Pré-Consulta", "Tarefas"})
+    monkeypatch.setattr(PanelsPage, "create_panel", lambda self, name, desc, stages: created.append(name))
+    monkeypatch.setattr(PanelsPage, "wait_for_idle", lambda self, **kw: True)
+
+    report = PanelsPage(MagicMock(), engine="ui").create_all_panels()
+
+    assert created == ["Pós-Consulta", "Indicação"]
+    assert {r["name"]: r["status"] for r in report} == {
+        "Pré-Consulta": "skipped", "Tarefas": "skipped", "Pós-Consulta": "succeeded", "Indicação": "succeeded"}
@@ -0,0 +1,98 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from crm_automation import workflow
+
+class FakePool:
+    def __init__(self):
+        self.states = []
+
+    def run(self, fn, storage_state=None):
+        self.states.append(storage_state)
+        return fn(MagicMock())
+
+def test_read_accounts_file_skips_blank_and_comments(tmp_path):
+    path = tmp_path / "accounts.txt"
+    path.write_text("Clinic A\n\n# comment\n  Clinic B  \n", encoding="utf-8")
+    assert workflow.read_accounts_file(str(path)) == ["Clinic A", "Clinic B"]
+
+def test_onboard_accounts_reports_each_account():
+    def fake_onboarding(page, account_name, dry_run=False, template=None, resume=None, pool=None):
+        if account_name == "Broken":
+            raise RuntimeError("search failed")
+
+    pool = FakePool()
+    progress = MagicMock()
+    with patch.object(workflow, "run_onboarding", side_effect=fake_onboarding):
+        results = workflow.onboard_accounts(pool, {"cookies": []}, ["A", "Broken", "C"],
+                                            concurrency=2, progress=progress)
+
+    assert [r["status"] for r in results] == ["succeeded", "failed", "succeeded"]
+    assert results[1]["error"] == "search failed"
+    assert pool.states == [{"cookies": []}] * 3
+    progress.assert_any_call("account:Broken", "failed", "search failed")
+
+def fake_panels(monkeypatch, failing):
+    from crm_automation.pages import panels_page
+
+    def fake_create_panel(self, name, description, stages):
+        if name == failing:
+            raise RuntimeError("modal did not open")
+
+    monkeypatch.setattr(panels_page, "snapshot_session", lambda page: {"storage_state": {"cookies": []}})
+    monkeypatch.setattr(panels_page.PanelsPage, "go_to_panels", lambda self: None)
+    monkeypatch.setattr(panels_page.PanelsPage, "existing_panels", lambda self, names: set())
+    monkeypatch.setattr(panels_page.PanelsPage, "create_panel", fake_create_panel)
+    monkeypatch.setattr(panels_page.PanelsPage, "wait_for_idle", lambda self, **kw: True)
+    monkeypatch.setattr("crm_automation.core.retry.Config.RETRY_BACKOFF", 0)
+    return panels_page
+
+def test_parallel_panels_report_every_panel(monkeypatch):
+    from contextlib import contextmanager
+    from crm_automation.core.exceptions import ActionFailedError
+
+    class FakeFuturePool:
+        size = 2
+        def __init__(self):
+            self.kwargs = []
+            self.leased = []
+        @contextmanager
+        def lease(self, count):
+            self.leased.append(count)
+            yield self
+        def submit(self, fn, **kwargs):
+            from concurrent.futures import Future
+            self.kwargs.append(kwargs)
+            future = Future()
+            try:
+                future.set_result(fn(MagicMock()))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+    panels_page = fake_panels(monkeypatch, failing="Indicação")
+    pool = FakeFuturePool()
+    page = panels_page.PanelsPage(MagicMock(), engine="ui")
+    with pytest.raises(ActionFailedError, match="Indicação"):
+        page.create_all_panels(parallelism=2, pool=pool)
+    # The caller's pool, no browsers of its own
+    assert pool.leased == [2] and len(pool.kwargs) > 1
+
+def test_sequential_panels_report_every_panel(monkeypatch):
+    from crm_automation.core.exceptions import ActionFailedError
+    from crm_automation.core.retry import is_retryable
+    from crm_automation.core.templates import load_template
+
+    panels_page = fake_panels(monkeypatch, failing="Indicação")
+    created = []
+    create = panels_page.PanelsPage.create_panel
+    monkeypatch.setattr(panels_page.PanelsPage, "create_panel",
+                        lambda self, name, *args: created.append(name) or create(self, name, *args))
+    monkeypatch.setattr(panels_page.PanelsPage, "recover", lambda self, error=None: None)
+
+    page = panels_page.PanelsPage(MagicMock(), engine="ui")
+    with pytest.raises(ActionFailedError, match="Indicação") as error:
+        page.create_all_panels(parallelism=1)
+    names = [panel["name"] for panel in load_template().panels]
+    # Every panel was tried, the failed one retried as a panel but not again as a step
+    assert [n for n in names if n in created] == names
+    assert not is_retryable(error.value)